@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+HubSpot → LeadGenius streaming sync connector.
+
+Implements the rules from HUBSPOT_TO_LEADGENIUS.md as a pipeline instead of
+the load-everything template:
+
+    contacts pager ──> company batch-reads (concurrent, as association IDs
+    appear) ──> build_lead() ──> concurrent single-lead importer
+
+Pages flow through a bounded queue, so memory stays flat regardless of the
+number of contacts. Incremental mode uses the CRM search API with a
+`lastmodifieddate` watermark stored per client in the local cache directory,
+and upserts: contacts whose email is already stored for the client update
+that lead (batched PUT /api/leads) instead of creating a second one.
+
+Usage (normally via `lgp import hubspot`):
+    python3 hubspot_sync.py --client historic-contacts [--incremental]
+
+Point --hubspot-url (or HUBSPOT_API_URL) at a local HubSpot stand-in to test
+the connector without touching a real portal.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from import_csv import (
+    DEFAULT_BASE_URL, DEFAULT_CONCURRENCY, DEFAULT_RATE, DEFAULT_VERIFY_SAMPLE,
+    client_registry, import_leads_single, iter_client_leads, load_auth, lookup_missing,
+    make_request_with_retry, normalize_email, resolve_client,
+)
+import lgp_json
+from lead_record import Lead
+from lgp_cache import CACHE_DIR
+import lgp_http
+import lgp_latency
+from lgp_http import RateLimiter, new_session
+
+HUBSPOT_API = "https://api.hubapi.com"
+STATE_FILE = os.path.join(CACHE_DIR, "hubspot_sync.json")
+
+CONTACT_PROPERTIES = [
+    "firstname", "lastname", "email", "jobtitle", "phone", "mobilephone",
+    "city", "country", "lifecyclestage", "hs_lead_status", "lastmodifieddate",
+]
+COMPANY_PROPERTIES = ["name", "domain", "industry", "phone", "city", "country"]
+GENERIC_EMAIL_DOMAINS = {"gmail.com", "yahoo.com", "hotmail.com", "outlook.com"}
+
+PAGE_SIZE = 100              # HubSpot maximum for list/search/batch endpoints
+SEARCH_RESULT_CAP = 10000    # HubSpot search stops paging after 10k results per query
+HUBSPOT_RATE = 600           # requests/min (private apps allow 100 per 10s)
+PAGES_IN_FLIGHT = 8          # bounded queue between the pager and the mapper
+COMPANY_CACHE_SIZE = 50000   # LRU of company properties reused across pages
+WATERMARK_OVERLAP_MS = 5 * 60 * 1000
+UPDATE_BATCH_SIZE = 50       # existing leads per PUT /api/leads in incremental runs
+
+
+class HubSpotClient:
+    """Minimal HubSpot CRM v3/v4 client with shared rate limiting and 429 handling."""
+
+    def __init__(self, token: str, base_url: str = HUBSPOT_API, rate_per_minute: float = HUBSPOT_RATE,
+                 pool_size: int = 8, max_retries: int = 5):
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        self.session = new_session(pool_size)
+        self.limiter = RateLimiter(rate_per_minute, burst=10)
+        self.max_retries = max_retries
+
+    def request(self, method: str, path: str, params: Dict = None, json_data: Dict = None) -> Dict[str, Any]:
+        attempt, paused = 0, False
+        while attempt < self.max_retries:
+            self.limiter.acquire()
+            try:
+                response = lgp_json.request_json(self.session, method, f"{self.base_url}{path}", json_data,
+                                                 headers=self.headers, params=params, timeout=60, priority="bulk")
+            except lgp_latency.CircuitOpenError as e:
+                # Refused without sending: wait for the breaker, without using up a retry.
+                if not paused:
+                    print(f"⏸  {e}. Waiting for it to recover...")
+                    paused = True
+                time.sleep(e.retry_after)
+                continue
+            attempt, paused = attempt + 1, False
+            if response.status_code == 429 or response.status_code >= 500:
+                wait_time = float(response.headers.get("Retry-After") or min(2 ** (attempt - 1), 30))
+                print(f"⏳ HubSpot {response.status_code}. Waiting {wait_time:g}s (attempt {attempt}/{self.max_retries})...")
+                time.sleep(wait_time)
+                continue
+            response.raise_for_status()
+            return lgp_json.response_json(response)
+        raise Exception(f"HubSpot: max retries ({self.max_retries}) exceeded for {method} {path}")
+
+    def iter_contact_pages(self) -> Iterator[List[Dict[str, Any]]]:
+        """All contacts, with company associations inline."""
+        params = {"limit": PAGE_SIZE, "properties": ",".join(CONTACT_PROPERTIES), "associations": "companies"}
+        while True:
+            data = self.request("GET", "/crm/v3/objects/contacts", params=params)
+            yield data.get("results", [])
+            after = data.get("paging", {}).get("next", {}).get("after")
+            if not after:
+                return
+            params["after"] = after
+
+    def iter_modified_contact_pages(self, since_ms: int) -> Iterator[List[Dict[str, Any]]]:
+        """Contacts modified at or after `since_ms`, oldest first, with associations attached.
+
+        Search results are capped at 10k per query, so when the cap is reached
+        the query restarts from the last modification time seen. The restart
+        is inclusive (GTE), so contacts sharing that timestamp are yielded
+        again; stream_leads() drops them by contact ID.
+        """
+        while True:
+            body = {
+                "filterGroups": [{"filters": [
+                    {"propertyName": "lastmodifieddate", "operator": "GTE", "value": str(since_ms)}
+                ]}],
+                "sorts": [{"propertyName": "lastmodifieddate", "direction": "ASCENDING"}],
+                "properties": CONTACT_PROPERTIES,
+                "limit": PAGE_SIZE,
+            }
+            fetched = 0
+            last_modified = since_ms
+            while True:
+                data = self.request("POST", "/crm/v3/objects/contacts/search", json_data=body)
+                results = data.get("results", [])
+                self.attach_company_associations(results)
+                yield results
+                fetched += len(results)
+                if results:
+                    last_modified = _modified_ms(results[-1], last_modified)
+                after = data.get("paging", {}).get("next", {}).get("after")
+                if not after:
+                    return
+                if fetched + PAGE_SIZE > SEARCH_RESULT_CAP:
+                    break
+                body["after"] = after
+            if last_modified == since_ms:
+                return  # 10k contacts share one timestamp; nothing more we can page through
+            since_ms = last_modified
+
+    def attach_company_associations(self, contacts: List[Dict[str, Any]]):
+        """Search results carry no associations; fetch them in one v4 batch call per page."""
+        if not contacts:
+            return
+        data = self.request("POST", "/crm/v4/associations/contacts/companies/batch/read",
+                            json_data={"inputs": [{"id": c["id"]} for c in contacts]})
+        by_contact = {
+            str(r.get("from", {}).get("id")): [{"id": str(t.get("toObjectId"))} for t in r.get("to", [])]
+            for r in data.get("results", [])
+        }
+        for c in contacts:
+            c["associations"] = {"companies": {"results": by_contact.get(str(c["id"]), [])}}
+
+    def read_companies(self, company_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        data = self.request("POST", "/crm/v3/objects/companies/batch/read", json_data={
+            "properties": COMPANY_PROPERTIES,
+            "inputs": [{"id": cid} for cid in company_ids],
+        })
+        return {r["id"]: r.get("properties", {}) for r in data.get("results", [])}
+
+
+def _modified_ms(contact: Dict[str, Any], default: int) -> int:
+    value = contact.get("properties", {}).get("lastmodifieddate") or contact.get("updatedAt")
+    if not value:
+        return default
+    if str(value).isdigit():
+        return int(value)
+    try:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1000)
+    except ValueError:
+        return default
+
+
+def _company_ids(contact: Dict[str, Any]) -> List[str]:
+    return [a["id"] for a in contact.get("associations", {}).get("companies", {}).get("results", [])]
+
+
+def build_lead(contact: Dict[str, Any], companies_map: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Map a HubSpot contact to a LeadGenius lead payload (rules from HUBSPOT_TO_LEADGENIUS.md §5)."""
+    p = contact.get("properties", {})
+    email = (p.get("email") or "").strip()
+    if not email:
+        return None
+
+    # Company from associations (NOT from contact.properties.company)
+    company_name = ""
+    company_domain = ""
+    company = {}
+    assocs = _company_ids(contact)
+    if assocs:
+        company = companies_map.get(assocs[0], {}) or {}
+        company_name = company.get("name", "") or ""
+        company_domain = company.get("domain", "") or ""
+
+    # Fallback: derive from email domain
+    if not company_name:
+        domain = email.split("@")[1] if "@" in email else ""
+        if domain and domain not in GENERIC_EMAIL_DOMAINS:
+            company_name = domain.split(".")[0].capitalize()
+
+    # Names: never empty, never a lone dot
+    fn = (p.get("firstname") or "").strip()
+    ln = (p.get("lastname") or "").strip()
+    if not fn or not ln or ln == ".":
+        parts = re.split(r"[._-]", email.split("@")[0])
+        if not fn:
+            fn = parts[0].capitalize()
+        if not ln or ln == ".":
+            ln = parts[-1].capitalize() if len(parts) >= 2 else "-"
+
+    # Build payload — OMIT empty fields
+    lead = {"firstName": fn, "lastName": ln, "email": email}
+    if company_name:
+        lead["companyName"] = company_name
+    title = (p.get("jobtitle") or "").strip()
+    if title:
+        lead["title"] = title
+    phone = (p.get("phone") or p.get("mobilephone") or "").strip()
+    if phone:
+        lead["phoneNumber"] = phone   # ← NOT "phone"
+    if company_domain:
+        lead["companyUrl"] = company_domain
+    for field in ("city", "country"):
+        if (p.get(field) or "").strip():
+            lead[field] = p[field].strip()
+
+    notes_parts = ["Historic Contact imported from HubSpot"]
+    if p.get("lifecyclestage"):
+        notes_parts.append(f"Lifecycle: {p['lifecyclestage']}")
+    if p.get("hs_lead_status"):
+        notes_parts.append(f"Status: {p['hs_lead_status']}")
+    if company.get("industry"):
+        notes_parts.append(f"Industry: {company['industry']}")
+    lead["notes"] = "\n".join(notes_parts)
+    return lead
+
+
+class _CompanyCache:
+    """Thread-safe LRU of company properties keyed by HubSpot company ID."""
+
+    def __init__(self, size: int = COMPANY_CACHE_SIZE):
+        self.size = size
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def missing(self, ids) -> List[str]:
+        with self._lock:
+            return [i for i in dict.fromkeys(ids) if i not in self._data]
+
+    def update(self, companies: Dict[str, Dict[str, Any]]):
+        with self._lock:
+            for cid, props in companies.items():
+                self._data[cid] = props
+                self._data.move_to_end(cid)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def view(self, ids) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {i: self._data[i] for i in ids if i in self._data}
+
+
+def stream_leads(hubspot: HubSpotClient, since_ms: int = None, company_workers: int = 4,
+                 stats: Dict[str, int] = None) -> Iterator[Dict[str, Any]]:
+    """Yield lead payloads while later pages and their companies are still being fetched.
+
+    A pager thread pushes (contacts, company-fetch futures) onto a bounded
+    queue; company batch-reads for each page start as soon as the page
+    arrives and run concurrently with mapping and importing earlier pages.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("contacts", 0)
+    stats.setdefault("skipped", 0)
+    stats.setdefault("duplicates", 0)
+    cache = _CompanyCache()
+    seen_ids = set()
+    pages: "queue.Queue" = queue.Queue(maxsize=PAGES_IN_FLIGHT)
+    done = object()
+    stop = threading.Event()
+
+    def pager(company_pool):
+        try:
+            source = (hubspot.iter_modified_contact_pages(since_ms) if since_ms is not None
+                      else hubspot.iter_contact_pages())
+            for contacts in source:
+                if stop.is_set():
+                    return
+                ids = cache.missing(cid for c in contacts for cid in _company_ids(c))
+                futures = [company_pool.submit(hubspot.read_companies, ids[i:i + PAGE_SIZE])
+                           for i in range(0, len(ids), PAGE_SIZE)]
+                pages.put((contacts, futures))
+            pages.put(done)
+        except Exception as e:
+            pages.put(e)
+
+    with ThreadPoolExecutor(max_workers=company_workers) as company_pool:
+        thread = threading.Thread(target=pager, args=(company_pool,), daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                contacts, futures = item
+                for future in futures:
+                    cache.update(future.result())
+                companies = cache.view(cid for c in contacts for cid in _company_ids(c))
+                for contact in contacts:
+                    if contact.get("id") in seen_ids:
+                        stats["duplicates"] += 1
+                        continue
+                    seen_ids.add(contact.get("id"))
+                    stats["contacts"] += 1
+                    lead = build_lead(contact, companies)
+                    if lead is None:
+                        stats["skipped"] += 1
+                        continue
+                    yield lead
+        finally:
+            stop.set()
+            # Unblock the pager if it is waiting on a full queue.
+            while thread.is_alive():
+                try:
+                    pages.get_nowait()
+                except queue.Empty:
+                    thread.join(0.1)
+
+
+def existing_lead_ids(base_url: str, headers: Dict[str, str], client_slug: str,
+                      session=None) -> Dict[str, str]:
+    """Normalized email -> lead ID for every lead already stored for the client (one listing pass)."""
+    return {normalize_email(lead["email"]): lead["id"]
+            for lead in iter_client_leads(base_url, headers, client_slug, session=session, fields=("id", "email"))
+            if lead.get("email") and lead.get("id")}
+
+
+def route_existing(leads: Iterator[Dict[str, Any]], existing: Dict[str, str],
+                   send_updates, stats: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """Yield only the leads to create; leads already stored are sent to `send_updates` in batches.
+
+    An email seen earlier in the run is skipped, so two contacts sharing an
+    address never become two leads.
+    """
+    stats.setdefault("duplicates", 0)
+    seen = set()
+    batch: List[Dict[str, Any]] = []
+    for lead in leads:
+        email = normalize_email(lead["email"])
+        if email in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(email)
+        lead_id = existing.get(email)
+        if lead_id is None:
+            yield lead
+            continue
+        batch.append({**lead, "id": lead_id})
+        if len(batch) >= UPDATE_BATCH_SIZE:
+            send_updates(batch)
+            batch = []
+    if batch:
+        send_updates(batch)
+
+
+# ─── Incremental watermark state ────────────────────────────────────────────
+def _state_key(hubspot_token: str, client_slug: str) -> str:
+    portal = hashlib.sha256(hubspot_token.encode("utf-8")).hexdigest()[:16]
+    return f"{portal}:{client_slug}"
+
+
+def load_watermark(hubspot_token: str, client_slug: str) -> Optional[int]:
+    try:
+        with open(STATE_FILE, "r") as f:
+            return json.load(f).get(_state_key(hubspot_token, client_slug))
+    except (OSError, ValueError):
+        return None
+
+
+def save_watermark(hubspot_token: str, client_slug: str, since_ms: int):
+    try:
+        with open(STATE_FILE, "r") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+    state[_state_key(hubspot_token, client_slug)] = since_ms
+    os.makedirs(os.path.dirname(STATE_FILE), mode=0o700, exist_ok=True)
+    with open(STATE_FILE, "w") as f:
+        json.dump(state, f, indent=2)
+
+
+def sync(
+    hubspot: HubSpotClient,
+    hubspot_token: str,
+    base_url: str,
+    headers: Dict[str, str],
+    client_slug: str,
+    incremental: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate_per_minute: float = DEFAULT_RATE,
+    verify_sample: int = DEFAULT_VERIFY_SAMPLE,
+    dry_run: bool = False,
+    budget=None
+) -> Dict[str, Any]:
+    """Run one sync. The watermark only advances when every lead was created or updated.
+
+    Incremental runs are upserts: modified contacts that already have a lead
+    (matched by email) update it; only new contacts are created.
+    """
+    run_started_ms = int(time.time() * 1000)
+    since_ms = load_watermark(hubspot_token, client_slug) if incremental else None
+    if incremental and since_ms is None:
+        print("ℹ️  No previous sync recorded for this client — running a full sync")
+    elif since_ms is not None:
+        print(f"🔄 Incremental sync: contacts modified since {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(since_ms / 1000))} UTC")
+
+    stats: Dict[str, int] = {}
+    leads = stream_leads(hubspot, since_ms=since_ms, stats=stats)
+
+    if dry_run:
+        sample = []
+        for lead in leads:
+            if len(sample) < 3:
+                sample.append(lead)
+        print(json.dumps(sample, indent=2))
+        print(f"\n📊 Contacts: {stats['contacts']}, mappable leads: {stats['contacts'] - stats['skipped']}")
+        return {"contacts": stats["contacts"], "created": 0, "updated": 0, "failed": [], "missing": []}
+
+    # Reservoir sample of created leads for read-back, so verification memory stays bounded too.
+    # It is held for the whole run, so the sample is kept as compact Lead records.
+    reservoir: List[Lead] = []
+    seen = [0]
+
+    def on_created(lead):
+        seen[0] += 1
+        if len(reservoir) < verify_sample:
+            reservoir.append(Lead.from_payload(lead))
+        else:
+            j = random.randrange(seen[0])
+            if j < verify_sample:
+                reservoir[j] = Lead.from_payload(lead)
+
+    session = new_session(concurrency)
+    updated = {"count": 0, "failed": []}
+    if incremental:
+        try:
+            existing = existing_lead_ids(base_url, headers, client_slug, session=session)
+        except Exception as e:
+            print(f"❌ Could not list existing leads for '{client_slug}': {e}")
+            return {"contacts": 0, "created": 0, "updated": 0, "failed": [{"lead": {}, "error": str(e)}],
+                    "missing": []}
+        print(f"🔎 {len(existing)} lead(s) already stored for '{client_slug}' will be updated, not re-created")
+        limiter = RateLimiter(rate_per_minute, priority="bulk", budget=budget)
+        url = f"{base_url}/api/leads"
+
+        def send_updates(batch):
+            limiter.acquire()
+            try:
+                make_request_with_retry(url, headers, method="PUT", json_data={"leads": batch}, session=session)
+                updated["count"] += len(batch)
+            except Exception as e:
+                updated["failed"].extend({"lead": lead, "error": str(e)} for lead in batch)
+
+        leads = route_existing(leads, existing, send_updates, stats)
+
+    result = import_leads_single(base_url, headers, client_slug, leads, concurrency=concurrency,
+                                 rate_per_minute=rate_per_minute, session=session,
+                                 on_created=on_created, collect=False, budget=budget)
+
+    missing = []
+    if reservoir:
+        missing = lookup_missing(base_url, headers, client_slug, reservoir, session=session)
+        print(f"🔍 Read back {len(reservoir)} sampled lead(s): {len(missing)} missing")
+
+    failed = result["failed"] + updated["failed"]
+    if not failed and not missing:
+        # The overlap re-reads contacts whose modification was indexed late; incremental runs upsert them.
+        save_watermark(hubspot_token, client_slug, run_started_ms - WATERMARK_OVERLAP_MS)
+
+    print(f"\n{'=' * 50}")
+    print(f"DONE in {result['elapsed'] / 60:.1f} min | Contacts: {stats['contacts']} | "
+          f"Created: {result['created_count']} | Updated: {updated['count']} | "
+          f"Skipped (no email): {stats['skipped']} | Duplicates: {stats['duplicates']} | Failed: {len(failed)}")
+    print(f"Transfer: {lgp_http.TRANSFER.summary()}")
+    print(f"{'=' * 50}")
+    for failure in failed[:10]:
+        print(f"  ❌ {failure['lead'].get('email')}: {failure['error'][:120]}")
+    return {"contacts": stats["contacts"], "created": result["created_count"], "updated": updated["count"],
+            "failed": failed, "missing": missing}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream HubSpot contacts into a LeadGenius client")
+    parser.add_argument("--client", required=True, help="Target client name, slug or UUID")
+    parser.add_argument("--hubspot-token", default=os.environ.get("HUBSPOT_ACCESS_TOKEN"),
+                        help="HubSpot private app token (defaults to HUBSPOT_ACCESS_TOKEN)")
+    parser.add_argument("--hubspot-url", default=os.environ.get("HUBSPOT_API_URL", HUBSPOT_API),
+                        help=f"HubSpot API base URL (default: {HUBSPOT_API})")
+    parser.add_argument("--incremental", action="store_true", help="Only contacts modified since the last successful sync")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Max LeadGenius requests/min")
+    parser.add_argument("--verify-sample", type=int, default=DEFAULT_VERIFY_SAMPLE)
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--dry-run", action="store_true", help="Map contacts but don't import")
+    args = parser.parse_args()
+
+    if not args.hubspot_token:
+        print("Error: HubSpot token required. Use --hubspot-token or set HUBSPOT_ACCESS_TOKEN.")
+        sys.exit(1)
+
+    auth = load_auth()
+    base_url = args.base_url.rstrip('/')
+    headers = {"Authorization": f"Bearer {auth['token']}", "Content-Type": "application/json"}
+    client_slug = resolve_client(client_registry(base_url, headers, auth), base_url, headers,
+                                 args.client, create=False)
+
+    hubspot = HubSpotClient(args.hubspot_token, base_url=args.hubspot_url)
+    result = sync(hubspot, args.hubspot_token, base_url, headers, client_slug,
+                  incremental=args.incremental, concurrency=args.concurrency, rate_per_minute=args.rate,
+                  verify_sample=args.verify_sample, dry_run=args.dry_run)
+    sys.exit(1 if result["failed"] or result["missing"] else 0)
+
+
+if __name__ == "__main__":
+    main()
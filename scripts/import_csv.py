@@ -4,13 +4,30 @@ CSV Lead Import Script for LeadGenius Pro API
 
 This script demonstrates best practices for importing leads from a CSV file:
 - Proper client creation and slug capture
-- Batch processing with recommended size (50 leads)
-- Rate limit handling with exponential backoff
+- Single-lead POSTs over a pooled keep-alive session with concurrent workers
+  (the batch endpoint can return 201 without persisting; --mode batch still
+  sends batches of 50)
+- Shared rate limiting plus exponential backoff on 429/5xx, per-endpoint
+  timeouts, and a pause instead of failures while the API's circuit breaker
+  is open (see lgp_latency.py)
+- Verification that reconciles the emails sent against what the server
+  stores (full streamed listing, or a statistical sample for very large
+  imports) and re-queues missing leads
 - Progress tracking and error reporting
-- AI field aggregation into notes for UI visibility
+- AI field aggregation into notes for UI visibility (compiled template
+  rendered per batch, see lead_notes.py)
 
 Usage:
     python3 import_csv.py --csv leads.csv --client-name "My Client" [--base-url URL]
+    python3 import_csv.py --csv leads.csv --client acme-corp
+    python3 import_csv.py --input vendor.parquet --client acme-corp
+    python3 import_csv.py --input leads.ndjson.zst --client acme-corp
+    python3 import_csv.py --input apollo_export.csv --mapping apollo --client acme-corp
+
+Parquet and Arrow inputs need pyarrow, .zst inputs need zstandard. Columns
+are matched to lead fields by name (case and punctuation ignored, common
+vendor spellings such as first_name or job_title accepted), and fullName is
+derived from firstName + lastName when absent.
 
 CSV Format:
     firstName,lastName,email,companyName,companyDomain,title,linkedinUrl,notes
@@ -18,18 +35,40 @@ CSV Format:
 """
 
 import argparse
-import csv
 import json
+import math
 import os
+import random
 import time
 import sys
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Sequence
+from urllib.parse import urlencode
 import requests
 from requests.exceptions import HTTPError
 
+from lead_mapping import list_profiles, load_profile
+from lead_notes import NOTES_MAX_BYTES, NotesTemplate
+from lead_record import compact
+from lead_sources import FORMATS, iter_lead_batches
+import lgp_json
+import lgp_latency
+from lgp_clients import ClientRegistry
+import lgp_http
+import lgp_profile
+import lgp_scheduler
+from lgp_http import RateLimiter, new_session
+
 # Constants
 BATCH_SIZE = 50
 MAX_RETRIES = 5
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RATE = 400  # requests/min; the documented safe rate for single-lead POSTs
+DEFAULT_VERIFY_SAMPLE = 200
+VERIFY_FULL_MAX = 50000    # above this, --verify auto samples unless the bulk endpoint is available
+VERIFY_RETRIES = 2
+LEADS_PAGE_SIZE = 1000     # GET /api/leads maximum
+BULK_PAGE_SIZE = 5000      # GET /api/enrich-leads/list maximum
 DEFAULT_BASE_URL = "https://last.leadgenius.app"
 AUTH_FILE = os.path.expanduser("~/.leadgenius_auth.json")
 
@@ -45,38 +84,66 @@ def load_auth() -> Dict[str, str]:
         return json.load(f)
 
 
-def make_request_with_retry(
+def retry_wait(attempt: int, retry_after: str = None, base: float = 1, cap: float = 60) -> float:
+    """Seconds before retry `attempt`: Retry-After when given, else jittered exponential backoff."""
+    try:
+        return min(float(retry_after), cap)
+    except (TypeError, ValueError):
+        return min(base * (2 ** attempt), cap) * random.uniform(0.5, 1.0)
+
+
+def send_with_retry(
     url: str,
     headers: Dict[str, str],
     method: str = "GET",
     json_data: Dict = None,
-    max_retries: int = MAX_RETRIES
-) -> Dict[str, Any]:
-    """Make API request with automatic retry on rate limits and server errors."""
-    for attempt in range(max_retries):
+    max_retries: int = MAX_RETRIES,
+    session: requests.Session = None,
+    stream: bool = False
+) -> requests.Response:
+    """Send an API request with automatic retry on rate limits and server errors. Returns the response.
+
+    Imports are bulk work: while the API's circuit breaker is open they wait
+    for it instead of sending (lgp_latency), and every request has a timeout.
+    A refusal by the breaker sends nothing, so it does not use up a retry:
+    however long the outage, the lead is sent once the breaker admits it.
+    """
+    http = session or requests
+    attempt, paused = 0, False
+    while attempt < max_retries:
         try:
-            if method == "GET":
-                response = requests.get(url, headers=headers)
-            elif method == "POST":
-                response = requests.post(url, headers=headers, json=json_data)
-            elif method == "PUT":
-                response = requests.put(url, headers=headers, json=json_data)
-            elif method == "DELETE":
-                response = requests.delete(url, headers=headers, json=json_data)
-
+            response = lgp_json.request_json(http, method, url, json_data, headers=headers, stream=stream,
+                                             priority="bulk")
             response.raise_for_status()
-            return response.json()
+            return response
+
+        except lgp_latency.CircuitOpenError as e:
+            # Nothing was sent; the breaker says when the API is worth trying again.
+            if not paused:
+                print(f"⏸  {e}. Waiting for it to recover...")
+                paused = True
+            time.sleep(e.retry_after)
+            continue
+
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            # A GET that hung or dropped is safe to resend; a POST may have created the lead.
+            if method != "GET" or attempt + 1 >= max_retries:
+                print(f"❌ {type(e).__name__}: {e}")
+                raise
+            wait_time = retry_wait(attempt, base=1, cap=30)
+            print(f"⚠️  {type(e).__name__}. Retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})...")
+            time.sleep(wait_time)
 
         except HTTPError as e:
             if e.response.status_code == 429:
-                # Rate limited - exponential backoff
-                wait_time = min(60 * (2 ** attempt), 300)  # Max 5 minutes
-                print(f"⏳ Rate limited. Waiting {wait_time}s (attempt {attempt + 1}/{max_retries})...")
+                # Rate limited - honour Retry-After, else exponential backoff
+                wait_time = retry_wait(attempt, e.response.headers.get("Retry-After"), base=60, cap=300)
+                print(f"⏳ Rate limited. Waiting {wait_time:.0f}s (attempt {attempt + 1}/{max_retries})...")
                 time.sleep(wait_time)
             elif e.response.status_code >= 500:
-                # Server error - retry with backoff
-                wait_time = min(10 * (2 ** attempt), 60)  # Max 1 minute
-                print(f"⚠️  Server error. Waiting {wait_time}s (attempt {attempt + 1}/{max_retries})...")
+                # Server error - short jittered backoff; a failing API trips the breaker instead
+                wait_time = retry_wait(attempt, base=1, cap=30)
+                print(f"⚠️  Server error. Waiting {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})...")
                 time.sleep(wait_time)
             else:
                 # Other errors - don't retry
@@ -87,10 +154,62 @@ def make_request_with_retry(
             print(f"❌ Unexpected error: {e}")
             raise
 
+        attempt, paused = attempt + 1, False
+
     raise Exception(f"Max retries ({max_retries}) exceeded")
 
 
-def create_client(base_url: str, headers: Dict[str, str], client_name: str, company_url: str = None) -> str:
+def make_request_with_retry(
+    url: str,
+    headers: Dict[str, str],
+    method: str = "GET",
+    json_data: Dict = None,
+    max_retries: int = MAX_RETRIES,
+    session: requests.Session = None
+) -> Dict[str, Any]:
+    """Make API request with automatic retry on rate limits and server errors."""
+    response = send_with_retry(url, headers, method, json_data, max_retries, session)
+    return lgp_json.response_json(response)
+
+
+def client_registry(base_url: str, headers: Dict[str, str], auth: Dict[str, str]) -> ClientRegistry:
+    """Local client registry for this account; only hits GET /api/clients when stale or on a miss."""
+    scope = f"{base_url}|{auth.get('user_id') or auth.get('email', '')}"
+
+    def fetch():
+        return make_request_with_retry(f"{base_url}/api/clients", headers=headers).get("clients", [])
+
+    return ClientRegistry(scope, fetch)
+
+
+def resolve_client(
+    registry: ClientRegistry,
+    base_url: str,
+    headers: Dict[str, str],
+    client_ref: str,
+    create: bool = True,
+    company_url: str = None
+) -> str:
+    """Return the slug (client_id) for a client name, slug or UUID, creating the client if needed."""
+    client = registry.resolve(client_ref)
+    if client:
+        if registry.is_uuid(client_ref):
+            print(f"⚠️  '{client_ref}' is the client's internal id; using slug '{client['client_id']}' so leads stay visible")
+        print(f"✅ Using existing client: {client.get('clientName')} (slug: {client['client_id']})")
+        return client["client_id"]
+
+    if not create:
+        raise Exception(f"No client matches '{client_ref}'")
+    return create_client(base_url, headers, client_ref, company_url, registry=registry)
+
+
+def create_client(
+    base_url: str,
+    headers: Dict[str, str],
+    client_name: str,
+    company_url: str = None,
+    registry: ClientRegistry = None
+) -> str:
     """Create a new client and return its slug (client_id)."""
     print(f"\n🔨 Creating client: {client_name}")
 
@@ -111,6 +230,8 @@ def create_client(base_url: str, headers: Dict[str, str], client_name: str, comp
         raise Exception(f"Failed to create client: {result}")
 
     client_slug = result["client"]["client_id"]
+    if registry:
+        registry.add(result["client"])
     print(f"✅ Client created with slug: {client_slug}")
     return client_slug
 
@@ -129,10 +250,7 @@ def import_leads_batch(
 ) -> Dict[str, Any]:
     """Import a batch of leads."""
     # Add client_id to each lead
-    for lead in leads:
-        lead["client_id"] = client_slug
-
-    payload = {"leads": leads}
+    payload = {"leads": [{**lead, "client_id": client_slug} for lead in leads]}
 
     result = make_request_with_retry(
         f"{base_url}/api/leads",
@@ -144,32 +262,261 @@ def import_leads_batch(
     return result
 
 
-def verify_import(base_url: str, headers: Dict[str, str], client_slug: str) -> int:
-    """Verify leads were imported and are visible in the UI."""
-    print(f"\n🔍 Verifying import for client: {client_slug}")
+def import_leads_single(
+    base_url: str,
+    headers: Dict[str, str],
+    client_slug: str,
+    leads: Iterable[Dict[str, Any]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate_per_minute: float = DEFAULT_RATE,
+    session: requests.Session = None,
+    on_created: Callable[[Dict[str, Any]], None] = None,
+    collect: bool = True,
+    budget=None
+) -> Dict[str, Any]:
+    """POST leads one at a time with `concurrency` requests in flight.
+
+    All workers share one keep-alive connection pool and one rate budget, so
+    throughput scales with concurrency up to the rate limit while every lead
+    goes through the reliable single-lead endpoint.
+
+    `leads` may be any iterable (including a generator fed by an upstream
+    stage); only a small window of it is held in memory. Streaming callers
+    pass collect=False and observe successes through `on_created`. The POSTs
+    are bulk-priority work in the account's rate budget (`budget`, see
+    lgp_scheduler), so interactive calls are not starved.
+    """
+    session = session or new_session(concurrency)
+    limiter = RateLimiter(rate_per_minute, burst=concurrency, priority="bulk", budget=budget)
+    url = f"{base_url}/api/leads"
+    total = len(leads) if hasattr(leads, "__len__") else "?"
+    created: List[Dict[str, Any]] = []
+    failed: List[Dict[str, Any]] = []
+    created_count = 0
+    start = time.time()
+
+    def post(lead):
+        limiter.acquire()
+        return make_request_with_retry(url, headers=headers, method="POST",
+                                       json_data={**lead, "client_id": client_slug}, session=session)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = {}
+        leads_iter = iter(leads)
+        while True:
+            # Keep a bounded window of submitted work so huge inputs don't queue millions of futures.
+            while len(pending) < concurrency * 4:
+                lead = next(leads_iter, None)
+                if lead is None:
+                    break
+                pending[pool.submit(post, lead)] = lead
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                lead = pending.pop(future)
+                try:
+                    future.result()
+                    created_count += 1
+                    if collect:
+                        created.append(lead)
+                    if on_created:
+                        on_created(lead)
+                except Exception as e:
+                    failed.append({"lead": lead, "error": str(e)})
+
+            processed = created_count + len(failed)
+            if processed % 100 < len(done):
+                rate = processed / max(time.time() - start, 1e-6) * 60
+                print(f"   [{processed}/{total}] created={created_count} failed={len(failed)} rate={rate:.0f}/min")
+
+    return {"created": created, "created_count": created_count, "failed": failed, "elapsed": time.time() - start}
+
+
+def normalize_email(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def api_key_headers(auth: Dict[str, str]) -> Dict[str, str]:
+    """Headers for API-key-only endpoints (bulk listing), or None if the auth file has no API key."""
+    if not (auth.get("api_key") and auth.get("user_id")):
+        return None
+    return {"x-api-key": auth["api_key"], "x-user-id": auth["user_id"], "Content-Type": "application/json"}
+
+
+def iter_client_leads(
+    base_url: str,
+    headers: Dict[str, str],
+    client_slug: str,
+    company_id: str = None,
+    bulk_headers: Dict[str, str] = None,
+    session: requests.Session = None,
+    fields: Sequence[str] = ("email",)
+):
+    """Stream every lead stored for a client, one page at a time.
+
+    Uses the bulk endpoint with a `fields` projection when an API key and
+    company ID are available (5000 per page, minimal payload), otherwise pages
+    through GET /api/leads (full items).
+    """
+    if company_id and bulk_headers:
+        url = f"{base_url}/api/enrich-leads/list"
+        params = {"companyId": company_id, "clientId": client_slug, "fields": ",".join(fields), "limit": BULK_PAGE_SIZE}
+        headers = bulk_headers
+    else:
+        url = f"{base_url}/api/leads"
+        params = {"client_id": client_slug, "limit": LEADS_PAGE_SIZE}
+
+    while True:
+        # Pages are decoded item by item as they arrive instead of as one 5000-item document.
+        response = send_with_retry(f"{url}?{urlencode(params)}", headers=headers, session=session, stream=True)
+        result = {}
+        count = 0
+        for item in lgp_json.stream_response_items(response, meta=result):
+            count += 1
+            yield item
+
+        # The standard API paginates with nextToken, older deployments with lastKey.
+        if not count:
+            break
+        if result.get("nextToken"):
+            params["nextToken"] = result["nextToken"]
+        elif result.get("lastKey"):
+            last_key = result["lastKey"]
+            params["lastKey"] = last_key if isinstance(last_key, str) else json.dumps(last_key)
+        else:
+            break
+
+
+def iter_client_emails(
+    base_url: str,
+    headers: Dict[str, str],
+    client_slug: str,
+    company_id: str = None,
+    bulk_headers: Dict[str, str] = None,
+    session: requests.Session = None
+):
+    """Stream every email stored for a client (normalized)."""
+    for item in iter_client_leads(base_url, headers, client_slug, company_id, bulk_headers, session):
+        if item.get("email"):
+            yield normalize_email(item["email"])
 
-    result = make_request_with_retry(
-        f"{base_url}/api/leads?client_id={client_slug}&limit=1",
-        headers=headers,
-        method="GET"
-    )
 
-    # Note: The actual response structure may vary
-    # Adjust based on your API's response format
-    count = result.get("count", 0)
-    print(f"✅ Verification: Found {count} leads")
-    return count
+def lookup_missing(
+    base_url: str,
+    headers: Dict[str, str],
+    client_slug: str,
+    leads: List[Dict[str, Any]],
+    session: requests.Session = None
+) -> List[Dict[str, Any]]:
+    """Look up each lead by email. Returns the leads the server does not have."""
+    missing = []
+    for lead in leads:
+        query = urlencode({"client_id": client_slug, "email": lead["email"], "limit": 1})
+        result = make_request_with_retry(f"{base_url}/api/leads?{query}", headers=headers, session=session)
+        found = result.get("data") or result.get("leads") or []
+        if not any(normalize_email(l.get("email")) == normalize_email(lead["email"]) for l in found):
+            missing.append(lead)
+    return missing
+
+
+def wilson_upper(failures: int, n: int, z: float = 1.96) -> float:
+    """Upper bound of the 95% Wilson score interval for a failure rate."""
+    if n == 0:
+        return 0.0
+    p = failures / n
+    centre = p + z * z / (2 * n)
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+    return min(1.0, (centre + margin) / (1 + z * z / n))
+
+
+def verify_import(
+    base_url: str,
+    headers: Dict[str, str],
+    client_slug: str,
+    sent: List[Dict[str, Any]],
+    mode: str = "auto",
+    sample_size: int = DEFAULT_VERIFY_SAMPLE,
+    company_id: str = None,
+    bulk_headers: Dict[str, str] = None,
+    session: requests.Session = None
+) -> Dict[str, Any]:
+    """Reconcile the leads we sent with what the server stores.
+
+    full:   stream all of the client's emails and diff them against the sent
+            set, so every lost lead is identified.
+    sample: look up a random sample by email and extrapolate the loss rate;
+            any miss escalates to a full reconciliation.
+    auto:   full unless the import is larger than VERIFY_FULL_MAX and the
+            bulk endpoint is unavailable.
+
+    Returns {"method", "checked", "missing", "unverifiable"}; leads without an
+    email cannot be matched and are only counted.
+    """
+    checkable = [lead for lead in sent if lead.get("email")]
+    unverifiable = len(sent) - len(checkable)
+    if mode == "auto":
+        mode = "full" if len(checkable) <= VERIFY_FULL_MAX or (company_id and bulk_headers) else "sample"
+
+    if mode == "sample" and sample_size < len(checkable):
+        sample = random.sample(checkable, sample_size)
+        missing = lookup_missing(base_url, headers, client_slug, sample, session=session)
+        upper = wilson_upper(len(missing), len(sample))
+        print(f"   Sampled {len(sample)} of {len(checkable)}: {len(missing)} missing "
+              f"(estimated loss ≤ {upper:.1%}, ~{int(upper * len(checkable))} leads, 95% confidence)")
+        if not missing:
+            return {"method": "sample", "checked": len(sample), "missing": [], "unverifiable": unverifiable}
+        print(f"   Misses found in sample — escalating to full reconciliation")
+
+    stored = set(iter_client_emails(base_url, headers, client_slug,
+                                    company_id=company_id, bulk_headers=bulk_headers, session=session))
+    missing = [lead for lead in checkable if normalize_email(lead["email"]) not in stored]
+    print(f"   Reconciled {len(checkable)} sent emails against {len(stored)} stored: {len(missing)} missing")
+    return {"method": "full", "checked": len(checkable), "missing": missing, "unverifiable": unverifiable}
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Import leads from CSV to LeadGenius Pro")
-    parser.add_argument("--csv", required=True, help="Path to CSV file")
-    parser.add_argument("--client-name", required=True, help="Name for the new client")
+    parser = argparse.ArgumentParser(description="Import leads from CSV, Parquet, Arrow or NDJSON to LeadGenius Pro")
+    parser.add_argument("--input", "--csv", dest="input", required=True,
+                        help="Path to the lead file (.csv, .parquet, .arrow/.feather, .ndjson/.jsonl; .gz/.zst for text formats)")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the file extension)")
+    parser.add_argument("--mapping", help="Mapping profile name or path (JSON/YAML) for vendor headers; "
+                        f"bundled/user profiles: {', '.join(list_profiles()) or 'none'}")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes parsing an uncompressed CSV in parallel, 0 = one per core (default: 1)")
+    parser.add_argument("--no-ai-notes", action="store_true",
+                        help="Don't fold AI columns (aiLeadScore, justification, ...) into notes")
+    parser.add_argument("--notes-max-bytes", type=int, default=NOTES_MAX_BYTES,
+                        help=f"Truncate notes beyond this many UTF-8 bytes, 0 = no limit (default: {NOTES_MAX_BYTES})")
+    client_group = parser.add_mutually_exclusive_group(required=True)
+    client_group.add_argument("--client-name", help="Client name (reused if it exists, created otherwise)")
+    client_group.add_argument("--client", help="Existing client name, slug or UUID (never creates)")
     parser.add_argument("--company-url", help="Company website URL")
     parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help=f"API base URL (default: {DEFAULT_BASE_URL})")
-    parser.add_argument("--dry-run", action="store_true", help="Parse CSV but don't import")
+    parser.add_argument("--dry-run", action="store_true", help="Parse the input but don't import")
+    parser.add_argument("--mode", choices=["single", "batch"], default="single",
+                        help="single: one POST per lead (reliable, default); batch: 50 per POST (may not persist)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Single-lead POSTs in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help=f"Max requests/min across all workers, 0 = unlimited (default: {DEFAULT_RATE})")
+    parser.add_argument("--verify", choices=["auto", "full", "sample", "off"], default="auto",
+                        help="Post-import reconciliation of sent vs stored emails (default: auto)")
+    parser.add_argument("--verify-sample", type=int, default=DEFAULT_VERIFY_SAMPLE,
+                        help=f"Sample size for --verify sample (default: {DEFAULT_VERIFY_SAMPLE})")
+    parser.add_argument("--verify-retries", type=int, default=VERIFY_RETRIES,
+                        help=f"Rounds of re-POSTing missing leads (default: {VERIFY_RETRIES})")
+    parser.add_argument("--company-id", default=os.environ.get("LGP_COMPANY_ID"),
+                        help="Company ID for bulk-listing verification (defaults to LGP_COMPANY_ID)")
+    parser.add_argument("--gzip-requests", action="store_true", default=lgp_http.gzip_requests,
+                        help=f"Gzip request bodies over {lgp_http.GZIP_MIN_BYTES} bytes "
+                             "(falls back to plain bodies on 415; default: LGP_GZIP_REQUESTS)")
+    lgp_profile.add_profile_argument(parser)
 
     args = parser.parse_args()
+    lgp_profile.start(args.profile, "import_csv")
+    lgp_http.gzip_requests = args.gzip_requests
 
     # Load auth
     auth = load_auth()
@@ -180,97 +527,145 @@ def main():
         "Content-Type": "application/json"
     }
 
-    # Read CSV
-    print(f"📄 Reading CSV: {args.csv}")
+    # Read input file
+    print(f"📄 Reading {args.format or 'input'}: {args.input}")
     leads = []
 
     try:
-        with open(args.csv, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Map CSV columns to API fields
-                lead = {
-                    "firstName": row.get("firstName", ""),
-                    "lastName": row.get("lastName", ""),
-                    "email": row.get("email", ""),
-                    "companyName": row.get("companyName", ""),
-                    "companyDomain": row.get("companyDomain", ""),
-                    "title": row.get("title", ""),
-                    "linkedinUrl": row.get("linkedinUrl", ""),
-                    "notes": row.get("notes", "")
-                }
-
-                # Remove empty fields
-                lead = {k: v for k, v in lead.items() if v}
-
-                leads.append(lead)
-
-        print(f"✅ Loaded {len(leads)} leads from CSV")
+        profile = load_profile(args.mapping) if args.mapping else None
+        if profile:
+            print(f"🗺️  Mapping profile: {profile.name} ({profile.source})")
+        notes = None
+        if not args.no_ai_notes:
+            notes = profile.notes_template(args.notes_max_bytes) if profile else NotesTemplate(max_bytes=args.notes_max_bytes)
+        workers = args.workers or os.cpu_count() or 1
+        for batch in iter_lead_batches(args.input, fmt=args.format, notes=notes, profile=profile, workers=workers):
+            # Compact records: the full file stays in memory for verification and re-queueing.
+            leads.extend(compact(batch))
+
+        print(f"✅ Loaded {len(leads)} leads from {os.path.basename(args.input)}")
 
     except Exception as e:
-        print(f"❌ Error reading CSV: {e}")
+        print(f"❌ Error reading {args.input}: {e}")
         sys.exit(1)
 
     if args.dry_run:
         print("\n🔍 DRY RUN - First lead:")
-        print(json.dumps(leads[0], indent=2))
+        print(json.dumps(leads[0].to_payload(), indent=2))
         print(f"\n📊 Total leads: {len(leads)}")
         print(f"📦 Batches: {(len(leads) + BATCH_SIZE - 1) // BATCH_SIZE}")
         sys.exit(0)
 
-    # Create client
+    # Resolve or create client
+    registry = client_registry(base_url, headers, auth)
     try:
-        client_slug = create_client(base_url, headers, args.client_name, args.company_url)
+        client_slug = resolve_client(
+            registry, base_url, headers,
+            args.client or args.client_name,
+            create=not args.client,
+            company_url=args.company_url
+        )
     except Exception as e:
-        print(f"❌ Failed to create client: {e}")
+        print(f"❌ Failed to resolve client: {e}")
         sys.exit(1)
 
-    # Import leads in batches
-    print(f"\n📤 Importing {len(leads)} leads in batches of {BATCH_SIZE}...")
-
+    session = new_session(args.concurrency)
+    budget = lgp_scheduler.budget(auth.get("user_id"))
     total_created = 0
     total_skipped = 0
-    batch_num = 0
+    total_failed = 0
 
-    for batch in chunks(leads, BATCH_SIZE):
-        batch_num += 1
-        print(f"\n📦 Batch {batch_num}/{(len(leads) + BATCH_SIZE - 1) // BATCH_SIZE} ({len(batch)} leads)...")
+    if args.mode == "single":
+        print(f"\n📤 Importing {len(leads)} leads one at a time "
+              f"({args.concurrency} in flight, max {args.rate:g} req/min)...")
+        result = import_leads_single(base_url, headers, client_slug, leads, concurrency=args.concurrency,
+                                     rate_per_minute=args.rate, session=session, budget=budget)
+        total_created = result["created_count"]
+        total_failed = len(result["failed"])
+        for failure in result["failed"][:5]:
+            print(f"   ❌ {failure['lead'].get('email', '?')}: {failure['error']}")
+    else:
+        # Import leads in batches
+        print(f"\n📤 Importing {len(leads)} leads in batches of {BATCH_SIZE}...")
+        batch_num = 0
 
-        try:
-            result = import_leads_batch(base_url, headers, client_slug, batch)
+        for batch in chunks(leads, BATCH_SIZE):
+            batch_num += 1
+            print(f"\n📦 Batch {batch_num}/{(len(leads) + BATCH_SIZE - 1) // BATCH_SIZE} ({len(batch)} leads)...")
 
-            created = result.get("created", 0)
-            skipped = result.get("skipped", [])
+            try:
+                result = import_leads_batch(base_url, headers, client_slug, batch)
 
-            total_created += created
-            total_skipped += len(skipped)
+                created = result.get("created", 0)
+                skipped = result.get("skipped", [])
 
-            print(f"   ✅ Created: {created}, Skipped: {len(skipped)}")
+                total_created += created
+                total_skipped += len(skipped)
 
-            if skipped:
-                print(f"   ⚠️  Skipped emails: {', '.join(skipped[:5])}")
+                print(f"   ✅ Created: {created}, Skipped: {len(skipped)}")
 
-        except Exception as e:
-            print(f"   ❌ Batch failed: {e}")
-            continue
+                if skipped:
+                    print(f"   ⚠️  Skipped emails: {', '.join(skipped[:5])}")
 
-        # Small delay between batches to be polite to the API
-        if batch_num < (len(leads) + BATCH_SIZE - 1) // BATCH_SIZE:
-            time.sleep(0.5)
+            except Exception as e:
+                print(f"   ❌ Batch failed: {e}")
+                total_failed += len(batch)
+                continue
+
+            # Small delay between batches to be polite to the API
+            if batch_num < (len(leads) + BATCH_SIZE - 1) // BATCH_SIZE:
+                time.sleep(0.5)
 
     # Verify import
     print(f"\n" + "="*60)
     print(f"📊 IMPORT SUMMARY")
     print(f"="*60)
-    print(f"   Client: {args.client_name}")
+    print(f"   Client: {args.client or args.client_name}")
     print(f"   Slug: {client_slug}")
+    print(f"   Mode: {args.mode}")
     print(f"   Total Created: {total_created}")
     print(f"   Total Skipped: {total_skipped}")
+    print(f"   Total Failed: {total_failed}")
+    print(f"   Transfer: {lgp_http.TRANSFER.summary()}")
     print(f"="*60)
 
+    if args.verify == "off":
+        print(f"\n🔗 View in UI: {base_url}/clients/{client_slug}")
+        return
+
+    print(f"\n🔍 Verifying import for client: {client_slug}")
+    bulk_headers = api_key_headers(auth)
     try:
-        verify_import(base_url, headers, client_slug)
-        print(f"\n✅ Import completed successfully!")
+        report = verify_import(base_url, headers, client_slug, leads, mode=args.verify,
+                               sample_size=args.verify_sample, company_id=args.company_id,
+                               bulk_headers=bulk_headers, session=session)
+        missing = report["missing"]
+
+        for round_num in range(1, args.verify_retries + 1):
+            if not missing:
+                break
+            print(f"\n🔁 Re-queueing {len(missing)} missing lead(s) as single POSTs "
+                  f"(round {round_num}/{args.verify_retries})...")
+            import_leads_single(base_url, headers, client_slug, missing, concurrency=args.concurrency,
+                                rate_per_minute=args.rate, session=session, budget=budget)
+            # Re-check only what was re-sent: per-email lookups when few, a full diff otherwise.
+            if len(missing) <= args.verify_sample:
+                still_missing = lookup_missing(base_url, headers, client_slug, missing, session=session)
+                print(f"   Re-checked {len(missing)} re-queued lead(s): {len(still_missing)} still missing")
+                missing = still_missing
+            else:
+                missing = verify_import(base_url, headers, client_slug, missing, mode="full",
+                                        company_id=args.company_id, bulk_headers=bulk_headers,
+                                        session=session)["missing"]
+
+        if report["unverifiable"]:
+            print(f"   ℹ️  {report['unverifiable']} lead(s) without email could not be verified")
+        if missing:
+            print(f"\n⚠️  {len(missing)} lead(s) still missing after {args.verify_retries} re-queue round(s):")
+            for lead in missing[:10]:
+                print(f"   - {lead.get('email')}")
+        else:
+            print(f"\n✅ Import completed successfully!")
         print(f"🔗 View in UI: {base_url}/clients/{client_slug}")
     except Exception as e:
         print(f"\n⚠️  Verification failed: {e}")
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Bulk lead updates (`lgp campaigns assign`, `lgp leads set-status`).
+
+The same field values (a campaignId, a status) are written to every target
+lead. Targets come from an ID file or from a selector over a client's leads
+(`--where status=new`). Writes go out in chunks over one of two transports:
+
+- rest: batch PUT /api/leads {"leads": [...]}
+- appsync: one GraphQL document per chunk with an aliased mutation per lead
+  (u0: updateEnrichLeads(input: $i0) { id } u1: ...), so a chunk costs one
+  round trip and errors still come back per lead.
+
+Chunks run concurrently under a shared RateLimiter. ChunkTuner sizes them:
+it grows the chunk while chunks succeed quickly and shrinks it on slow
+responses or errors; a failed chunk is split and retried before its leads
+are reported failed. Every lead's outcome is appended to a manifest CSV
+(id,status,error), and a re-run with the same manifest skips the leads
+already updated.
+"""
+
+import csv
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import lgp_json
+from lgp_http import RateLimiter
+
+DEFAULT_APPSYNC_URL = "https://ugdmgjyxenhipk74b5swx4xvuy.appsync-api.us-east-1.amazonaws.com/graphql"
+APPSYNC_URL = os.environ.get("LGP_APPSYNC_URL", DEFAULT_APPSYNC_URL)
+TRANSPORTS = ("rest", "appsync")
+# (initial, minimum, maximum) chunk sizes per transport. The REST batch
+# endpoint is documented for 50 leads per request.
+CHUNK_LIMITS = {"rest": (50, 5, 50), "appsync": (25, 1, 100)}
+TARGET_SECONDS = 2.0    # chunks faster than this grow, chunks over twice this shrink
+MAX_ATTEMPTS = 3
+ID_COLUMNS = ("id", "leadId", "lead_id")
+
+# Results of a chunk: {lead id: error message, or None when updated}.
+ChunkResult = Dict[str, Optional[str]]
+
+
+def load_ids(path: str) -> List[str]:
+    """Lead ids from a CSV with an id/leadId/lead_id column, or one id per line."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        first = f.readline()
+        f.seek(0)
+        header = [h.strip() for h in next(csv.reader([first]), [])]
+        column = next((c for c in ID_COLUMNS if c in header), None)
+        if column:
+            values = (row.get(column) for row in csv.DictReader(f))
+        else:
+            values = (line.split(",")[0] for line in f if not line.lstrip().startswith("#"))
+        ids = (v.strip() for v in values if v)
+        return list(dict.fromkeys(i for i in ids if i))
+
+
+def parse_selector(expressions: Iterable[str]) -> List[Tuple[str, bool, Set[str]]]:
+    """`field=a,b` / `field!=a` expressions as (field, negate, values). An empty value matches a missing field."""
+    selector = []
+    for expr in expressions or ():
+        field, op, values = expr.partition("!=") if "!=" in expr else expr.partition("=")
+        if not op or not field.strip():
+            raise ValueError(f"invalid selector '{expr}' (expected field=value or field!=value)")
+        selector.append((field.strip(), op == "!=", {v.strip() for v in values.split(",")}))
+    return selector
+
+
+def matches(lead: Dict[str, Any], selector: List[Tuple[str, bool, Set[str]]]) -> bool:
+    for field, negate, values in selector:
+        value = lead.get(field)
+        hit = ("" if value is None else str(value)) in values
+        if hit == negate:
+            return False
+    return True
+
+
+class ChunkTuner:
+    """Adaptive chunk size: additive growth on fast successes, halving on errors. Thread-safe."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int, target_seconds: float = TARGET_SECONDS):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target = target_seconds
+        self._size = max(minimum, min(maximum, initial))
+        self._lock = threading.Lock()
+        self.history: List[int] = [self._size]
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def record(self, count: int, seconds: float, ok: bool):
+        with self._lock:
+            size = self._size
+            if not ok:
+                size = max(self.minimum, size // 2)
+            elif seconds > 2 * self.target:
+                size = max(self.minimum, int(size * 0.75))
+            elif seconds < self.target and count >= size:
+                size = min(self.maximum, size + max(1, size // 4))
+            if size != self._size:
+                self._size = size
+                self.history.append(size)
+
+
+# ── Transports ──────────────────────────────────────────────────────────────
+
+def rest_sender(http, base_url: str, headers: Dict[str, str]) -> Callable[[List[Dict[str, Any]]], ChunkResult]:
+    """Chunk sender for batch PUT /api/leads. A 2xx answer counts for every lead in the chunk."""
+    url = f"{base_url}/api/leads"
+
+    def send(updates: List[Dict[str, Any]]) -> ChunkResult:
+        response = lgp_json.request_json(http, "PUT", url, {"leads": updates}, headers=headers, timeout=60,
+                                         priority="bulk")
+        if response.status_code >= 400:
+            raise Exception(f"HTTP {response.status_code}: {response.text[:200]}")
+        response.close()
+        return {u["id"]: None for u in updates}
+    return send
+
+
+@lru_cache(maxsize=None)
+def aliased_mutation(count: int, field: str = "updateEnrichLeads", input_type: str = "UpdateEnrichLeadsInput") -> str:
+    """GraphQL document updating `count` leads: u0..u{count-1}, inputs $i0..$i{count-1}."""
+    params = ", ".join(f"$i{i}: {input_type}!" for i in range(count))
+    body = " ".join(f"u{i}: {field}(input: $i{i}) {{ id }}" for i in range(count))
+    return f"mutation BulkUpdateLeads({params}) {{ {body} }}"
+
+
+def appsync_sender(http, url: str, headers: Dict[str, str]) -> Callable[[List[Dict[str, Any]]], ChunkResult]:
+    """Chunk sender issuing one aliased updateEnrichLeads document per chunk."""
+
+    def send(updates: List[Dict[str, Any]]) -> ChunkResult:
+        payload = {"query": aliased_mutation(len(updates)),
+                   "variables": {f"i{i}": u for i, u in enumerate(updates)}}
+        response = lgp_json.post_json(http, url, payload, headers=headers, timeout=60, priority="bulk")
+        if response.status_code >= 400:
+            raise Exception(f"HTTP {response.status_code}: {response.text[:200]}")
+        body = lgp_json.response_json(response)
+        data = body.get("data") or {}
+        errors = {}
+        for error in body.get("errors") or []:
+            path = error.get("path") or []
+            errors.setdefault(path[0] if path else None, error.get("message", "error"))
+        if not data and errors:
+            # The whole document failed (validation, auth): retry or split the chunk.
+            raise Exception(next(iter(errors.values())))
+        return {u["id"]: errors.get(f"u{i}") or (None if data.get(f"u{i}") else "no result")
+                for i, u in enumerate(updates)}
+    return send
+
+
+# ── Manifest ────────────────────────────────────────────────────────────────
+
+def manifest_done(path: str) -> Set[str]:
+    """Lead ids recorded as updated in an existing manifest."""
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["id"] for row in csv.DictReader(f) if row.get("status") == "updated"}
+
+
+class Manifest:
+    """Append-only id,status,error CSV. Safe to share between threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        fresh = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._lock = threading.Lock()
+        if fresh:
+            self._writer.writerow(["id", "status", "error"])
+
+    def write(self, results: ChunkResult):
+        with self._lock:
+            for lead_id, error in results.items():
+                self._writer.writerow([lead_id, "failed" if error else "updated", error or ""])
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+# ── Runner ──────────────────────────────────────────────────────────────────
+
+def bulk_update(ids: Iterable[str], changes: Dict[str, Any], send: Callable[[List[Dict[str, Any]]], ChunkResult],
+                tuner: ChunkTuner, concurrency: int = 8, rate_per_minute: float = 0,
+                manifest: Manifest = None, progress: Callable[[Dict[str, int]], None] = None,
+                budget=None) -> Dict[str, int]:
+    """Apply `changes` to every lead id; returns {"updated", "failed", "chunks", "retries"}.
+
+    Chunks are bulk-priority work in the account's rate budget (`budget`, see lgp_scheduler).
+    """
+    limiter = RateLimiter(rate_per_minute, burst=concurrency, priority="bulk", budget=budget)
+    queue: List[Tuple[List[str], int]] = []
+    source: Iterator[str] = iter(ids)
+    stats = {"updated": 0, "failed": 0, "chunks": 0, "retries": 0}
+
+    def next_chunk() -> Optional[Tuple[List[str], int]]:
+        if queue:
+            return queue.pop()
+        chunk = [i for _, i in zip(range(tuner.size), source)]
+        return (chunk, 1) if chunk else None
+
+    def run(chunk: List[str]) -> Tuple[Optional[ChunkResult], float, Optional[str]]:
+        limiter.acquire()
+        started = time.monotonic()
+        try:
+            return send([{"id": i, **changes} for i in chunk]), time.monotonic() - started, None
+        except Exception as e:
+            return None, time.monotonic() - started, str(e)
+
+    def settle(results: ChunkResult):
+        stats["updated"] += sum(1 for e in results.values() if not e)
+        stats["failed"] += sum(1 for e in results.values() if e)
+        if manifest:
+            manifest.write(results)
+        if progress:
+            progress(stats)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        inflight = {}
+        while True:
+            while len(inflight) < concurrency:
+                item = next_chunk()
+                if item is None:
+                    break
+                inflight[pool.submit(run, item[0])] = item
+            if not inflight:
+                break
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk, attempt = inflight.pop(future)
+                results, seconds, error = future.result()
+                stats["chunks"] += 1
+                tuner.record(len(chunk), seconds, results is not None and not any(results.values()))
+                if results is not None:
+                    settle(results)
+                elif attempt < MAX_ATTEMPTS:
+                    # Split so one bad lead or an oversized document only fails its own half.
+                    stats["retries"] += 1
+                    half = max(1, len(chunk) // 2)
+                    queue.extend((part, attempt + 1) for part in (chunk[half:], chunk[:half]) if part)
+                else:
+                    settle({i: error for i in chunk})
+    return stats
@@ -5,121 +5,157 @@ import json
 import os
 import sys
 
-def main():
-    parser = argparse.ArgumentParser(description="LeadGenius Pro: Aggregate Leads per Client")
-    parser.add_argument("--url", default="https://ugdmgjyxenhipk74b5swx4xvuy.appsync-api.us-east-1.amazonaws.com/graphql", help="GraphQL API URL")
-    parser.add_argument("--key", help="AppSync API Key (defaults to LGP_APPSYNC_KEY env var)")
-    parser.add_argument("--company-id", help="Company ID (defaults to LGP_COMPANY_ID env var)")
+import lgp_json
+import lgp_profile
+from lgp_clients import ClientRegistry
+
+DEFAULT_URL = "https://ugdmgjyxenhipk74b5swx4xvuy.appsync-api.us-east-1.amazonaws.com/graphql"
+
+CLIENT_QUERY = """
+query ListClients {
+    listClients(limit: 1000) {
+        items {
+            id
+            client_id
+            clientName
+        }
+    }
+}
+"""
+
+LEADS_QUERY = """
+query ListLeadsByCompany($company_id: String!, $nextToken: String) {
+    listEnrichLeadsByCompanyId(company_id: $company_id, nextToken: $nextToken, limit: 1000) {
+        items {
+            id
+            client_id
+        }
+        nextToken
+    }
+}
+"""
 
-    args = parser.parse_args()
 
-    api_key = args.key or os.environ.get("LGP_APPSYNC_KEY")
-    company_id = args.company_id or os.environ.get("LGP_COMPANY_ID")
-
-    if not api_key:
-        print("Error: API Key is required. Use --key or set LGP_APPSYNC_KEY.")
-        sys.exit(1)
-    if not company_id:
-        print("Error: Company ID is required. Use --company-id or set LGP_COMPANY_ID.")
-        sys.exit(1)
+def lead_distribution(url, api_key, company_id, refresh_clients=False, http=requests):
+    """Count a company's leads per client.
 
+    Returns {"rows": [(client name, client_id, leads), ...] (clients without
+    leads included, largest first), "total": leads counted}. Raises when the
+    client list cannot be fetched.
+    """
     headers = {
         "Content-Type": "application/json",
         "x-api-key": api_key
     }
 
     # 1. Fetch all clients
-    client_query = """
-    query ListClients {
-        listClients(limit: 1000) {
-            items {
-                id
-                client_id
-                clientName
-            }
-        }
-    }
-    """
-
-    print("Fetching clients...")
-    try:
-        response = requests.post(args.url, headers=headers, json={"query": client_query})
-        clients_data = response.json().get('data', {}).get('listClients', {})
-        clients = clients_data.get('items', [])
-    except Exception as e:
-        print(f"Failed to fetch clients: {e}")
-        sys.exit(1)
+    def fetch_clients():
+        print("Fetching clients...")
+        response = lgp_json.post_json(http, url, {"query": CLIENT_QUERY}, headers=headers, idempotent=True)
+        return lgp_json.response_json(response).get('data', {}).get('listClients', {}).get('items', [])
 
-    client_map = {c['id']: c['clientName'] for c in clients}
-    client_id_str_map = {c['client_id']: c['clientName'] for c in clients if c.get('client_id')}
+    registry = ClientRegistry(f"{url}|{company_id}", fetch_clients)
+    clients = registry.refresh() if refresh_clients else registry.all()
 
     # 2. Fetch all leads
-    leads_query = """
-    query ListLeadsByCompany($company_id: String!, $nextToken: String) {
-        listEnrichLeadsByCompanyId(company_id: $company_id, nextToken: $nextToken, limit: 1000) {
-            items {
-                id
-                client_id
-            }
-            nextToken
-        }
-    }
-    """
-
+    # Leads are counted per client as pages arrive instead of being kept,
+    # so memory stays flat however large the tenant is.
     print(f"Fetching leads for company {company_id}...")
-    all_leads = []
+    stats = {}
+    total_leads = 0
     next_token = None
 
     while True:
         payload = {
-            "query": leads_query,
+            "query": LEADS_QUERY,
             "variables": {
                 "company_id": company_id,
                 "nextToken": next_token
             }
         }
         try:
-            response = requests.post(args.url, headers=headers, json=payload)
-            data = response.json().get('data', {}).get('listEnrichLeadsByCompanyId', {})
-            all_leads.extend(data.get('items', []))
-            next_token = data.get('nextToken')
+            # Pages are decoded item by item straight off the socket.
+            # Queries are safe to send twice, so a slow page may be hedged.
+            response = lgp_json.post_json(http, url, payload, headers=headers, stream=True, idempotent=True)
+            page = {}
+            for lead in lgp_json.stream_response_items(response, keys=("items",), meta=page,
+                                                       path=("data", "listEnrichLeadsByCompanyId")):
+                cid = lead.get('client_id')
+                stats[cid] = stats.get(cid, 0) + 1
+                total_leads += 1
+            if page.get('errors'):
+                raise Exception(page['errors'])
+            next_token = page.get('nextToken')
             if not next_token:
                 break
         except Exception as e:
             print(f"Failed to fetch leads: {e}")
             break
 
-    # 3. Aggregate
-    stats = {}
-    for lead in all_leads:
-        cid = lead.get('client_id')
-        stats[cid] = stats.get(cid, 0) + 1
+    # 3. Resolve client names
+    # Unknown client ids mean the registry is behind: one lazy refresh picks them up.
+    unknown = next((cid for cid in stats if cid and not registry.name_for(cid)), None)
+    if unknown:
+        try:
+            registry.resolve(unknown)
+            clients = registry.all()
+        except Exception as e:
+            print(f"Warning: failed to refresh clients: {e}")
+
+    rows = [(registry.name_for(cid) or "Unknown/Unassigned", cid or "N/A", count)
+            for cid, count in sorted(stats.items(), key=lambda x: x[1], reverse=True)]
+
+    # Clients with 0 leads
+    for client in clients:
+        if client.get('id') not in stats and client.get('client_id') not in stats:
+            rows.append((client.get('clientName'), client.get('client_id') or client.get('id'), 0))
+
+    return {"rows": rows, "total": total_leads}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LeadGenius Pro: Aggregate Leads per Client")
+    parser.add_argument("--url", default=DEFAULT_URL, help="GraphQL API URL")
+    parser.add_argument("--key", help="AppSync API Key (defaults to LGP_APPSYNC_KEY env var)")
+    parser.add_argument("--company-id", help="Company ID (defaults to LGP_COMPANY_ID env var)")
+    parser.add_argument("--refresh-clients", action="store_true", help="Re-download the client list instead of using the local registry")
+    lgp_profile.add_profile_argument(parser)
+
+    args = parser.parse_args()
+    lgp_profile.start(args.profile, "lead_distribution")
+
+    api_key = args.key or os.environ.get("LGP_APPSYNC_KEY")
+    company_id = args.company_id or os.environ.get("LGP_COMPANY_ID")
+
+    if not api_key:
+        print("Error: API Key is required. Use --key or set LGP_APPSYNC_KEY.")
+        sys.exit(1)
+    if not company_id:
+        print("Error: Company ID is required. Use --company-id or set LGP_COMPANY_ID.")
+        sys.exit(1)
+
+    try:
+        result = lead_distribution(args.url, api_key, company_id, refresh_clients=args.refresh_clients)
+    except Exception as e:
+        print(f"Failed to fetch clients: {e}")
+        sys.exit(1)
 
     # 4. Results
     print("\n--- Leads per Client ---")
     print(f"{'Client Name':<40} | {'Client ID':<30} | {'Leads':<5}")
     print("-" * 80)
 
-    for cid, count in sorted(stats.items(), key=lambda x: x[1], reverse=True):
-        name = client_id_str_map.get(cid) or client_map.get(cid) or "Unknown/Unassigned"
-        cid_display = cid if cid else "N/A"
-        print(f"{name:<40} | {cid_display:<30} | {count:<5}")
-
-    # Clients with 0 leads
-    zero_lead_clients = []
-    for cid_id, name in client_map.items():
-        if cid_id not in stats:
-            client_obj = next((c for c in clients if c['id'] == cid_id), {})
-            cid_str = client_obj.get('client_id')
-            if cid_str not in stats:
-                zero_lead_clients.append((name, cid_str or cid_id))
+    for name, cid, count in result["rows"]:
+        if count:
+            print(f"{name:<40} | {cid:<30} | {count:<5}")
 
+    zero_lead_clients = [(name, cid) for name, cid, count in result["rows"] if not count]
     if zero_lead_clients:
         print("\n--- Clients with 0 Leads ---")
         for name, cid in zero_lead_clients:
             print(f"{name:<40} | {cid:<30} | 0")
 
-    print(f"\nTotal Leads analyzed: {len(all_leads)}")
+    print(f"\nTotal Leads analyzed: {result['total']}")
 
 if __name__ == "__main__":
     main()
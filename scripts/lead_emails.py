@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Bulk email verification in front of /api/email-validate and /api/email-verify.
+
+Both endpoints take one address per call. EmailVerifier settles as much as
+it can locally and per domain before spending API calls:
+
+1. Syntax and disposable-domain checks (no network).
+2. Cached per-address results younger than ADDRESS_TTL.
+3. One DNS lookup per domain (MX via dnspython when installed, otherwise
+   any A/AAAA record, which SMTP falls back to): domains that do not resolve
+   settle all of their addresses as invalid.
+4. One deep check (/api/email-verify) per domain not yet probed. Domains the
+   probe reports as catch-all (accept-all) settle their other addresses as
+   risky, since no mailbox check can tell them apart.
+5. Only the remaining addresses go to /api/email-validate, concurrently and
+   rate limited.
+
+Domain results are cached for DOMAIN_TTL, so 100k addresses over 2k domains
+cost about 2k deep checks, and re-runs skip everything still fresh.
+
+Statuses: valid, invalid, risky (catch-all or disposable), unknown. Results from the
+API are cached; API errors are reported as unknown and retried next run.
+"""
+
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from lgp_cache import CACHE_DIR
+from lgp_http import RateLimiter
+
+try:
+    import dns.resolver
+    import dns.exception
+except ImportError:  # optional: falls back to A/AAAA lookups
+    dns = None
+
+EMAILS_DB = os.path.join(CACHE_DIR, "emails.sqlite")
+DOMAIN_TTL = 7 * 24 * 3600
+ADDRESS_TTL = 30 * 24 * 3600
+CHUNK_SIZE = 5000
+DNS_CONCURRENCY = 16
+DNS_CANARY = "gmail.com"  # must resolve, or DNS is unusable here and the check is skipped
+USER_DISPOSABLE_FILE = os.path.expanduser("~/.leadgenius_disposable_domains.txt")
+
+# Well-known throwaway mailbox providers; extend with USER_DISPOSABLE_FILE (one domain per line).
+DISPOSABLE_DOMAINS = frozenset({
+    "10minutemail.com", "33mail.com", "dispostable.com", "fakeinbox.com", "getnada.com",
+    "guerrillamail.com", "guerrillamail.net", "maildrop.cc", "mailinator.com", "mailnesia.com",
+    "mintemail.com", "mohmal.com", "mytemp.email", "sharklasers.com", "spamgourmet.com",
+    "temp-mail.org", "tempmail.com", "tempmailo.com", "throwawaymail.com", "trashmail.com",
+    "yopmail.com", "yopmail.net", "emailondeck.com", "burnermail.io", "tempr.email",
+})
+
+_LOCAL = re.compile(r"^[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+(\.[A-Za-z0-9!#$%&'*+/=?^_`{|}~-]+)*$")
+_LABEL = re.compile(r"^(?!-)[a-z0-9-]{1,63}(?<!-)$")
+
+CATCH_ALL_KEYS = ("catchAll", "catch_all", "isCatchAll", "acceptAll", "accept_all")
+STATUS_WORDS = {
+    "valid": "valid", "deliverable": "valid", "ok": "valid", "safe": "valid",
+    "invalid": "invalid", "undeliverable": "invalid", "bad": "invalid", "rejected": "invalid",
+    "catch_all": "risky", "catch-all": "risky", "accept_all": "risky", "risky": "risky",
+    "disposable": "risky", "unknown": "unknown",
+}
+
+
+def normalize(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+def syntax_error(email: str) -> Optional[str]:
+    """Why `email` (normalized) is not a deliverable address, or None."""
+    if len(email) > 254 or email.count("@") != 1:
+        return "syntax"
+    local, domain = email.split("@")
+    if not local or len(local) > 64 or not _LOCAL.match(local):
+        return "syntax"
+    labels = domain.split(".")
+    if len(labels) < 2 or not all(_LABEL.match(label) for label in labels) or labels[-1].isdigit():
+        return "syntax"
+    return None
+
+
+def load_disposable(path: str = None) -> frozenset:
+    """Built-in disposable domains plus those listed in `path` (default USER_DISPOSABLE_FILE)."""
+    path = path or USER_DISPOSABLE_FILE
+    extra = set()
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            extra = {line.strip().lower() for line in f if line.strip() and not line.startswith("#")}
+    return DISPOSABLE_DOMAINS | extra
+
+
+def resolve_domain(domain: str) -> Optional[bool]:
+    """True if the domain can receive mail, False if it cannot, None if DNS failed."""
+    if dns is not None:
+        try:
+            answers = dns.resolver.resolve(domain, "MX", lifetime=5)
+            # A null MX ("0 .") explicitly refuses mail.
+            return any(str(r.exchange) not in (".", "") for r in answers)
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer, dns.resolver.NoNameservers):
+            pass
+        except dns.exception.DNSException:
+            return None
+    try:
+        return bool(socket.getaddrinfo(domain, 25, proto=socket.IPPROTO_TCP))
+    except socket.gaierror as e:
+        if e.errno in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)):
+            return False
+        return None
+
+
+def interpret(data: Any) -> Tuple[str, str, Optional[bool]]:
+    """(status, reason, catch_all) from an email-validate / email-verify response."""
+    if isinstance(data, dict) and isinstance(data.get("data"), dict):
+        data = data["data"]
+    if not isinstance(data, dict):
+        return "unknown", "unrecognized response", None
+    catch_all = next((bool(data[k]) for k in CATCH_ALL_KEYS if k in data), None)
+    for key in ("status", "result", "verdict", "state"):
+        word = data.get(key)
+        if isinstance(word, str) and word.lower() in STATUS_WORDS:
+            word = word.lower()
+            status = STATUS_WORDS[word]
+            if "catch" in word or "accept" in word:
+                catch_all = True
+            break
+    else:
+        flag = next((data[k] for k in ("valid", "isValid", "deliverable", "is_valid") if k in data), None)
+        status = "unknown" if flag is None else ("valid" if flag else "invalid")
+    if catch_all and status == "valid":
+        status = "risky"
+    reason = str(data.get("reason") or data.get("subStatus") or data.get("sub_status") or ("catch_all" if catch_all else ""))
+    return status, reason, catch_all
+
+
+class EmailVerifier:
+    """Runs the pipeline in the module docstring. The cache is safe to share between threads.
+
+    `call_api(email, deep)` returns the decoded response of /api/email-verify
+    (deep=True) or /api/email-validate (deep=False) and raises on failure.
+    """
+
+    def __init__(self, call_api: Callable[[str, bool], Any], path: str = None, concurrency: int = 8,
+                 rate_per_minute: float = 0, deep_probe: bool = True, dns_check: bool = True,
+                 disposable: frozenset = None, budget=None):
+        self.call_api = call_api
+        self.path = path or EMAILS_DB
+        self.concurrency = max(1, concurrency)
+        self.limiter = RateLimiter(rate_per_minute, burst=self.concurrency, priority="bulk", budget=budget)
+        self.deep_probe = deep_probe
+        self.dns_check = dns_check
+        self.dns_unavailable = False
+        self.disposable = load_disposable() if disposable is None else disposable
+        self.stats = {"local": 0, "cache": 0, "dns": 0, "probe": 0, "domain": 0, "api": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS domains (
+                domain TEXT PRIMARY KEY,
+                receives_mail INTEGER,
+                catch_all INTEGER,
+                checked_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS addresses (
+                email TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                reason TEXT,
+                checked_at REAL NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        self._db.commit()
+
+    # ── Cache ───────────────────────────────────────────────────────────────
+    def _cached_addresses(self, emails: List[str]) -> Dict[str, Tuple[str, str]]:
+        cutoff = time.time() - ADDRESS_TTL
+        found = {}
+        with self._lock:
+            for i in range(0, len(emails), 500):
+                part = emails[i:i + 500]
+                found.update((e, (s, r)) for e, s, r in self._db.execute(
+                    f"SELECT email, status, reason FROM addresses WHERE checked_at > ? "
+                    f"AND email IN ({','.join('?' * len(part))})", [cutoff, *part]))
+        return found
+
+    def _cached_domains(self, domains: List[str]) -> Dict[str, Tuple[Optional[int], Optional[int]]]:
+        cutoff = time.time() - DOMAIN_TTL
+        found = {}
+        with self._lock:
+            for i in range(0, len(domains), 500):
+                part = domains[i:i + 500]
+                found.update((d, (m, c)) for d, m, c in self._db.execute(
+                    f"SELECT domain, receives_mail, catch_all FROM domains WHERE checked_at > ? "
+                    f"AND domain IN ({','.join('?' * len(part))})", [cutoff, *part]))
+        return found
+
+    def _save(self, addresses: List[Tuple[str, str, str]] = (), domains: List[tuple] = ()):
+        now = time.time()
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO addresses VALUES (?, ?, ?, ?)",
+                                 [(e, s, r, now) for e, s, r in addresses])
+            self._db.executemany("INSERT OR REPLACE INTO domains VALUES (?, ?, ?, ?)",
+                                 [(d, m, c, now) for d, m, c in domains])
+            self._db.commit()
+
+    # ── Pipeline ────────────────────────────────────────────────────────────
+    def _api(self, email: str, deep: bool) -> Tuple[str, str, Optional[bool]]:
+        self.limiter.acquire()
+        try:
+            return interpret(self.call_api(email, deep))
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            return "unknown", f"api error: {e}", None
+
+    def _decide_chunk(self, emails: List[str]) -> Dict[str, Dict[str, str]]:
+        results: Dict[str, Dict[str, str]] = {}
+
+        def settle(email, status, reason, source):
+            results[email] = {"email": email, "status": status, "reason": reason, "source": source}
+            self.stats[source] += 1
+
+        by_domain: Dict[str, List[str]] = {}
+        for email in emails:
+            reason = syntax_error(email)
+            domain = email.rpartition("@")[2]
+            if reason:
+                settle(email, "invalid", reason, "local")
+            elif domain in self.disposable:
+                settle(email, "risky", "disposable", "local")
+            else:
+                by_domain.setdefault(domain, []).append(email)
+
+        cached = self._cached_addresses([e for group in by_domain.values() for e in group])
+        for email, (status, reason) in cached.items():
+            settle(email, status, reason, "cache")
+        by_domain = {d: [e for e in group if e not in cached] for d, group in by_domain.items()}
+        by_domain = {d: group for d, group in by_domain.items() if group}
+
+        # Domain facts: fresh cache, else one DNS lookup per domain.
+        domains = self._cached_domains(list(by_domain))
+        unknown = [d for d in by_domain if d not in domains]
+        new_domains = {}
+        if unknown and self.dns_check and resolve_domain(DNS_CANARY) is not True:
+            # Without working DNS every domain would look dead.
+            self.dns_check = False
+            self.dns_unavailable = True
+        if unknown and self.dns_check:
+            with ThreadPoolExecutor(max_workers=DNS_CONCURRENCY) as pool:
+                for domain, receives in zip(unknown, pool.map(resolve_domain, unknown)):
+                    new_domains[domain] = (None if receives is None else int(receives), None)
+        domains.update(new_domains)
+        for domain, (receives, _) in domains.items():
+            if receives == 0:
+                for email in by_domain.pop(domain):
+                    settle(email, "invalid", "no_mx", "dns")
+
+        # One deep probe per domain whose catch-all behaviour is not known yet.
+        saved = []
+        if self.deep_probe:
+            probes = [(d, group[0]) for d, group in by_domain.items() if domains.get(d, (None, None))[1] is None]
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                for (domain, email), (status, reason, catch_all) in zip(
+                        probes, pool.map(lambda p: self._api(p[1], True), probes)):
+                    settle(email, status, reason, "probe")
+                    by_domain[domain].remove(email)
+                    if not reason.startswith("api error"):
+                        saved.append((email, status, reason))
+                        receives = domains.get(domain, (None, None))[0]
+                        # A probe that does not mention catch-all counts as "not catch-all".
+                        domains[domain] = new_domains[domain] = (receives, int(bool(catch_all)))
+        for domain, group in by_domain.items():
+            if domains.get(domain, (None, None))[1] == 1:
+                for email in group:
+                    settle(email, "risky", "catch_all", "domain")
+                group.clear()
+
+        rest = [e for group in by_domain.values() for e in group]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for email, (status, reason, _) in zip(rest, pool.map(lambda e: self._api(e, False), rest)):
+                settle(email, status, reason, "api")
+                if not reason.startswith("api error"):
+                    saved.append((email, status, reason))
+
+        self._save(saved, [(d, m, c) for d, (m, c) in new_domains.items()])
+        return results
+
+    def verify(self, emails: Iterable[str], chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, str]]:
+        """Yield {"email", "status", "reason", "source"} for each distinct address, chunk by chunk."""
+        seen = set()
+        chunk: List[str] = []
+        for email in emails:
+            email = normalize(email)
+            if not email or email in seen:
+                continue
+            seen.add(email)
+            chunk.append(email)
+            if len(chunk) >= chunk_size:
+                results = self._decide_chunk(chunk)
+                yield from (results[e] for e in chunk)
+                chunk = []
+        if chunk:
+            results = self._decide_chunk(chunk)
+            yield from (results[e] for e in chunk)
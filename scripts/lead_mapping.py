@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Named mapping profiles for vendor lead files.
+
+A profile says which source headers feed which lead field, how each field is
+normalized, and whether fullName should be split into first/last name. It is
+loaded and compiled once: header aliases become a lookup table, and each
+field's transform chain becomes a single function that the batch mapper maps
+over the field's column. Nothing in the profile is interpreted per row.
+
+Profile file (JSON, or YAML when PyYAML is installed):
+
+    {
+      "name": "apollo",
+      "columns": {"firstName": ["First Name"], "email": ["Email"],
+                  "companyDomain": ["Website"], "linkedinUrl": ["Person Linkedin Url"]},
+      "transforms": {"email": ["email"], "companyDomain": ["domain"],
+                     "linkedinUrl": ["linkedin"], "leadScore": ["int"]},
+      "split_full_name": true,
+      "strict": false,
+      "notes_sections": ["### SCORE\\n{leadScore}", "{notes}"]
+    }
+
+`columns` entries are tried in order; headers are compared ignoring case,
+accents and punctuation. Unless `strict` is set, fields the profile does not
+mention still use the built-in header matching. `notes_sections` replaces the
+default AI notes template (see lead_notes.py).
+
+Profiles are looked up by path, then by name in ~/.leadgenius_mappings/ and
+the bundled scripts/mappings/ directory.
+"""
+
+import json
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from lead_notes import DEFAULT_NOTES_SECTIONS, NotesTemplate
+from lead_sources import LEAD_FIELDS, column_key, match_columns
+
+try:
+    import yaml
+except ImportError:  # optional: only needed for .yaml profiles
+    yaml = None
+
+USER_MAPPINGS_DIR = os.path.expanduser("~/.leadgenius_mappings")
+BUNDLED_MAPPINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mappings")
+PROFILE_EXTENSIONS = (".json", ".yaml", ".yml")
+
+_EMAIL = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_LINKEDIN_PATH = re.compile(r"^/(in|company|school|pub)/([^/?#]+)", re.I)
+
+
+# ── Transforms (str -> str, empty string drops the value) ──────────────────
+
+def to_email(value: str) -> str:
+    value = value.strip().lower()
+    if value.startswith("mailto:"):
+        value = value[7:]
+    return value if _EMAIL.match(value) else ""
+
+
+def to_domain(value: str) -> str:
+    value = value.strip().lower()
+    if "//" not in value:
+        value = "//" + value
+    host = urlsplit(value).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def to_url(value: str) -> str:
+    value = value.strip()
+    return value if "://" in value else f"https://{value}"
+
+
+def to_linkedin(value: str) -> str:
+    """Canonical https://www.linkedin.com/<kind>/<slug> form; anything else is dropped."""
+    value = value.strip()
+    if "linkedin.com" not in value.lower():
+        return ""
+    path = urlsplit(value if "//" in value else "//" + value).path
+    match = _LINKEDIN_PATH.match(path)
+    if not match:
+        return ""
+    return f"https://www.linkedin.com/{match.group(1).lower()}/{match.group(2)}"
+
+
+def to_int(value: str) -> str:
+    try:
+        return str(int(float(value.replace(",", ""))))
+    except ValueError:
+        return ""
+
+
+def to_float(value: str) -> str:
+    try:
+        return f"{float(value.replace(',', '')):g}"
+    except ValueError:
+        return ""
+
+
+TRANSFORMS: Dict[str, Callable[[str], str]] = {
+    "strip": str.strip,
+    "lower": str.lower,
+    "upper": str.upper,
+    "title": str.title,
+    "email": to_email,
+    "domain": to_domain,
+    "url": to_url,
+    "linkedin": to_linkedin,
+    "int": to_int,
+    "float": to_float,
+}
+
+
+def _compose(names: Sequence[str], field: str) -> Callable[[str], str]:
+    funcs = []
+    for name in names:
+        if name not in TRANSFORMS:
+            raise ValueError(f"Unknown transform '{name}' for {field}. Available: {', '.join(TRANSFORMS)}")
+        funcs.append(TRANSFORMS[name])
+    return funcs[0] if len(funcs) == 1 else _Chain(funcs)
+
+
+class _Chain:
+    """Transforms applied in order, stopping once the value is empty. Picklable for worker processes."""
+    __slots__ = ("funcs",)
+
+    def __init__(self, funcs: List[Callable[[str], str]]):
+        self.funcs = tuple(funcs)
+
+    def __call__(self, value: str) -> str:
+        for fn in self.funcs:
+            if not value:
+                break
+            value = fn(value)
+        return value
+
+
+def split_name(full_name: str) -> Tuple[str, str]:
+    """'Jane Q. Doe' -> ('Jane', 'Q. Doe'); 'Doe, Jane' -> ('Jane', 'Doe')."""
+    if "," in full_name:
+        last, _, first = full_name.partition(",")
+        return first.strip(), last.strip()
+    first, _, last = full_name.strip().partition(" ")
+    return first, last.strip()
+
+
+class MappingProfile:
+    """A compiled mapping profile. Build with load_profile() or from a dict."""
+
+    def __init__(self, spec: Dict[str, Any], source: str = None):
+        self.name = spec.get("name") or (os.path.splitext(os.path.basename(source))[0] if source else "profile")
+        self.source = source
+        self.strict = bool(spec.get("strict", False))
+        self.split_full_name = bool(spec.get("split_full_name", True))
+        self.notes_sections = spec.get("notes_sections")
+
+        columns = spec.get("columns") or {}
+        transforms = spec.get("transforms") or {}
+        known = set(LEAD_FIELDS) | set(NotesTemplate(self.notes_sections or DEFAULT_NOTES_SECTIONS).fields)
+        unknown = sorted((set(columns) | set(transforms)) - known)
+        if unknown:
+            raise ValueError(f"Mapping profile '{self.name}': unknown field(s) {', '.join(unknown)}")
+
+        # field -> header keys, tried in order
+        self.columns: Dict[str, List[str]] = {
+            field: [column_key(h) for h in ([headers] if isinstance(headers, str) else headers)]
+            for field, headers in columns.items()
+        }
+        self.transforms: Dict[str, Callable[[str], str]] = {
+            field: _compose([names] if isinstance(names, str) else names, field)
+            for field, names in transforms.items() if names
+        }
+
+    def notes_template(self, max_bytes: int) -> NotesTemplate:
+        return NotesTemplate(self.notes_sections or DEFAULT_NOTES_SECTIONS, max_bytes=max_bytes)
+
+    def match(self, names: Sequence[str], notes: NotesTemplate = None) -> List[Tuple[int, str]]:
+        """(source index, field) pairs: profile headers first, then built-in matching unless strict."""
+        index: Dict[str, int] = {}
+        for i, name in enumerate(names):
+            index.setdefault(column_key(name), i)
+        allowed = set(LEAD_FIELDS) | set(notes.fields if notes else ())
+        taken: Dict[str, int] = {}
+        for field, keys in self.columns.items():
+            if field not in allowed:
+                continue
+            for key in keys:
+                i = index.get(key)
+                if i is not None and i not in taken.values():
+                    taken[field] = i
+                    break
+        if not self.strict:
+            for i, field in match_columns(names, notes):
+                if field not in taken and i not in taken.values():
+                    taken[field] = i
+        return sorted(((i, f) for f, i in taken.items()))
+
+    def apply(self, fields: List[str], columns: List[List[str]]) -> Tuple[List[str], List[List[str]]]:
+        """Run the compiled transforms over a batch of cleaned columns, then split fullName."""
+        columns = list(columns)
+        for idx, field in enumerate(fields):
+            fn = self.transforms.get(field)
+            if fn:
+                columns[idx] = [fn(v) if v else v for v in columns[idx]]
+        if self.split_full_name and "fullName" in fields:
+            fields, columns = self._split(list(fields), columns)
+        return fields, columns
+
+    @staticmethod
+    def _split(fields: List[str], columns: List[List[str]]):
+        has_first, has_last = "firstName" in fields, "lastName" in fields
+        if has_first and has_last:
+            firsts, lasts = columns[fields.index("firstName")], columns[fields.index("lastName")]
+            if all(firsts) and all(lasts):
+                return fields, columns
+        parts = [split_name(v) if v else ("", "") for v in columns[fields.index("fullName")]]
+        for field, pos, present in (("firstName", 0, has_first), ("lastName", 1, has_last)):
+            derived = [p[pos] for p in parts]
+            if present:
+                idx = fields.index(field)
+                columns[idx] = [v or d for v, d in zip(columns[idx], derived)]
+            else:
+                fields.append(field)
+                columns.append(derived)
+        return fields, columns
+
+
+def _read_spec(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RuntimeError("YAML mapping profiles require PyYAML: pip install pyyaml")
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    if not isinstance(spec, dict):
+        raise ValueError(f"Mapping profile {path} must be an object")
+    return spec
+
+
+def find_profile(ref: str) -> Optional[str]:
+    """Path of a profile given as a path or a name in the user / bundled mapping directories."""
+    if os.path.isfile(ref):
+        return ref
+    for directory in (USER_MAPPINGS_DIR, BUNDLED_MAPPINGS_DIR):
+        for ext in PROFILE_EXTENSIONS:
+            path = os.path.join(directory, ref + ext)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def list_profiles() -> Dict[str, str]:
+    """name -> path for every profile found; user profiles shadow bundled ones."""
+    found = {}
+    for directory in (BUNDLED_MAPPINGS_DIR, USER_MAPPINGS_DIR):
+        if not os.path.isdir(directory):
+            continue
+        for entry in sorted(os.listdir(directory)):
+            name, ext = os.path.splitext(entry)
+            if ext in PROFILE_EXTENSIONS:
+                found[name] = os.path.join(directory, entry)
+    return found
+
+
+def load_profile(ref: str) -> MappingProfile:
+    path = find_profile(ref)
+    if not path:
+        available = ", ".join(list_profiles()) or "none"
+        raise ValueError(f"No mapping profile '{ref}' (available: {available})")
+    return MappingProfile(_read_spec(path), source=path)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Notes catch-all rendering for lead imports.
+
+Structured AI fields (aiLeadScore, justification, recommendations, SDR
+synthesis) may be stored but hidden in the UI table view, so importers fold
+them into the markdown `notes` field (see LEADGENIUS_IMPORT_GUIDELINES.md).
+NotesTemplate does this for whole batches: each section is compiled once into
+a positional format string, rendered column by column, sections whose fields
+are empty are skipped, and the result is capped at `max_bytes` of UTF-8.
+
+Template syntax, one string per section:
+    "### 🧐 JUSTIFICATION\\n{justification}"
+    "## 🎯 AI SCORE: {aiLeadScore}[ ({leadScore}/100)]"
+
+A section renders only when every {field} outside brackets has a value; a
+[...] group renders only when all of its own fields have values.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+NOTES_MAX_BYTES = 32 * 1024  # keeps lead items small and the detail view readable
+TRUNCATION_MARKER = "\n\n… (truncated)"
+
+DEFAULT_NOTES_SECTIONS = (
+    "## 🎯 AI SCORE: {aiLeadScore}[ ({leadScore}/100)]",
+    "### 🧐 JUSTIFICATION\n{justification}",
+    "### 💡 STRATEGIC RECOMMENDATIONS\n{recommendations}",
+    "### 📝 SDR SYNTHESIS\n{sdrSynthesis}",
+    "{notes}",
+)
+
+# Source column spellings for the template fields, keyed like lead_sources
+# COLUMN_ALIASES (lowercase, letters and digits only).
+NOTE_FIELD_ALIASES = {
+    "aiscore": "aiLeadScore",
+    "score": "leadScore",
+    "justificationjason": "justification",
+    "recommandations": "recommendations",
+    "strategicrecommendations": "recommendations",
+    "synthesesdr": "sdrSynthesis",
+    "sdrsummary": "sdrSynthesis",
+}
+
+_FIELD = re.compile(r"\{(\w+)\}")
+_GROUP = re.compile(r"\[([^\[\]]*)\]")
+
+
+def _positional(text: str, fields: List[str]) -> str:
+    """Turn '{name}' placeholders into positional '{n}' slots appended to `fields`; escape other braces."""
+    slots = []
+
+    def slot(match):
+        slots.append(match.group(1))
+        return f"\0{len(slots) - 1}\0"
+
+    text = _FIELD.sub(slot, text).replace("{", "{{").replace("}", "}}")
+    base = len(fields)
+    fields.extend(slots)
+    return re.sub(r"\0(\d+)\0", lambda m: "{%d}" % (base + int(m.group(1))), text)
+
+
+class _Section:
+    __slots__ = ("required", "groups", "fmt", "fields")
+
+    def __init__(self, template: str):
+        groups = []
+
+        def group(match):
+            group_fields: List[str] = []
+            groups.append((_positional(match.group(1), group_fields), group_fields))
+            return f"\1{len(groups) - 1}\1"
+
+        body = _GROUP.sub(group, template)
+        self.required: List[str] = []
+        fmt = _positional(body, self.required)
+        if not self.required:
+            raise ValueError(f"Notes section needs at least one {{field}} outside [...]: {template!r}")
+        # Group outputs follow the required fields as extra positional slots.
+        k = len(self.required)
+        self.fmt = re.sub("\1(\\d+)\1", lambda m: "{%d}" % (k + int(m.group(1))), fmt)
+        self.groups: List[Tuple[str, List[str]]] = groups
+        self.fields = tuple(dict.fromkeys(self.required + [f for _, fs in groups for f in fs]))
+
+    def render(self, columns: Dict[str, List[str]], n: int) -> Optional[List[str]]:
+        """Rendered column for this section, or None if a required field is absent from the batch."""
+        required = [columns.get(f) for f in self.required]
+        if any(c is None for c in required):
+            return None
+        slots = list(required)
+        for fmt, fields in self.groups:
+            cols = [columns.get(f) for f in fields]
+            if any(c is None for c in cols):
+                slots.append([""] * n)
+            else:
+                slots.append([fmt.format(*v) if all(v) else "" for v in zip(*cols)])
+        fmt, k = self.fmt, len(required)
+        if k == 1:
+            return [fmt.format(*v) if v[0] else "" for v in zip(*slots)]
+        return [fmt.format(*v) if all(v[:k]) else "" for v in zip(*slots)]
+
+
+def truncate_utf8(text: str, max_bytes: int) -> str:
+    """`text` cut to at most `max_bytes` of UTF-8 (marker included), never splitting a character."""
+    data = text.encode("utf-8")
+    if len(data) <= max_bytes:
+        return text
+    marker = TRUNCATION_MARKER.encode("utf-8")
+    return data[:max(0, max_bytes - len(marker))].decode("utf-8", "ignore") + TRUNCATION_MARKER
+
+
+class NotesTemplate:
+    """Compiled notes template rendered over column batches."""
+
+    def __init__(self, sections: Sequence[str] = DEFAULT_NOTES_SECTIONS, max_bytes: int = NOTES_MAX_BYTES,
+                 separator: str = "\n\n"):
+        self.sections = [_Section(s) for s in sections]
+        self.max_bytes = max_bytes
+        self.separator = separator
+        self.fields = tuple(dict.fromkeys(f for s in self.sections for f in s.fields))
+
+    def render_batch(self, columns: Dict[str, List[str]], n: int) -> List[str]:
+        """Notes for `n` rows from cleaned string columns keyed by field name."""
+        rendered = [c for c in (s.render(columns, n) for s in self.sections) if c is not None]
+        if not rendered:
+            return [""] * n
+        sep = self.separator
+        if len(rendered) == 1:
+            notes = rendered[0]
+        else:
+            notes = [sep.join(p for p in parts if p) for parts in zip(*rendered)]
+        limit = self.max_bytes
+        if limit:
+            # A str of len(s) chars is at most 4*len(s) bytes, so most rows skip the encode.
+            notes = [s if len(s) * 4 <= limit else truncate_utf8(s, limit) for s in notes]
+        return notes
+
+    def apply(self, fields: List[str], columns: List[List[str]]) -> Tuple[List[str], List[List[str]]]:
+        """Replace the template's source columns in a mapped batch with a rendered `notes` column."""
+        present = {f: c for f, c in zip(fields, columns) if f in self.fields}
+        if not present:
+            return fields, columns
+        notes = self.render_batch(present, len(next(iter(present.values()))))
+        keep = [(f, c) for f, c in zip(fields, columns) if f not in self.fields]
+        return [f for f, _ in keep] + ["notes"], [c for _, c in keep] + [notes]
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory lead record.
+
+A lead held as a dict costs a hash table per record; with millions of leads
+that overhead dominates RAM. Lead stores the common payload fields in
+__slots__, keeps any other fields in a small `extra` dict only when present,
+and interns low-cardinality values (client_id, companyName, status, ...) so
+repeated values share one string.
+
+Lead is a read-only Mapping over its non-empty fields, so code written for
+payload dicts keeps working: lead["email"], lead.get("title"),
+{**lead, "client_id": slug} and dict(lead) all behave like the dict it
+replaced. to_payload() is the cheap conversion for JSON bodies.
+
+Use it where leads are held, not where they stream past: import_csv.py keeps
+the loaded file as Lead records and hubspot_sync.py its read-back sample.
+Streaming paths (`lgp leads list`, HubSpot paging, the territory mirror,
+which turns each lead into a SQLite row) hold one lead or one page at a
+time, so converting them would only add work.
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List
+
+FIELDS = (
+    "id", "client_id", "company_id", "firstName", "lastName", "fullName",
+    "email", "companyName", "companyDomain", "companyUrl", "title",
+    "linkedinUrl", "phoneNumber", "city", "country", "status", "notes",
+)
+
+# Values repeated across many leads of a tenant.
+INTERNED = frozenset({
+    "client_id", "company_id", "companyName", "companyDomain", "companyUrl",
+    "title", "city", "country", "status",
+})
+
+_FIELD_SET = frozenset(FIELDS)
+_SPEC = tuple((name, name in INTERNED) for name in FIELDS)
+_intern = sys.intern
+
+
+class Lead(Mapping):
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, **fields: Any):
+        self._fill(fields)
+
+    def _fill(self, payload: Dict[str, Any]):
+        get = payload.get
+        for name, interned in _SPEC:
+            value = get(name)
+            if value == "":
+                value = None
+            elif interned and value.__class__ is str:
+                value = _intern(value)
+            setattr(self, name, value)
+        extra = None
+        if len(payload) > len(FIELDS) or not _FIELD_SET.issuperset(payload):
+            for key, value in payload.items():
+                if key not in _FIELD_SET and value is not None and value != "":
+                    if extra is None:
+                        extra = {}
+                    extra[_intern(key)] = value
+        self.extra = extra
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any]) -> "Lead":
+        """Build from an API/payload dict, dropping empty values."""
+        lead = cls.__new__(cls)
+        lead._fill(payload)
+        return lead
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Plain dict of the non-empty fields, ready for json.dumps."""
+        payload = {name: value for name in FIELDS if (value := getattr(self, name)) is not None}
+        if self.extra:
+            payload.update(self.extra)
+        return payload
+
+    # ── Mapping protocol ────────────────────────────────────────────────────
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for name in FIELDS:
+            if getattr(self, name) is not None:
+                yield name
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(getattr(self, name) is not None for name in FIELDS) + len(self.extra or ())
+
+    def __repr__(self) -> str:
+        return f"Lead({self.to_payload()!r})"
+
+    # Slots-only objects need explicit pickle state for worker processes.
+    def __getstate__(self):
+        return self.to_payload()
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self._fill(state)
+
+
+def compact(leads: Iterable[Dict[str, Any]]) -> List[Lead]:
+    """Convert payload dicts to Lead records."""
+    from_payload = Lead.from_payload
+    return [from_payload(lead) for lead in leads]
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Lead file readers for the import scripts.
+
+Reads CSV, Parquet, Arrow IPC (Feather v2) and NDJSON, optionally gzip- or
+zstd-compressed, and yields lead payloads in batches. Column mapping works on
+whole batches instead of row by row: the source columns are matched to lead
+fields once per schema, then each batch is renamed, trimmed and given a
+derived `fullName` column-wise before being zipped into payload dicts with
+empty values dropped. AI columns (aiLeadScore, justification, ...) are folded
+into `notes` by a lead_notes.NotesTemplate when one is given.
+
+Parquet and Arrow need `pyarrow`; `.zst` inputs need `zstandard`. Both are
+optional and only imported when such a file is read.
+"""
+
+import csv
+import gzip
+import io
+import mmap
+import os
+import re
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import lgp_json
+from lead_notes import NOTE_FIELD_ALIASES, NotesTemplate
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # optional: only needed for Parquet / Arrow inputs
+    pa = None
+    pc = None
+
+try:
+    import zstandard
+except ImportError:  # optional: only needed for .zst inputs
+    zstandard = None
+
+READ_BATCH_SIZE = 10000
+PARALLEL_CHUNK_BYTES = 8 * 1024 * 1024  # byte range handed to each CSV worker
+
+# Lead payload fields, in the order they appear in the payload.
+LEAD_FIELDS = (
+    "firstName", "lastName", "fullName", "email", "companyName",
+    "companyDomain", "title", "linkedinUrl", "notes",
+)
+
+# Vendor column spellings, keyed by the column name lowercased with
+# everything but letters and digits removed.
+COLUMN_ALIASES = {
+    "first": "firstName",
+    "givenname": "firstName",
+    "last": "lastName",
+    "surname": "lastName",
+    "familyname": "lastName",
+    "name": "fullName",
+    "emailaddress": "email",
+    "workemail": "email",
+    "company": "companyName",
+    "organization": "companyName",
+    "domain": "companyDomain",
+    "companywebsite": "companyDomain",
+    "website": "companyDomain",
+    "jobtitle": "title",
+    "linkedin": "linkedinUrl",
+    "linkedinprofile": "linkedinUrl",
+    "linkedinprofileurl": "linkedinUrl",
+}
+
+FORMATS = ("csv", "parquet", "arrow", "ndjson")
+_EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".json": "ndjson",
+}
+_COMPRESSIONS = {".gz": "gzip", ".gzip": "gzip", ".zst": "zstd", ".zstd": "zstd"}
+
+
+def column_key(name: str) -> str:
+    name = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def detect_format(path: str) -> Tuple[str, Optional[str]]:
+    """(format, compression) from the file name, e.g. 'leads.ndjson.zst' -> ('ndjson', 'zstd')."""
+    root, ext = os.path.splitext(path.lower())
+    compression = _COMPRESSIONS.get(ext)
+    if compression:
+        root, ext = os.path.splitext(root)
+    fmt = _EXTENSIONS.get(ext)
+    if not fmt:
+        raise ValueError(f"Cannot tell the format of '{path}'. Pass --format ({', '.join(FORMATS)}).")
+    return fmt, compression
+
+
+def match_columns(names: Sequence[str], notes: NotesTemplate = None) -> List[Tuple[int, str]]:
+    """(source index, field) pairs for the columns we know how to map.
+
+    Fields are the lead fields plus the notes template's source fields.
+    Exact field names (case/accent/punctuation-insensitive) win over aliases,
+    and each field is taken from at most one column.
+    """
+    targets = LEAD_FIELDS + tuple(f for f in (notes.fields if notes else ()) if f not in LEAD_FIELDS)
+    exact = {column_key(f): f for f in targets}
+    aliases = {**COLUMN_ALIASES, **NOTE_FIELD_ALIASES} if notes else COLUMN_ALIASES
+    aliases = {k: f for k, f in aliases.items() if f in targets}
+    taken = {}
+    for pass_map in (exact, aliases):
+        for i, name in enumerate(names):
+            field = pass_map.get(column_key(name))
+            if field and field not in taken and i not in taken.values():
+                taken[field] = i
+    return sorted(((i, f) for f, i in taken.items()), key=lambda pair: targets.index(pair[1]))
+
+
+def _open_text(path: str, compression: Optional[str]) -> io.TextIOBase:
+    if compression == "gzip":
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Reading .zst files requires zstandard: pip install zstandard")
+        raw = open(path, "rb")
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+# ── Column-wise mapping ─────────────────────────────────────────────────────
+
+def _clean(values: Sequence[Any]) -> List[str]:
+    return [v.strip() if isinstance(v, str) else ("" if v is None else str(v)) for v in values]
+
+
+def _assemble(fields: List[str], columns: List[List[str]]) -> List[Dict[str, str]]:
+    """Zip mapped columns into payload dicts, dropping empty values and all-empty columns."""
+    keep = [(f, col) for f, col in zip(fields, columns) if any(col)]
+    if not keep:
+        return []
+    fields = [f for f, _ in keep]
+    return [
+        lead for lead in ({f: v for f, v in zip(fields, row) if v} for row in zip(*(c for _, c in keep)))
+        if lead
+    ]
+
+
+def _with_full_name(fields: List[str], columns: List[List[str]]):
+    if "fullName" in fields or "firstName" not in fields or "lastName" not in fields:
+        return fields, columns
+    first = columns[fields.index("firstName")]
+    last = columns[fields.index("lastName")]
+    full = [f"{a} {b}".strip() for a, b in zip(first, last)]
+    return fields + ["fullName"], columns + [full]
+
+
+class BatchMapper:
+    """Column matching and batch transforms shared by every reader.
+
+    `profile` is a lead_mapping.MappingProfile (header aliases and compiled
+    field transforms), `notes` a lead_notes.NotesTemplate.
+    """
+
+    def __init__(self, notes: NotesTemplate = None, profile=None):
+        self.notes = notes
+        self.profile = profile
+
+    def match(self, names: Sequence[str]) -> List[Tuple[int, str]]:
+        if self.profile:
+            return self.profile.match(names, self.notes)
+        return match_columns(names, self.notes)
+
+    def finish(self, fields: List[str], columns: List[List[str]]) -> List[Dict[str, str]]:
+        """Payloads from cleaned string columns."""
+        if self.profile:
+            fields, columns = self.profile.apply(fields, columns)
+        if self.notes:
+            fields, columns = self.notes.apply(fields, columns)
+        return _assemble(*_with_full_name(fields, columns))
+
+
+def map_columns(fields: List[str], columns: List[Sequence[Any]], mapper: BatchMapper = None) -> List[Dict[str, str]]:
+    """Map one batch given as parallel columns already matched to lead fields."""
+    return (mapper or BatchMapper()).finish(list(fields), [_clean(c) for c in columns])
+
+
+def _map_arrow_batch(batch, mapping: List[Tuple[str, str]], mapper: BatchMapper) -> List[Dict[str, str]]:
+    fields, arrays = [], []
+    for name, field in mapping:
+        col = batch.column(batch.schema.get_field_index(name))
+        if not pa.types.is_string(col.type) and not pa.types.is_large_string(col.type):
+            col = pc.cast(col, pa.string())
+        col = pc.fill_null(pc.utf8_trim_whitespace(col), "")
+        fields.append(field)
+        arrays.append(col)
+    # Profile transforms run in Python, so fullName is derived after them instead.
+    if not mapper.profile and "fullName" not in fields and "firstName" in fields and "lastName" in fields:
+        full = pc.binary_join_element_wise(
+            arrays[fields.index("firstName")], arrays[fields.index("lastName")], " "
+        )
+        fields.append("fullName")
+        arrays.append(pc.utf8_trim_whitespace(full))
+    # Columns that are empty across the whole batch never reach Python.
+    kept = [(f, a) for f, a in zip(fields, arrays) if pc.max(pc.utf8_length(a)).as_py()]
+    return mapper.finish([f for f, _ in kept], [a.to_pylist() for _, a in kept])
+
+
+# ── Readers ─────────────────────────────────────────────────────────────────
+
+def _read_csv(path: str, compression: Optional[str], batch_size: int,
+              mapper: BatchMapper) -> Iterator[List[Dict[str, str]]]:
+    with _open_text(path, compression) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        mapping = mapper.match(header)
+        indexes = [i for i, _ in mapping]
+        fields = [f for _, f in mapping]
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) >= batch_size:
+                yield _map_rows(rows, indexes, fields, mapper)
+                rows = []
+        if rows:
+            yield _map_rows(rows, indexes, fields, mapper)
+
+
+def _map_rows(rows: List[List[str]], indexes: List[int], fields: List[str],
+              mapper: BatchMapper) -> List[Dict[str, str]]:
+    columns = [[row[i] if i < len(row) else "" for row in rows] for i in indexes]
+    return map_columns(fields, columns, mapper)
+
+
+# ── Parallel CSV ────────────────────────────────────────────────────────────
+
+def _record_end(mm, pos: int, quotes: int) -> Tuple[int, int]:
+    """First record boundary at or after `pos`; `quotes` counts the quotes since the last boundary.
+
+    A newline ends a record only when the quotes before it are balanced; escaped
+    quotes ("") count twice, so the parity rule holds for RFC 4180 files.
+    Returns (offset just past the newline, or len(mm); quote count up to there).
+    """
+    while True:
+        nl = mm.find(b"\n", pos)
+        if nl < 0:
+            return len(mm), quotes + mm[pos:].count(b'"')
+        quotes += mm[pos:nl].count(b'"')
+        pos = nl + 1
+        if quotes % 2 == 0:
+            return pos, quotes
+
+
+def csv_byte_ranges(path: str, chunk_bytes: int = PARALLEL_CHUNK_BYTES) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """(header, [(start, end), ...]) splitting a CSV file on record boundaries, quoted newlines included."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return [], []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end, _ = _record_end(mm, 0, 0)
+            header = next(csv.reader(io.StringIO(mm[:header_end].decode("utf-8-sig"), newline="")), [])
+            ranges = []
+            start = header_end
+            while start < size:
+                target = min(start + chunk_bytes, size)
+                quotes = mm[start:target].count(b'"')
+                end, _ = _record_end(mm, target, quotes) if target < size else (size, 0)
+                ranges.append((start, end))
+                start = end
+    return header, ranges
+
+
+_worker_mapper: Optional["BatchMapper"] = None
+
+
+def _init_csv_worker(mapper: "BatchMapper"):
+    global _worker_mapper
+    _worker_mapper = mapper
+
+
+def _parse_csv_range(path: str, start: int, end: int, indexes: List[int], fields: List[str]) -> List[Dict[str, str]]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    rows = list(csv.reader(io.StringIO(text, newline="")))
+    return _map_rows(rows, indexes, fields, _worker_mapper) if rows else []
+
+
+def _read_csv_parallel(path: str, batch_size: int, mapper: BatchMapper, workers: int) -> Iterator[List[Dict[str, str]]]:
+    """Parse byte ranges in a process pool; results are yielded in file order."""
+    header, ranges = csv_byte_ranges(path)
+    if not header:
+        return
+    mapping = mapper.match(header)
+    indexes = [i for i, _ in mapping]
+    fields = [f for _, f in mapping]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_csv_worker, initargs=(mapper,)) as pool:
+        pending = []
+        next_range = 0
+        while pending or next_range < len(ranges):
+            # Keep a bounded window in flight so memory stays proportional to the worker count.
+            while next_range < len(ranges) and len(pending) < workers * 2:
+                start, end = ranges[next_range]
+                pending.append(pool.submit(_parse_csv_range, path, start, end, indexes, fields))
+                next_range += 1
+            leads = pending.pop(0).result()
+            for i in range(0, len(leads), batch_size):
+                yield leads[i:i + batch_size]
+
+
+def _read_ndjson(path: str, compression: Optional[str], batch_size: int,
+                 mapper: BatchMapper) -> Iterator[List[Dict[str, str]]]:
+    known: Dict[str, None] = {}  # every key seen so far, in first-seen order
+    pairs: List[Tuple[str, str]] = []
+
+    def flush(records):
+        return map_columns([f for _, f in pairs], [[r.get(src) for r in records] for src, _ in pairs], mapper)
+
+    with _open_text(path, compression) as f:
+        records = []
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = lgp_json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_no}: invalid JSON ({e})")
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{line_no}: expected a JSON object per line")
+            # Records almost always share one key set, so the mapping is rebuilt rarely.
+            if record.keys() - known.keys():
+                known.update(dict.fromkeys(record))
+                keys = list(known)
+                pairs = [(keys[i], field) for i, field in mapper.match(keys)]
+            records.append(record)
+            if len(records) >= batch_size:
+                yield flush(records)
+                records = []
+        if records:
+            yield flush(records)
+
+
+def _require_pyarrow(fmt: str):
+    if pa is None:
+        raise RuntimeError(f"Reading {fmt} files requires pyarrow: pip install pyarrow")
+
+
+def _read_parquet(path: str, batch_size: int, mapper: BatchMapper) -> Iterator[List[Dict[str, str]]]:
+    _require_pyarrow("Parquet")
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    names = parquet.schema_arrow.names
+    mapping = [(names[i], field) for i, field in mapper.match(names)]
+    if not mapping:
+        return
+    # Only decode the columns we map.
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=[name for name, _ in mapping]):
+        yield _map_arrow_batch(batch, mapping, mapper)
+
+
+def _read_arrow(path: str, batch_size: int, mapper: BatchMapper) -> Iterator[List[Dict[str, str]]]:
+    _require_pyarrow("Arrow")
+    source = pa.memory_map(path, "r")
+    try:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        source.seek(0)
+        reader = pa.ipc.open_stream(source)
+        batches = iter(reader)
+    names = reader.schema.names
+    mapping = [(names[i], field) for i, field in mapper.match(names)]
+    if not mapping:
+        return
+    for batch in batches:
+        for offset in range(0, batch.num_rows, batch_size):
+            yield _map_arrow_batch(batch.slice(offset, batch_size), mapping, mapper)
+
+
+def iter_lead_batches(path: str, fmt: str = None, batch_size: int = READ_BATCH_SIZE,
+                      notes: NotesTemplate = None, profile=None, workers: int = 1) -> Iterator[List[Dict[str, str]]]:
+    """Yield lists of lead payloads (without client_id) read from `path`.
+
+    `fmt` overrides the format detected from the extension; compression is
+    always taken from the extension. With `notes`, the template's source
+    columns are rendered into the `notes` field; `profile` (a
+    lead_mapping.MappingProfile) replaces the built-in column matching.
+
+    With `workers` > 1, uncompressed CSV files larger than one chunk are
+    split into byte ranges and parsed by a process pool.
+    """
+    mapper = BatchMapper(notes, profile)
+    compression = _COMPRESSIONS.get(os.path.splitext(path.lower())[1])
+    detected = fmt or detect_format(path)[0]
+    if detected in ("parquet", "arrow") and compression:
+        raise ValueError(f"{detected} files carry their own compression; '{path}' should not be gzip/zstd wrapped")
+
+    if detected == "csv" and workers > 1 and not compression and os.path.getsize(path) > PARALLEL_CHUNK_BYTES:
+        yield from _read_csv_parallel(path, batch_size, mapper, workers)
+    elif detected == "csv":
+        yield from _read_csv(path, compression, batch_size, mapper)
+    elif detected == "ndjson":
+        yield from _read_ndjson(path, compression, batch_size, mapper)
+    elif detected == "parquet":
+        yield from _read_parquet(path, batch_size, mapper)
+    elif detected == "arrow":
+        yield from _read_arrow(path, batch_size, mapper)
+    else:
+        raise ValueError(f"Unknown format '{detected}'. Use one of: {', '.join(FORMATS)}")
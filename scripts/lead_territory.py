@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Local territory workbench: company rollups computed from mirrored leads.
+
+GET /api/territory-workbench/companies aggregates server-side for one
+client_id per call, so account planning across hundreds of clients means
+hundreds of slow calls. Instead, the company-wide bulk listing
+(GET /api/enrich-leads/list, API key) is mirrored into a local SQLite table
+with a narrow field projection, and per-company rollups (lead count, top
+titles, industries, first/last lead dates) are computed for every client in
+one set-based GROUP BY.
+
+Re-syncing is incremental: each page is staged and compared with the mirror
+in SQL, and only the (client, company) groups whose leads were added,
+changed or removed are re-aggregated. Rollups keep a digest of their values,
+so `push` sends only companies that changed since the last push.
+
+Companies are keyed by normalized domain (companyDomain, else the companyUrl
+host), falling back to the normalized company name.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+import lgp_json
+from lgp_cache import CACHE_DIR
+
+TERRITORY_DB = os.path.join(CACHE_DIR, "territory.sqlite")
+BULK_PAGE_SIZE = 5000  # GET /api/enrich-leads/list maximum
+MIRROR_FIELDS = ("id", "client_id", "companyName", "companyDomain", "companyUrl", "title",
+                 "industry", "companyIndustry", "createdAt")
+TOP_VALUES = 5  # titles / industries kept per company
+
+SORT_FIELDS = ("leadCount", "companyName", "firstLeadAt", "lastLeadAt")
+
+
+def normalize_domain(value: str) -> str:
+    value = (value or "").strip().lower()
+    if not value:
+        return ""
+    host = urlsplit(value if "//" in value else "//" + value).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def _name_key(name: str) -> str:
+    name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii")
+    return " ".join("".join(c if c.isalnum() else " " for c in name.lower()).split())
+
+
+def _row(lead: Dict[str, Any]) -> Optional[tuple]:
+    """Mirror row for a bulk-listing lead: (id, client_id, company_key, name, domain, title, industry, created_at)."""
+    lead_id = lead.get("id")
+    if not lead_id:
+        return None
+    name = (lead.get("companyName") or "").strip()
+    domain = normalize_domain(lead.get("companyDomain")) or normalize_domain(lead.get("companyUrl"))
+    key = domain or (("name:" + _name_key(name)) if _name_key(name) else None)
+    return (
+        lead_id, lead.get("client_id"), key, name or None, domain or None,
+        (lead.get("title") or "").strip() or None,
+        (lead.get("industry") or lead.get("companyIndustry") or "").strip() or None,
+        lead.get("createdAt") or None,
+    )
+
+
+def iter_bulk_leads(http, base_url: str, headers: Dict[str, str], company_id: str,
+                    client_id: str = None, page_size: int = BULK_PAGE_SIZE) -> Iterator[Dict[str, Any]]:
+    """Stream every lead of the company (or one client) from the bulk listing, projected to MIRROR_FIELDS."""
+    params = {"companyId": company_id, "clientId": client_id or "ALL",
+              "fields": ",".join(MIRROR_FIELDS), "limit": page_size}
+    while True:
+        response = lgp_json.request_json(http, "GET", f"{base_url}/api/enrich-leads/list",
+                                         headers=headers, params=params, stream=True)
+        if response.status_code >= 400:
+            raise Exception(f"bulk listing failed ({response.status_code}): {response.text[:200]}")
+        page = {}
+        yield from lgp_json.stream_response_items(response, meta=page)
+        if not page.get("nextToken"):
+            return
+        params["nextToken"] = page["nextToken"]
+
+
+def _top(counts: Dict[str, int]) -> List[List[Any]]:
+    return [[v, n] for v, n in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:TOP_VALUES]]
+
+
+class TerritoryMirror:
+    """Per-tenant lead mirror and company rollups in SQLite. Safe to share between threads."""
+
+    def __init__(self, scope: str, path: str = None):
+        self.scope = scope
+        self.path = path or TERRITORY_DB
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS leads (
+                scope TEXT NOT NULL,
+                id TEXT NOT NULL,
+                client_id TEXT,
+                company_key TEXT,
+                company_name TEXT,
+                domain TEXT,
+                title TEXT,
+                industry TEXT,
+                created_at TEXT,
+                sync_gen INTEGER NOT NULL,
+                PRIMARY KEY (scope, id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS leads_group ON leads (scope, client_id, company_key);
+            CREATE TABLE IF NOT EXISTS rollups (
+                scope TEXT NOT NULL,
+                client_id TEXT NOT NULL,
+                company_key TEXT NOT NULL,
+                company_name TEXT,
+                domain TEXT,
+                lead_count INTEGER NOT NULL,
+                titles TEXT NOT NULL,
+                industries TEXT NOT NULL,
+                first_lead_at TEXT,
+                last_lead_at TEXT,
+                digest TEXT NOT NULL,
+                pushed_digest TEXT,
+                PRIMARY KEY (scope, client_id, company_key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS dirty (
+                scope TEXT NOT NULL,
+                client_id TEXT NOT NULL,
+                company_key TEXT NOT NULL,
+                PRIMARY KEY (scope, client_id, company_key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS meta (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT,
+                PRIMARY KEY (scope, key)
+            ) WITHOUT ROWID;
+            CREATE TEMP TABLE IF NOT EXISTS incoming (
+                id TEXT PRIMARY KEY, client_id TEXT, company_key TEXT, company_name TEXT,
+                domain TEXT, title TEXT, industry TEXT, created_at TEXT
+            );
+        """)
+        self._db.commit()
+
+    # ── Sync ────────────────────────────────────────────────────────────────
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE scope = ? AND key = ?", (self.scope, key)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?, ?)", (self.scope, key, value))
+
+    def sync(self, leads: Iterable[Dict[str, Any]], client_id: str = None, batch_size: int = BULK_PAGE_SIZE) -> Dict[str, int]:
+        """Mirror a full listing of the tenant (or of one client) and refresh the affected rollups.
+
+        Leads absent from the listing are removed from the mirror. Returns
+        counts: seen, changed (added or modified), removed, companies (rollups
+        recomputed).
+        """
+        with self._lock:
+            gen = int(self._meta("sync_gen") or 0) + 1
+            seen = changed = 0
+            batch = []
+            try:
+                for lead in leads:
+                    row = _row(lead)
+                    if row is None:
+                        continue
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        changed += self._merge(batch, gen)
+                        seen += len(batch)
+                        batch = []
+                if batch:
+                    changed += self._merge(batch, gen)
+                    seen += len(batch)
+                removed = self._sweep(gen, client_id)
+                self._set_meta("sync_gen", str(gen))
+                companies = self._rebuild()
+            except BaseException:
+                # An interrupted listing must not sweep the leads it never reached.
+                self._db.rollback()
+                raise
+            self._db.commit()
+        return {"seen": seen, "changed": changed, "removed": removed, "companies": companies}
+
+    def _merge(self, rows: List[tuple], gen: int) -> int:
+        """Stage a page, mark the groups it changes dirty, and upsert it. Returns the number of changed leads."""
+        db, scope = self._db, self.scope
+        db.execute("DELETE FROM incoming")
+        db.executemany("INSERT OR REPLACE INTO incoming VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        differs = """
+            l.client_id IS NOT i.client_id OR l.company_key IS NOT i.company_key
+            OR l.company_name IS NOT i.company_name OR l.domain IS NOT i.domain OR l.title IS NOT i.title
+            OR l.industry IS NOT i.industry OR l.created_at IS NOT i.created_at
+        """
+        # Groups a changed lead leaves, then groups new or changed leads join.
+        db.execute(f"""
+            INSERT OR IGNORE INTO dirty
+            SELECT ?, l.client_id, l.company_key FROM incoming i JOIN leads l ON l.scope = ? AND l.id = i.id
+            WHERE l.client_id IS NOT NULL AND l.company_key IS NOT NULL AND ({differs})
+        """, (scope, scope))
+        changed = db.execute(f"""
+            SELECT COUNT(*) FROM incoming i LEFT JOIN leads l ON l.scope = ? AND l.id = i.id
+            WHERE l.id IS NULL OR ({differs})
+        """, (scope,)).fetchone()[0]
+        db.execute(f"""
+            INSERT OR IGNORE INTO dirty
+            SELECT ?, i.client_id, i.company_key FROM incoming i LEFT JOIN leads l ON l.scope = ? AND l.id = i.id
+            WHERE i.client_id IS NOT NULL AND i.company_key IS NOT NULL AND (l.id IS NULL OR {differs})
+        """, (scope, scope))
+        db.execute("""
+            INSERT OR REPLACE INTO leads
+            SELECT ?, id, client_id, company_key, company_name, domain, title, industry, created_at, ?
+            FROM incoming
+        """, (scope, gen))
+        return changed
+
+    def _sweep(self, gen: int, client_id: str = None) -> int:
+        """Drop mirrored leads the current listing no longer returned."""
+        where = "scope = ? AND sync_gen < ?" + (" AND client_id = ?" if client_id else "")
+        params = (self.scope, gen) + ((client_id,) if client_id else ())
+        self._db.execute(f"""
+            INSERT OR IGNORE INTO dirty
+            SELECT scope, client_id, company_key FROM leads
+            WHERE {where} AND client_id IS NOT NULL AND company_key IS NOT NULL
+        """, params)
+        return self._db.execute(f"DELETE FROM leads WHERE {where}", params).rowcount
+
+    # ── Aggregation ─────────────────────────────────────────────────────────
+    def _aggregate(self, where: str, params: tuple, join_dirty: bool = False) -> List[Dict[str, Any]]:
+        """Rollups for the leads matching `where` (over alias l), grouped by client and company."""
+        source = "leads l"
+        if join_dirty:
+            source += (" JOIN dirty d ON d.scope = l.scope AND d.client_id = l.client_id"
+                       " AND d.company_key = l.company_key")
+        where = f"l.scope = ? AND l.client_id IS NOT NULL AND l.company_key IS NOT NULL AND {where}"
+        params = (self.scope,) + params
+        groups: Dict[tuple, Dict[str, Any]] = {}
+        for client_id, key, count, first, last, domain in self._db.execute(f"""
+            SELECT l.client_id, l.company_key, COUNT(*), MIN(l.created_at), MAX(l.created_at), MAX(l.domain)
+            FROM {source} WHERE {where} GROUP BY l.client_id, l.company_key
+        """, params):
+            groups[(client_id, key)] = {
+                "clientId": client_id, "companyKey": key, "companyName": None, "companyDomain": domain,
+                "leadCount": count, "titles": {}, "industries": {}, "names": {},
+                "firstLeadAt": first, "lastLeadAt": last,
+            }
+        # Value distributions for all groups in one pass.
+        for kind, column in (("titles", "title"), ("industries", "industry"), ("names", "company_name")):
+            for client_id, key, value, count in self._db.execute(f"""
+                SELECT l.client_id, l.company_key, l.{column}, COUNT(*) FROM {source}
+                WHERE {where} AND l.{column} IS NOT NULL GROUP BY l.client_id, l.company_key, l.{column}
+            """, params):
+                groups[(client_id, key)][kind][value] = count
+        rollups = []
+        for group in groups.values():
+            names = group.pop("names")
+            group["companyName"] = max(names, key=lambda n: (names[n], n)) if names else group["companyDomain"]
+            group["titles"] = _top(group["titles"])
+            group["industries"] = _top(group["industries"])
+            rollups.append(group)
+        return rollups
+
+    def _rebuild(self) -> int:
+        """Recompute the rollups of dirty groups. Returns the number of groups recomputed."""
+        db, scope = self._db, self.scope
+        dirty = set(db.execute("SELECT client_id, company_key FROM dirty WHERE scope = ?", (scope,)))
+        if not dirty:
+            return 0
+        rows = []
+        for r in self._aggregate("1", (), join_dirty=True):
+            values = (r["companyName"], r["companyDomain"], r["leadCount"], json.dumps(r["titles"]),
+                      json.dumps(r["industries"]), r["firstLeadAt"], r["lastLeadAt"])
+            digest = hashlib.sha1(json.dumps(values).encode("utf-8")).hexdigest()
+            rows.append((scope, r["clientId"], r["companyKey"]) + values + (digest,))
+        # Dirty groups with no leads left are companies that left the territory.
+        gone = dirty - {(r[1], r[2]) for r in rows}
+        db.executemany("DELETE FROM rollups WHERE scope = ? AND client_id = ? AND company_key = ?",
+                       [(scope,) + key for key in gone])
+        # pushed_digest survives the upsert so unchanged companies are not pushed again.
+        db.executemany("""
+            INSERT INTO rollups (scope, client_id, company_key, company_name, domain, lead_count, titles,
+                                 industries, first_lead_at, last_lead_at, digest)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (scope, client_id, company_key) DO UPDATE SET
+                company_name = excluded.company_name, domain = excluded.domain,
+                lead_count = excluded.lead_count, titles = excluded.titles,
+                industries = excluded.industries, first_lead_at = excluded.first_lead_at,
+                last_lead_at = excluded.last_lead_at, digest = excluded.digest
+        """, rows)
+        db.execute("DELETE FROM dirty WHERE scope = ?", (scope,))
+        return len(dirty)
+
+    def rebuild_all(self) -> int:
+        """Recompute every rollup from the mirror."""
+        with self._lock:
+            self._db.execute("""
+                INSERT OR IGNORE INTO dirty SELECT DISTINCT scope, client_id, company_key FROM leads
+                WHERE scope = ? AND client_id IS NOT NULL AND company_key IS NOT NULL
+            """, (self.scope,))
+            count = self._rebuild()
+            self._db.commit()
+        return count
+
+    # ── Queries ─────────────────────────────────────────────────────────────
+    def companies(self, client_id: str = None, industry: str = None, min_leads: int = None,
+                  max_leads: int = None, search: str = None, start_date: str = None, end_date: str = None,
+                  sort_by: str = "leadCount", sort_direction: str = "desc") -> List[Dict[str, Any]]:
+        """Company rollups across all clients (or one), filtered like the workbench list endpoint.
+
+        Without a date window the stored rollups are read; with start/end dates
+        (YYYY-MM-DD, inclusive, on createdAt) they are aggregated from the
+        mirror for that window.
+        """
+        with self._lock:
+            if start_date or end_date:
+                where, params = ["1"], []
+                if client_id:
+                    where.append("l.client_id = ?")
+                    params.append(client_id)
+                if start_date:
+                    where.append("substr(l.created_at, 1, 10) >= ?")
+                    params.append(start_date)
+                if end_date:
+                    where.append("substr(l.created_at, 1, 10) <= ?")
+                    params.append(end_date)
+                rollups = self._aggregate(" AND ".join(where), tuple(params))
+            else:
+                rollups = self._stored(client_id)
+        if industry:
+            wanted = industry.casefold()
+            rollups = [r for r in rollups if any(i.casefold() == wanted for i, _ in r["industries"])]
+        if min_leads is not None:
+            rollups = [r for r in rollups if r["leadCount"] >= min_leads]
+        if max_leads is not None:
+            rollups = [r for r in rollups if r["leadCount"] <= max_leads]
+        if search:
+            needle = search.casefold()
+            rollups = [r for r in rollups
+                       if needle in (r["companyName"] or "").casefold() or needle in (r["companyDomain"] or "")]
+        column = sort_by if sort_by in SORT_FIELDS else "leadCount"
+        blank = 0 if column == "leadCount" else ""
+        rollups.sort(key=lambda r: r[column] if r[column] is not None else blank, reverse=sort_direction != "asc")
+        return rollups
+
+    def _stored(self, client_id: str = None, pending: bool = False) -> List[Dict[str, Any]]:
+        where, params = "scope = ?", [self.scope]
+        if client_id:
+            where += " AND client_id = ?"
+            params.append(client_id)
+        if pending:
+            where += " AND digest IS NOT pushed_digest"
+        return [
+            {"clientId": c, "companyKey": k, "companyName": n, "companyDomain": d, "leadCount": count,
+             "titles": json.loads(t), "industries": json.loads(i), "firstLeadAt": first, "lastLeadAt": last,
+             "digest": digest}
+            for c, k, n, d, count, t, i, first, last, digest in self._db.execute(f"""
+                SELECT client_id, company_key, company_name, domain, lead_count, titles, industries,
+                       first_lead_at, last_lead_at, digest
+                FROM rollups WHERE {where}
+            """, params)
+        ]
+
+    def pending_push(self, client_id: str = None) -> List[Dict[str, Any]]:
+        """Rollups whose values changed since they were last pushed."""
+        with self._lock:
+            return self._stored(client_id, pending=True)
+
+    def mark_pushed(self, rollups: Iterable[Dict[str, Any]]):
+        with self._lock:
+            self._db.executemany(
+                "UPDATE rollups SET pushed_digest = ? WHERE scope = ? AND client_id = ? AND company_key = ?",
+                [(r["digest"], self.scope, r["clientId"], r["companyKey"]) for r in rollups],
+            )
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            leads, clients = self._db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT client_id) FROM leads WHERE scope = ?", (self.scope,)).fetchone()
+            companies, pending = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(digest IS NOT pushed_digest), 0) FROM rollups WHERE scope = ?",
+                (self.scope,)).fetchone()
+        return {"path": self.path, "leads": leads, "clients": clients, "companies": companies, "pending": pending}
+
+
+def push_payload(rollup: Dict[str, Any]) -> Dict[str, Any]:
+    """Body for POST /api/territory-workbench/companies."""
+    return {
+        "client_id": rollup["clientId"],
+        "companyName": rollup["companyName"],
+        "companyDomain": rollup["companyDomain"],
+        "leadCount": rollup["leadCount"],
+        "industry": rollup["industries"][0][0] if rollup["industries"] else None,
+        "industries": [i for i, _ in rollup["industries"]],
+        "titles": [t for t, _ in rollup["titles"]],
+        "firstLeadDate": rollup["firstLeadAt"],
+        "lastLeadDate": rollup["lastLeadAt"],
+    }
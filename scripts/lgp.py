@@ -1,61 +1,68 @@
 #!/usr/bin/env python3
 import argparse
 import base64
+import csv
+import hashlib
+import io
+import itertools
 import json
 import os
 import requests
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from getpass import getpass
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import lgp_cache
+import lgp_daemon
+import lgp_http
+import lgp_json
+import lgp_latency
+import lgp_scheduler
+from lgp_clients import ClientRegistry
 
 DEFAULT_BASE_URL = "https://last.leadgenius.app"
 AUTH_FILE = os.path.expanduser("~/.leadgenius_auth.json")
+LEAD_FORMATS = ("ndjson", "csv", "table", "json")
+LEAD_TABLE_FIELDS = ("id", "fullName", "email", "companyName", "status")
+LEAD_TABLE_WIDTHS = {"id": 36, "email": 32}  # other columns: 24 characters
 
 class LeadGeniusCLI:
-    def __init__(self, base_url=None):
+    def __init__(self, base_url=None, env=None, use_cache=True, auth_file=True):
+        env = os.environ if env is None else env
+        # The caller's environment: the process's own, a forwarding caller's
+        # (under `lgp serve`) or a tenant's (under `lgp fleet`). Read settings from here, not os.environ.
+        self.env = env
         self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
-        self.token, self.user_id = self._load_auth()
+        self.token, self.user_id = self._load_auth(env, auth_file)
+        # One session per CLI instance: keeps the TLS connection alive across
+        # calls (and across forwarded commands when running under `lgp serve`).
+        self.session = lgp_http.new_session()
+        self.cache = lgp_cache.ResponseCache() if use_cache and not env.get("LGP_NO_CACHE") else None
+        # Optional requests/min cap for this instance (per tenant under `lgp fleet`); with
+        # LGP_RATE_BUDGET, CLI calls are interactive work in the account's shared budget.
+        self.budget = lgp_scheduler.budget(self._cache_user(), env)
+        self.limiter = lgp_http.RateLimiter(float(env.get("LGP_RATE") or 0), priority="interactive",
+                                            budget=self.budget)
+        self._registry = None
+        self._pipeline = None
 
-    def _load_auth(self):
-        # 1. Prefer Environment Variable
-        api_key = os.environ.get("LGP_API_KEY")
-        user_id = os.environ.get("LGP_USER_ID")
-        
-        if api_key:
-            # Try to load user_id from file if not in env
-            if not user_id and os.path.exists(AUTH_FILE):
-                 try:
-                    with open(AUTH_FILE, "r") as f:
-                        data = json.load(f)
-                        user_id = data.get("user_id")
-                 except:
-                     pass
-            return api_key, user_id
-            
-        # 2. Check Auth File
-        if os.path.exists(AUTH_FILE):
-            try:
-                with open(AUTH_FILE, "r") as f:
-                    data = json.load(f)
-                    # Prefer API Key if stored
-                    token = data.get("api_key") or data.get("token")
-                    uid = data.get("user_id")
-                    return token, uid
-            except:
-                pass
-        return None, None
-
-    def _request(self, method, endpoint, data=None, params=None):
+    def _load_auth(self, env, auth_file=True):
+        # Environment variables first, then the auth file (shared with lgp_client);
+        # fleet tenants (auth_file=False) use only their own credentials.
+        import lgp_client
+        return lgp_client.load_credentials(env, auth_file=auth_file)
+
+    def _auth_headers(self):
         if not self.token:
             print("Error: Not authenticated. Set LGP_API_KEY or run 'lgp auth'.")
             sys.exit(1)
 
-        url = f"{self.base_url}/api/{endpoint.lstrip('/')}"
-        
         headers = { "Content-Type": "application/json" }
         
         # New Logic: Check for API Key format
-        if self.token and self.token.startswith("lgp_"):
+        if self.token.startswith("lgp_"):
             if not self.user_id:
                 print("Error: API Key requires user_id. Please re-authenticate or manually add 'user_id' to ~/.leadgenius_auth.json")
                 sys.exit(1)
@@ -64,6 +71,12 @@ class LeadGeniusCLI:
         else:
             # Fallback for JWT
             headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def _request(self, method, endpoint, data=None, params=None, use_cache=True):
+
+        url = f"{self.base_url}/api/{endpoint.lstrip('/')}"
+        headers = self._auth_headers()
 
         # If token is JWT (long), it might need different handling if backend strict about X-API-Key vs Bearer
         # Current backend implementation expects X-API-Key to be the API Key (lgp_...).
@@ -75,8 +88,24 @@ class LeadGeniusCLI:
         #
         # Exception: `generate-key` endpoint itself must be accessible via JWT.
         
+        # Read-mostly endpoints are served from the local response cache while
+        # fresh, and revalidated with the server's ETag/Last-Modified once stale.
+        cache_key = cached = None
+        if self.cache and use_cache and method == "GET" and self.cache.ttl_for(endpoint):
+            cache_key = self.cache.make_key(endpoint, params, f"{self.base_url}|{self._cache_user()}")
+            cached = self.cache.get(cache_key)
+            if cached and cached.fresh:
+                return lgp_json.loads(cached.body)
+            if cached:
+                headers.update(cached.validators())
+
         try:
-            response = requests.request(method, url, headers=headers, json=data, params=params)
+            self.limiter.acquire()
+            response = lgp_json.request_json(self.session, method, url, data, headers=headers, params=params,
+                                             priority="interactive")
+            if response.status_code == 304 and cached:
+                self.cache.refresh(cache_key, endpoint)
+                return lgp_json.loads(cached.body)
             if response.status_code == 401 or response.status_code == 403:
                 print(f"Auth Error ({response.status_code}): {response.text}")
                 print("Make sure LGP_API_KEY is set to a valid API Key.")
@@ -84,11 +113,24 @@ class LeadGeniusCLI:
             if response.status_code >= 400:
                 print(f"Error ({response.status_code}): {response.text}")
                 return None
-            return response.json()
+            result = lgp_json.response_json(response)
+            if cache_key:
+                self.cache.put(cache_key, endpoint, response.content,
+                               etag=response.headers.get("ETag"),
+                               last_modified=response.headers.get("Last-Modified"))
+            elif self.cache and method != "GET":
+                self.cache.invalidate_for_write(endpoint)
+            return result
         except Exception as e:
             print(f"Connection Error: {e}")
             return None
 
+    def _cache_user(self):
+        # Cache entries are per user; JWT-only sessions are keyed by a token digest.
+        if self.user_id:
+            return self.user_id
+        return hashlib.sha256((self.token or "").encode("utf-8")).hexdigest()[:16]
+
     def auth(self, email=None, password=None):
         email = email or input("Email: ")
         password = password or getpass("Password: ")
@@ -198,14 +240,129 @@ class LeadGeniusCLI:
         except Exception as e:
             print(f"Error: {e}")
 
+    # Clients
+    @property
+    def clients(self):
+        """Local client registry; lists clients from the API only when stale or on a miss."""
+        if self._registry is None:
+            self._registry = ClientRegistry(f"{self.base_url}|{self._cache_user()}", self._fetch_clients)
+        return self._registry
+
+    def _fetch_clients(self):
+        data = self._request("GET", "clients", use_cache=False)
+        if data is None:
+            raise Exception("could not list clients")
+        return data.get("clients", [])
+
+    def _client_slug(self, ref):
+        """Resolve a client name, slug or UUID to the slug used on leads. Prints and returns None on failure."""
+        try:
+            client = self.clients.resolve(ref)
+        except Exception as e:
+            print(f"Error: failed to resolve client '{ref}': {e}")
+            return None
+        if not client:
+            print(f"Error: no client matches '{ref}'. Run 'lgp clients list --refresh' to see available clients.")
+            return None
+        return client["client_id"]
+
+    def list_clients(self, refresh=False):
+        try:
+            clients = self.clients.refresh() if refresh else self.clients.all()
+        except Exception as e:
+            print(f"Error: {e}")
+            return
+        for c in clients:
+            print(f"{c.get('client_id', 'N/A'):<36} {c.get('id', 'N/A'):<38} {c.get('clientName', '')}")
+
+    def resolve_client(self, ref):
+        slug = self._client_slug(ref)
+        if slug:
+            client = self.clients.resolve(slug)
+            print(f"  Name: {client.get('clientName', 'N/A')}")
+            print(f"  Slug: {slug}    <- use this as client_id on leads")
+            print(f"  UUID: {client.get('id', 'N/A')}    <- client record only")
+
     # Leads
     def list_leads(self, limit=20):
         data = self._request("GET", "leads", params={"pageSize": limit})
         if data:
             print(json.dumps(data, indent=2))
 
-    def find_lead(self, first_name=None, last_name=None, full_name=None, email=None, company=None):
+    def stream_leads(self, client=None, fields=None, fmt="ndjson", limit=None, company_id=None):
+        """Print leads as they are paged in (ndjson, csv, table or a JSON array); memory stays flat.
+
+        With --fields, an API key and a company ID, pages come from the bulk
+        endpoint (5000 projected leads each); otherwise from GET /api/leads.
+        Each lead is decoded straight off the socket and printed at once.
+        """
+        import lgp_client
+
+        headers = self._auth_headers()
+        slug = self._client_slug(client) if client else None
+        if client and not slug:
+            return 1
+        if fmt == "table":
+            fields = fields or LEAD_TABLE_FIELDS
+        lg = lgp_client.LeadGeniusClient(self.token, self.user_id, base_url=self.base_url,
+                                         company_id=company_id if "x-api-key" in headers else None,
+                                         session=self.session)
+        lg.limiter = self.limiter  # this command's --rate and interactive budget
+        leads = lg.iter_leads(slug, fields=fields, prefetch=False)
+        if limit:
+            leads = itertools.islice(leads, limit)
+
+        def cell(value):
+            if isinstance(value, (dict, list)):
+                return lgp_json.dumps(value).decode("utf-8")
+            return "" if value is None else str(value)
+
+        count = 0
+        try:
+            writer = None
+            for lead in leads:
+                if fmt == "ndjson":
+                    sys.stdout.write(lgp_json.dumps(lead).decode("utf-8") + "\n")
+                elif fmt == "json":
+                    sys.stdout.write(("[\n  " if not count else ",\n  ") + lgp_json.dumps(lead).decode("utf-8"))
+                elif fmt == "csv":
+                    if writer is None:
+                        # Without --fields the first lead's keys are the columns.
+                        writer = csv.writer(sys.stdout)
+                        columns = list(fields or lead)
+                        writer.writerow(columns)
+                    writer.writerow([cell(lead.get(f)) for f in columns])
+                else:
+                    # Fixed column widths, so rows can be printed before the rest have arrived.
+                    widths = [LEAD_TABLE_WIDTHS.get(f, 24) for f in fields]
+                    if not count:
+                        print("  ".join(f"{f[:w]:<{w}}" for f, w in zip(fields, widths)).rstrip())
+                    print("  ".join(f"{cell(lead.get(f))[:w]:<{w}}" for f, w in zip(fields, widths)).rstrip())
+                count += 1
+                # First lead at once, then about a page at a time, so piped readers never wait on a full buffer.
+                if count == 1 or count % lgp_client.LEADS_PAGE_SIZE == 0:
+                    sys.stdout.flush()
+            if fmt == "json":
+                sys.stdout.write("\n]\n" if count else "[]\n")
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # The reader (head, jq ...) went away: stop quietly, and keep the exit-time flush from failing too.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            return 0
+        except lgp_client.LeadGeniusError as e:
+            sys.stdout.flush()
+            print(f"Error: listing stopped after {count} lead(s): {e}", file=sys.stderr)
+            return 1
+        if fmt == "table":
+            print(f"\n{count} lead(s)")
+        return 0
+
+    def find_lead(self, first_name=None, last_name=None, full_name=None, email=None, company=None, client=None):
         params = {"pageSize": 100}
+        if client:
+            params["client_id"] = self._client_slug(client)
+            if not params["client_id"]:
+                return
         if first_name:
             params["firstName"] = first_name
         if last_name:
@@ -240,6 +397,283 @@ class LeadGeniusCLI:
         if data:
             print(f"Enrichment triggered: Job ID {data.get('jobId')}")
 
+    def bulk_update_leads(self, changes, ids=None, ids_file=None, client=None, where=None, company_id=None,
+                          transport="rest", appsync_url=None, appsync_key=None, concurrency=8, rate=None,
+                          chunk_size=None, manifest=None, dry_run=False, workdir=None):
+        """Write the same `changes` to many leads (see lead_bulk.py).
+
+        The default manifest is written to `workdir` (the caller's directory
+        under `lgp serve`; the current one otherwise).
+        """
+        import lead_bulk
+        from import_csv import DEFAULT_RATE, iter_client_leads
+
+        try:
+            selector = lead_bulk.parse_selector(where)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        headers = self._auth_headers()
+        company_id = self._company_id(company_id)
+        if ids_file:
+            try:
+                targets = lead_bulk.load_ids(ids_file)
+            except OSError as e:
+                print(f"Error: cannot read {ids_file}: {e}")
+                return 1
+        elif client:
+            slug = self._client_slug(client)
+            if not slug:
+                return 1
+            bulk_headers = headers if company_id and "x-api-key" in headers else None
+            fields = ("id",) + tuple(dict.fromkeys(field for field, _, _ in selector))
+            try:
+                targets = [lead["id"] for lead in iter_client_leads(self.base_url, headers, slug, company_id,
+                                                                    bulk_headers, self.session, fields=fields)
+                           if lead.get("id") and lead_bulk.matches(lead, selector)]
+            except Exception as e:
+                print(f"Error: could not list leads for '{slug}': {e}")
+                return 1
+        else:
+            targets = list(dict.fromkeys(ids or []))
+
+        done = lead_bulk.manifest_done(manifest)
+        todo = [i for i in targets if i not in done]
+        if done:
+            print(f"Skipping {len(targets) - len(todo)} lead(s) already updated in {manifest}")
+        if dry_run or not todo:
+            print(f"{len(todo)} lead(s) to update with {json.dumps(changes)}" + (" (dry run)" if dry_run else ""))
+            for lead_id in todo[:10]:
+                print(f"  {lead_id}")
+            if len(todo) > 10:
+                print(f"  ... and {len(todo) - 10} more")
+            return None
+
+        if transport == "appsync":
+            appsync_key = appsync_key or self.env.get("LGP_APPSYNC_KEY")
+            if not appsync_key:
+                print("Error: --transport appsync needs --appsync-key or LGP_APPSYNC_KEY")
+                return 1
+            appsync_url = appsync_url or self.env.get("LGP_APPSYNC_URL") or lead_bulk.DEFAULT_APPSYNC_URL
+            send = lead_bulk.appsync_sender(self.session, appsync_url,
+                                            {"Content-Type": "application/json", "x-api-key": appsync_key})
+        else:
+            send = lead_bulk.rest_sender(self.session, self.base_url, headers)
+        initial, minimum, maximum = lead_bulk.CHUNK_LIMITS[transport]
+        tuner = lead_bulk.ChunkTuner(chunk_size or initial, minimum, maximum)
+        manifest = manifest or os.path.join(workdir or "", f"lgp-bulk-{datetime.now():%Y%m%d-%H%M%S}.csv")
+        writer = lead_bulk.Manifest(manifest)
+
+        shown = [0.0]
+
+        def progress(stats):
+            settled = stats["updated"] + stats["failed"]
+            if time.monotonic() - shown[0] >= 0.5 or settled == len(todo):
+                shown[0] = time.monotonic()
+                print(f"\r  {settled}/{len(todo)} ...", end="", file=sys.stderr, flush=True)
+
+        started = time.time()
+        try:
+            stats = lead_bulk.bulk_update(todo, changes, send, tuner, concurrency=concurrency,
+                                          rate_per_minute=DEFAULT_RATE if rate is None else rate,
+                                          manifest=writer, progress=progress, budget=self.budget)
+        finally:
+            writer.close()
+            if self.cache:
+                self.cache.invalidate_for_write("leads")
+        print(file=sys.stderr)
+        print(f"Updated {stats['updated']}/{len(todo)} lead(s) in {time.time() - started:.1f}s "
+              f"via {transport}: {stats['chunks']} chunk(s), chunk size {tuner.history[0]} -> {tuner.size}, "
+              f"{stats['retries']} split retr{'y' if stats['retries'] == 1 else 'ies'}")
+        if stats["failed"]:
+            print(f"  {stats['failed']} failed; re-run with --manifest {manifest} to retry only those")
+        print(f"Manifest: {manifest}")
+        return 1 if stats["failed"] else None
+
+    # Import
+    def import_hubspot(self, client, hubspot_token, hubspot_url=None, incremental=False,
+                       concurrency=None, rate=None, dry_run=False):
+        import hubspot_sync
+        from import_csv import DEFAULT_CONCURRENCY, DEFAULT_RATE
+
+        client_slug = self._client_slug(client)
+        if not client_slug:
+            return 1
+        hubspot = hubspot_sync.HubSpotClient(hubspot_token, base_url=hubspot_url or hubspot_sync.HUBSPOT_API)
+        result = hubspot_sync.sync(
+            hubspot, hubspot_token, self.base_url, self._auth_headers(), client_slug,
+            incremental=incremental,
+            concurrency=concurrency or DEFAULT_CONCURRENCY,
+            rate_per_minute=DEFAULT_RATE if rate is None else rate,
+            dry_run=dry_run,
+            budget=self.budget,
+        )
+        if self.cache:
+            self.cache.invalidate_for_write("leads")
+        return 1 if result["failed"] or result["missing"] else 0
+
+    # Emails
+    def verify_emails(self, input_path=None, client=None, company_id=None, output=None, update_leads=False,
+                      status_field="emailStatus", concurrency=8, rate=None, deep_probe=True, dns_check=True):
+        import lead_emails
+        from import_csv import DEFAULT_RATE, chunks, iter_client_leads
+        from lead_sources import iter_lead_batches
+
+        headers = self._auth_headers()
+        company_id = self._company_id(company_id)
+        ids_by_email = {}
+        if client:
+            slug = self._client_slug(client)
+            if not slug:
+                return 1
+            # The bulk listing needs an API key and company; otherwise GET /api/leads is paged.
+            bulk_headers = headers if company_id and "x-api-key" in headers else None
+
+            def source():
+                for lead in iter_client_leads(self.base_url, headers, slug, company_id, bulk_headers,
+                                              self.session, fields=("id", "email")):
+                    if lead.get("email"):
+                        if update_leads and lead.get("id"):
+                            ids_by_email.setdefault(lead_emails.normalize(lead["email"]), []).append(lead["id"])
+                        yield lead["email"]
+        else:
+            def source():
+                for batch in iter_lead_batches(input_path):
+                    for lead in batch:
+                        if lead.get("email"):
+                            yield lead["email"]
+
+        def call_api(email, deep):
+            endpoint = "email-verify" if deep else "email-validate"
+            response = lgp_json.post_json(self.session, f"{self.base_url}/api/{endpoint}", {"email": email},
+                                          headers=headers, priority="bulk")
+            if response.status_code >= 400:
+                raise Exception(f"HTTP {response.status_code}")
+            return lgp_json.response_json(response)
+
+        verifier = lead_emails.EmailVerifier(call_api, concurrency=concurrency,
+                                             rate_per_minute=DEFAULT_RATE if rate is None else rate,
+                                             deep_probe=deep_probe, dns_check=dns_check, budget=self.budget)
+        out = open(output, "w", newline="", encoding="utf-8") if output else None
+        writer = csv.writer(out) if out else None
+        if writer:
+            writer.writerow(["email", "status", "reason", "source"])
+        counts, updates = {}, []
+        started = time.time()
+        try:
+            for result in verifier.verify(source()):
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+                if writer:
+                    writer.writerow([result["email"], result["status"], result["reason"], result["source"]])
+                for lead_id in ids_by_email.get(result["email"], ()):
+                    updates.append({"id": lead_id, status_field: result["status"]})
+        except Exception as e:
+            print(f"Error: email verification failed: {e}")
+            return 1
+        finally:
+            if out:
+                out.close()
+
+        stats = verifier.stats
+        total = sum(counts.values())
+        if verifier.dns_unavailable:
+            print(f"Warning: DNS lookups fail here ({lead_emails.DNS_CANARY} does not resolve); domain checks were skipped")
+        print(f"Verified {total} addresses in {time.time() - started:.1f}s: "
+              + ", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+        print(f"  Settled locally: {stats['local']}, from cache: {stats['cache']}, by DNS: {stats['dns']}, "
+              f"by catch-all domain: {stats['domain']}")
+        print(f"  API calls: {stats['probe']} deep (email-verify), {stats['api']} email-validate, "
+              f"{stats['errors']} failed")
+        if output:
+            print(f"Results written to {output}")
+
+        failed = 0
+        for batch in chunks(updates, 50):
+            if self._request("PUT", "leads", data={"leads": batch}) is None:
+                failed += len(batch)
+        if updates:
+            print(f"Updated {status_field} on {len(updates) - failed}/{len(updates)} lead(s)")
+        return 1 if failed else None
+
+    # Webhooks
+    def serve_webhooks(self, client, company_id=None, host=None, port=None, secret=None, window=None,
+                       concurrency=4, rate=None):
+        import asyncio
+        import lgp_webhooks
+        from import_csv import DEFAULT_RATE, iter_client_leads, normalize_email
+
+        host = lgp_webhooks.DEFAULT_HOST if host is None else host
+        port = lgp_webhooks.DEFAULT_PORT if port is None else port
+        window = lgp_webhooks.COALESCE_WINDOW if window is None else window
+
+        slug = self._client_slug(client)
+        if not slug:
+            return 1
+        headers = self._auth_headers()
+
+        def lookup(email):
+            receiver.limiter.acquire()
+            query = {"client_id": slug, "email": email, "limit": 1}
+            response = self.session.get(f"{self.base_url}/api/leads", params=query, headers=headers, timeout=30)
+            if response.status_code >= 400:
+                raise Exception(f"HTTP {response.status_code}")
+            data = lgp_json.response_json(response)
+            found = data.get("data") or data.get("leads") or []
+            return next((l.get("id") for l in found if normalize_email(l.get("email")) == email), None)
+
+        def resolve_ids(emails):
+            with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+                return dict(zip(emails, pool.map(lookup, emails)))
+
+        def push(updates):
+            response = lgp_json.request_json(self.session, "PUT", f"{self.base_url}/api/leads",
+                                             {"leads": updates}, headers=headers, timeout=60)
+            if response.status_code >= 400:
+                raise Exception(f"HTTP {response.status_code}")
+            response.close()
+
+        queue = lgp_webhooks.EventQueue(f"{self.base_url}|{self._cache_user()}|{slug}")
+        # One listing pass up front instead of one lookup per email during a flood.
+        bulk_headers = headers if company_id and "x-api-key" in headers else None
+        try:
+            known = {normalize_email(lead["email"]): lead["id"]
+                     for lead in iter_client_leads(self.base_url, headers, slug, company_id, bulk_headers,
+                                                   self.session, fields=("id", "email"))
+                     if lead.get("email") and lead.get("id")}
+        except Exception as e:
+            print(f"Error: could not list leads for '{slug}': {e}")
+            return 1
+        queue.set_lead_ids(known)
+        receiver = lgp_webhooks.WebhookReceiver(queue, resolve_ids, push, secret=secret, window=window,
+                                                concurrency=concurrency,
+                                                rate_per_minute=DEFAULT_RATE if rate is None else rate,
+                                                budget=self.budget)
+
+        def ready(restored):
+            print(f"Loaded {len(known)} lead id(s) for '{slug}'")
+            print(f"Receiving webhooks for '{slug}' on http://{host}:{port}/hooks/<platform> "
+                  f"({', '.join(lgp_webhooks.PLATFORMS)})")
+            if restored:
+                print(f"Restored {restored} queued event(s) from {queue.path}")
+            if not secret and host not in ("127.0.0.1", "localhost", "::1"):
+                print("Warning: no --secret set; anyone who can reach this port can post events")
+            sys.stdout.flush()
+
+        try:
+            asyncio.run(receiver.serve(host, port, ready))
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            print(f"Error: cannot listen on {host}:{port}: {e}")
+            return 1
+        stats = receiver.stats
+        print(f"\nStopped: {stats['events']} event(s) in {stats['requests']} request(s) -> "
+              f"{stats['updates']} lead update(s) in {stats['batches']} batch(es); "
+              f"{stats['unmatched']} unmatched, {stats['failed_batches']} failed batch(es)")
+        if self.cache:
+            self.cache.invalidate_for_write("leads")
+        return None
+
     # Campaigns
     def list_campaigns(self):
         data = self._request("GET", "campaigns")
@@ -254,13 +688,146 @@ class LeadGeniusCLI:
             print(f"Campaign created: {data.get('id')}")
 
     # Analytics
-    def show_pipeline(self, start_date=None, end_date=None):
-        params = {"startDate": start_date, "endDate": end_date}
-        data = self._request("GET", "analytics/pipeline", params=params)
+    @property
+    def pipeline(self):
+        """Local cube of daily pipeline rollups; ranges are merged from cached days."""
+        if self._pipeline is None:
+            import lgp_pipeline
+            self._pipeline = lgp_pipeline.PipelineCube(f"{self.base_url}|{self._cache_user()}", self._fetch_pipeline_day)
+        return self._pipeline
+
+    def _fetch_pipeline_day(self, day, client_id=None):
+        params = {"startDate": day, "endDate": day}
+        if client_id:
+            params["client_id"] = client_id
+        data = self._request("GET", "analytics/pipeline", params=params, use_cache=False)
+        if data is None:
+            raise Exception("request failed")
+        return data
+
+    def show_pipeline(self, start_date=None, end_date=None, client=None, refresh=False, cube=False):
+        client_id = self._client_slug(client) if client else None
+        if client and not client_id:
+            return 1
+        if not cube or not self.cache:
+            # One call for the whole range, as the API computes it (held by the response cache).
+            params = {"startDate": start_date, "endDate": end_date}
+            if client_id:
+                params["client_id"] = client_id
+            data = self._request("GET", "analytics/pipeline", params=params, use_cache=not refresh)
+        else:
+            # --cube: summed daily rollups; exact only for metrics that are per-day counts.
+            try:
+                data, stats = self.pipeline.query(start_date, end_date, client_id=client_id, refresh=refresh)
+            except ValueError as e:
+                print(f"Error: {e}")
+                return 1
+            except Exception as e:
+                print(f"Error: pipeline metrics unavailable: {e}")
+                return 1
+            print(f"({stats['days']} days: {stats['cached']} cached, {stats['fetched']} fetched)", file=sys.stderr)
         if data:
             print("--- Pipeline Metrics ---")
             print(json.dumps(data, indent=2))
 
+    def _company_id(self, company_id):
+        """--company-id, else the caller's LGP_COMPANY_ID (the forwarding caller's or the fleet tenant's)."""
+        return company_id or self.env.get("LGP_COMPANY_ID")
+
+    # Territory (local rollups over mirrored leads; see lead_territory.py)
+    def _territory(self, company_id):
+        import lead_territory
+        company_id = self._company_id(company_id)
+        if not company_id:
+            print("Error: Company ID required. Use --company-id or set LGP_COMPANY_ID.")
+            return None
+        return lead_territory.TerritoryMirror(f"{self.base_url}|{self._cache_user()}|{company_id}")
+
+    def territory_sync(self, company_id, client=None):
+        import lead_territory
+        company_id = self._company_id(company_id)
+        mirror = self._territory(company_id)
+        slug = self._client_slug(client) if client else None
+        if mirror is None or (client and not slug):
+            return 1
+        started = time.time()
+        leads = lead_territory.iter_bulk_leads(self.session, self.base_url, self._auth_headers(), company_id, slug)
+        try:
+            result = mirror.sync(leads, client_id=slug)
+        except Exception as e:
+            print(f"Error: territory sync failed: {e}")
+            return 1
+        print(f"Synced {result['seen']} leads in {time.time() - started:.1f}s: {result['changed']} changed, "
+              f"{result['removed']} removed, {result['companies']} companies re-aggregated")
+        stats = mirror.stats()
+        print(f"Mirror: {stats['leads']} leads, {stats['clients']} clients, {stats['companies']} companies "
+              f"({stats['pending']} not pushed)")
+
+    def territory_companies(self, company_id, client=None, industry=None, min_leads=None, max_leads=None,
+                            search=None, start_date=None, end_date=None, sort_by="leadCount",
+                            sort_direction="desc", fmt="table", output=None, limit=None):
+        mirror = self._territory(company_id)
+        slug = self._client_slug(client) if client else None
+        if mirror is None or (client and not slug):
+            return 1
+        rows = mirror.companies(client_id=slug, industry=industry, min_leads=min_leads, max_leads=max_leads,
+                                search=search, start_date=start_date, end_date=end_date,
+                                sort_by=sort_by, sort_direction=sort_direction)
+        if limit:
+            rows = rows[:limit]
+
+        def counts(values):
+            return "; ".join(f"{v} ({n})" for v, n in values)
+
+        out = open(output, "w", newline="", encoding="utf-8") if output else sys.stdout
+        try:
+            if fmt == "csv":
+                writer = csv.writer(out)
+                writer.writerow(["clientId", "companyName", "companyDomain", "leadCount",
+                                 "firstLeadAt", "lastLeadAt", "titles", "industries"])
+                for r in rows:
+                    writer.writerow([r["clientId"], r["companyName"], r["companyDomain"] or "", r["leadCount"],
+                                     r["firstLeadAt"] or "", r["lastLeadAt"] or "",
+                                     counts(r["titles"]), counts(r["industries"])])
+            else:
+                print(f"{'Client':<24} {'Company':<30} {'Domain':<26} {'Leads':>6}  {'Last lead':<10}  Top titles",
+                      file=out)
+                for r in rows:
+                    print(f"{r['clientId'][:24]:<24} {(r['companyName'] or '')[:30]:<30} "
+                          f"{(r['companyDomain'] or '')[:26]:<26} {r['leadCount']:>6}  "
+                          f"{(r['lastLeadAt'] or '')[:10]:<10}  {counts(r['titles'][:3])}", file=out)
+        finally:
+            if output:
+                out.close()
+        if output:
+            print(f"Wrote {len(rows)} companies to {output}")
+
+    def territory_push(self, company_id, client=None, concurrency=8, dry_run=False):
+        import lead_territory
+        mirror = self._territory(company_id)
+        slug = self._client_slug(client) if client else None
+        if mirror is None or (client and not slug):
+            return 1
+        pending = mirror.pending_push(slug)
+        if dry_run:
+            print(f"{len(pending)} companies changed since the last push (dry run, nothing sent)")
+            for r in pending[:5]:
+                print(json.dumps(lead_territory.push_payload(r)))
+            return
+        if not pending:
+            print("No territory changes to push.")
+            return
+
+        def push(rollup):
+            data = self._request("POST", "territory-workbench/companies", data=lead_territory.push_payload(rollup))
+            return rollup if data is not None else None
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            pushed = [r for r in pool.map(push, pending) if r is not None]
+        mirror.mark_pushed(pushed)
+        print(f"Pushed {len(pushed)}/{len(pending)} changed companies")
+        return 1 if len(pushed) < len(pending) else None
+
     # Maintenance
     def list_bugs(self):
         data = self._request("GET", "maintenance/bugs")
@@ -319,9 +886,53 @@ class LeadGeniusCLI:
         except Exception as e:
             print(f"Error: {e}")
 
-def main():
+    # Local cache
+    def cache_stats(self):
+        if not self.cache:
+            print("Response cache is disabled.")
+            return
+        stats = self.cache.stats()
+        print(f"Cache: {stats['path']} (max {stats['max_bytes'] // (1024 * 1024)} MB)")
+        if not stats["endpoints"]:
+            print("  (empty)")
+        for endpoint, s in sorted(stats["endpoints"].items()):
+            print(f"  {endpoint:<28} {s['entries']:>4} entries  {s['fresh']:>4} fresh  {s['bytes']:>9} bytes")
+
+    def cache_clear(self):
+        if not self.cache:
+            print("Response cache is disabled.")
+            return
+        print(f"Cleared {self.cache.clear()} cached response(s) and {self.pipeline.clear()} pipeline day(s).")
+
+def add_bulk_arguments(parser, env):
+    """Target and transport options shared by the bulk update commands."""
+    parser.add_argument("--ids-file", help="Lead ids: CSV with an id column, or one id per line")
+    parser.add_argument("--where", action="append", metavar="FIELD=VALUE",
+                        help="With --client: only leads matching (FIELD=a,b or FIELD!=a; repeatable)")
+    parser.add_argument("--company-id", default=env.get("LGP_COMPANY_ID"),
+                        help="Company ID for bulk listing of --client leads (default: $LGP_COMPANY_ID)")
+    parser.add_argument("--transport", choices=["rest", "appsync"], default="rest",
+                        help="Batch PUT /api/leads or aliased AppSync mutations (default: rest)")
+    parser.add_argument("--appsync-url", help="AppSync GraphQL URL (default: $LGP_APPSYNC_URL or the production API)")
+    parser.add_argument("--appsync-key", help="AppSync API key (default: $LGP_APPSYNC_KEY)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Chunks in flight (default: 8)")
+    parser.add_argument("--rate", type=float, help="Max API requests/min, 0 = unlimited (default: 400)")
+    parser.add_argument("--chunk-size", type=int, help="Initial leads per request; adapted while running")
+    parser.add_argument("--manifest", help="Result CSV (id,status,error); an existing one skips leads already updated")
+    parser.add_argument("--dry-run", action="store_true", help="List the target leads without updating them")
+
+def build_parser(env=None):
+    """The lgp argument parser; option defaults such as --company-id come from `env` (default: os.environ)."""
+    import lgp_fleet
+    import lgp_profile
+
+    env = os.environ if env is None else env
     parser = argparse.ArgumentParser(description="LeadGenius Pro Agent CLI")
     parser.add_argument("--base-url", help="Override base URL")
+    parser.add_argument("--no-daemon", action="store_true", help="Run in-process even if an lgp daemon is running")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the local response cache")
+    parser.set_defaults(workdir=None)
+    lgp_profile.add_profile_argument(parser)
     subparsers = parser.add_subparsers(dest="command", help="Commands")
 
     # Auth
@@ -335,23 +946,110 @@ def main():
 
     # Leads
     leads_parser = subparsers.add_parser("leads", help="Manage leads")
-    leads_parser.add_argument("action", choices=["list", "find", "enrich"])
-    leads_parser.add_argument("--ids", nargs="+", help="Lead IDs for enrichment")
+    leads_parser.add_argument("action", choices=["list", "find", "enrich", "set-status"])
+    leads_parser.add_argument("--ids", nargs="+", help="Lead IDs for enrichment or set-status")
+    leads_parser.add_argument("--status", help="New lead status (for set-status)")
     leads_parser.add_argument("--first-name", help="First name filter (for find)")
     leads_parser.add_argument("--last-name", help="Last name filter (for find)")
     leads_parser.add_argument("--full-name", help="Full name search (for find)")
     leads_parser.add_argument("--email", help="Email filter (for find)")
     leads_parser.add_argument("--company", help="Company name filter (for find)")
+    leads_parser.add_argument("--client", help="Client name, slug or UUID (resolved via the local client registry)")
+    leads_parser.add_argument("--all", action="store_true", help="List: stream every lead, page after page")
+    leads_parser.add_argument("--fields", help="List: comma-separated lead fields to output (e.g. id,email,status)")
+    leads_parser.add_argument("--format", choices=LEAD_FORMATS,
+                              help="List: output format (default: ndjson when streaming; table shows "
+                                   f"{','.join(LEAD_TABLE_FIELDS)} unless --fields is given)")
+    leads_parser.add_argument("--limit", type=int, help="List: stop after N leads (default: 20 without --all)")
+    add_bulk_arguments(leads_parser, env)
+
+    # Clients
+    clients_parser = subparsers.add_parser("clients", help="Client registry")
+    clients_parser.add_argument("action", choices=["list", "resolve"])
+    clients_parser.add_argument("ref", nargs="?", help="Client name, slug or UUID (for resolve)")
+    clients_parser.add_argument("--refresh", action="store_true", help="Re-download the client list")
+
+    # Import
+    import_parser = subparsers.add_parser("import", help="Import leads from external sources")
+    import_parser.add_argument("source", choices=["hubspot"])
+    import_parser.add_argument("--client", required=True, help="Target client name, slug or UUID")
+    import_parser.add_argument("--hubspot-token", help="HubSpot private app token (default: $HUBSPOT_ACCESS_TOKEN)")
+    import_parser.add_argument("--hubspot-url", help="HubSpot API base URL (default: $HUBSPOT_API_URL or https://api.hubapi.com)")
+    import_parser.add_argument("--incremental", action="store_true", help="Only contacts modified since the last successful sync")
+    import_parser.add_argument("--concurrency", type=int, help="Lead POSTs in flight (default: 8)")
+    import_parser.add_argument("--rate", type=float, help="Max LeadGenius requests/min (default: 400)")
+    import_parser.add_argument("--dry-run", action="store_true", help="Map contacts but don't import")
+
+    # Emails
+    emails_parser = subparsers.add_parser("emails", help="Bulk email verification")
+    emails_parser.add_argument("action", choices=["verify"])
+    emails_source = emails_parser.add_mutually_exclusive_group(required=True)
+    emails_source.add_argument("--input", help="Lead file (.csv, .parquet, .arrow, .ndjson; see import_csv.py)")
+    emails_source.add_argument("--client", help="Verify the leads stored for this client (name, slug or UUID)")
+    emails_parser.add_argument("--company-id", default=env.get("LGP_COMPANY_ID"),
+                               help="Company ID for bulk listing of --client leads (default: $LGP_COMPANY_ID)")
+    emails_parser.add_argument("--output", help="Write email,status,reason,source rows to this CSV")
+    emails_parser.add_argument("--update-leads", action="store_true", help="Write each status back to the --client leads")
+    emails_parser.add_argument("--status-field", default="emailStatus", help="Lead field for --update-leads (default: emailStatus)")
+    emails_parser.add_argument("--concurrency", type=int, default=8, help="API checks in flight (default: 8)")
+    emails_parser.add_argument("--rate", type=float, help="Max API requests/min, 0 = unlimited (default: 400)")
+    emails_parser.add_argument("--no-probe", action="store_true", help="Skip the per-domain deep catch-all probe")
+    emails_parser.add_argument("--no-dns", action="store_true", help="Skip the per-domain DNS check")
+
+    # Webhooks
+    hooks_parser = subparsers.add_parser("webhooks", help="Receive outreach platform webhooks locally")
+    hooks_parser.add_argument("action", choices=["serve"])
+    hooks_parser.add_argument("--client", required=True, help="Client whose leads the events update (name, slug or UUID)")
+    hooks_parser.add_argument("--company-id", default=env.get("LGP_COMPANY_ID"),
+                              help="Company ID for bulk listing of the client's lead ids (default: $LGP_COMPANY_ID)")
+    hooks_parser.add_argument("--host", help="Listen address (default: 127.0.0.1)")
+    hooks_parser.add_argument("--port", type=int, help="Listen port (default: 8787)")
+    hooks_parser.add_argument("--secret", default=env.get("LGP_WEBHOOK_SECRET"),
+                              help="Require ?secret= or X-Webhook-Secret (default: $LGP_WEBHOOK_SECRET)")
+    hooks_parser.add_argument("--window", type=float,
+                              help="Seconds to coalesce a lead's events before updating it (default: 5)")
+    hooks_parser.add_argument("--concurrency", type=int, default=4, help="Update batches in flight (default: 4)")
+    hooks_parser.add_argument("--rate", type=float, help="Max API requests/min, 0 = unlimited (default: 400)")
 
     # Campaigns
     camp_parser = subparsers.add_parser("campaigns", help="Manage campaigns")
-    camp_parser.add_argument("action", choices=["list", "create"])
+    camp_parser.add_argument("action", choices=["list", "create", "assign"])
     camp_parser.add_argument("--name", help="Campaign name")
+    camp_parser.add_argument("--campaign-id", help="Campaign to attach the leads to (for assign)")
+    camp_parser.add_argument("--client", help="Assign this client's leads (name, slug or UUID; narrow with --where)")
+    add_bulk_arguments(camp_parser, env)
 
     # Analytics
     pipeline_parser = subparsers.add_parser("pipeline", help="Show pipeline analytics")
     pipeline_parser.add_argument("--start", help="Start date (YYYY-MM-DD)")
     pipeline_parser.add_argument("--end", help="End date (YYYY-MM-DD)")
+    pipeline_parser.add_argument("--client", help="Client name, slug or UUID (default: all clients)")
+    pipeline_parser.add_argument("--cube", action="store_true",
+                                 help="Sum cached daily rollups instead of asking for the range; "
+                                      "only for additive counts (see SKILL.md)")
+    pipeline_parser.add_argument("--refresh", action="store_true",
+                                 help="Bypass cached metrics (with --cube: re-fetch every day of the range)")
+
+    # Territory
+    territory_parser = subparsers.add_parser("territory", help="Territory rollups computed locally from mirrored leads")
+    territory_parser.add_argument("action", choices=["sync", "companies", "push"])
+    territory_parser.add_argument("--company-id", default=env.get("LGP_COMPANY_ID"),
+                                  help="Company ID (tenant) to mirror (default: $LGP_COMPANY_ID)")
+    territory_parser.add_argument("--client", help="Limit to one client (name, slug or UUID)")
+    territory_parser.add_argument("--industry", help="Companies with this industry among their leads")
+    territory_parser.add_argument("--min-leads", type=int, help="Minimum leads per company")
+    territory_parser.add_argument("--max-leads", type=int, help="Maximum leads per company")
+    territory_parser.add_argument("--search", help="Substring of the company name or domain")
+    territory_parser.add_argument("--start", help="Only leads created on/after this date (YYYY-MM-DD)")
+    territory_parser.add_argument("--end", help="Only leads created on/before this date (YYYY-MM-DD)")
+    territory_parser.add_argument("--sort-by", default="leadCount",
+                                  choices=["leadCount", "companyName", "firstLeadAt", "lastLeadAt"])
+    territory_parser.add_argument("--sort-direction", default="desc", choices=["asc", "desc"])
+    territory_parser.add_argument("--limit", type=int, help="Show at most N companies")
+    territory_parser.add_argument("--format", default="table", choices=["table", "csv"], help="Output format (companies)")
+    territory_parser.add_argument("--output", help="Write companies to this file instead of stdout")
+    territory_parser.add_argument("--concurrency", type=int, default=8, help="POSTs in flight (push)")
+    territory_parser.add_argument("--dry-run", action="store_true", help="Show what push would send")
 
     # Maintenance
     maint_parser = subparsers.add_parser("maintenance", help="Maintenance bugs/enhancements")
@@ -373,19 +1071,291 @@ def main():
     admin_parser = subparsers.add_parser("admin", help="Admin functions")
     admin_parser.add_argument("resource", choices=["companies", "users"])
 
-    args = parser.parse_args()
-    cli = LeadGeniusCLI(base_url=args.base_url)
+    # Cache
+    cache_parser = subparsers.add_parser("cache", help="Inspect or clear the local response cache")
+    cache_parser.add_argument("action", choices=["stats", "clear"])
+
+    # Fleet
+    fleet_parser = subparsers.add_parser("fleet", help="Run a command across many tenants concurrently",
+                                         epilog="run: lgp fleet run --tenants tenants.yaml -- <lgp command and options>")
+    fleet_parser.add_argument("action", choices=["run", "distribution"])
+    fleet_parser.add_argument("--tenants", required=True, help="Tenants file (YAML, JSON or CSV) with per-tenant credentials")
+    fleet_parser.add_argument("--only", nargs="+", metavar="TENANT", help="Run only these tenants")
+    fleet_parser.add_argument("--concurrency", type=int, default=lgp_fleet.DEFAULT_CONCURRENCY,
+                              help=f"Tenants running at once (default: {lgp_fleet.DEFAULT_CONCURRENCY})")
+    fleet_parser.add_argument("--rate", type=float,
+                              help="API requests/min per tenant without its own 'rate' (default: unlimited)")
+    fleet_parser.add_argument("--merge", choices=lgp_fleet.MERGE_FORMATS, default="text",
+                              help="How tenant outputs are combined (default: text sections)")
+    fleet_parser.add_argument("--output-dir", help="Also write each tenant's output to <dir>/<tenant>.out")
+    fleet_parser.set_defaults(fleet_argv=[])
+
+    # Daemon
+    serve_parser = subparsers.add_parser("serve", help="Run a background daemon that keeps connections and auth warm")
+    serve_parser.add_argument("--socket", help=f"Unix socket path (default: $LGP_DAEMON_SOCKET or {lgp_daemon.DEFAULT_SOCKET})")
+    serve_parser.add_argument("--detach", action="store_true", help="Fork into the background")
+    serve_parser.add_argument("--idle-timeout", type=float, default=0, help="Exit after N idle seconds (default: never)")
+    serve_parser.add_argument("--status", action="store_true", help="Show status of the running daemon")
+    serve_parser.add_argument("--stop", action="store_true", help="Stop the running daemon")
+
+    return parser
+
+# Commands that prompt, write the auth file, manage the daemon itself, or run a
+# long-lived server always run in-process.
+LOCAL_ONLY_COMMANDS = {None, "auth", "generate-key", "serve", "import", "webhooks", "fleet"}
+
+# File options of forwarded commands; relative ones are resolved against the caller's directory.
+PATH_ARGUMENTS = ("ids_file", "manifest", "input", "output")
+
+# Warm CLI instances kept by the daemon, keyed by everything that affects auth
+# and by the caller's LGP_* environment (cli.env).
+_cli_pool = {}
+
+def _pooled_cli(base_url, env, use_cache=True):
+    try:
+        auth_mtime = os.path.getmtime(AUTH_FILE)
+    except OSError:
+        auth_mtime = None
+    key = (base_url, tuple(sorted(env.items())), auth_mtime, use_cache)
+    cli = _cli_pool.get(key)
+    if cli is None:
+        cli = _cli_pool[key] = LeadGeniusCLI(base_url=base_url, env=env, use_cache=use_cache)
+    return cli
+
+def run_forwarded(argv, env, cwd=None):
+    """Entry point for commands forwarded to `lgp serve`.
+
+    Runs as if in the caller's process: option defaults come from the caller's
+    environment `env`, and relative file options and default output files
+    resolve against the caller's directory `cwd`.
+    """
+    parser = build_parser(env)
+    args = parser.parse_args(argv)
+    if args.command in LOCAL_ONLY_COMMANDS:
+        print(f"Error: '{args.command}' cannot run through the daemon")
+        return 2
+    if cwd:
+        args.workdir = cwd
+        for name in PATH_ARGUMENTS:
+            if getattr(args, name, None):
+                setattr(args, name, os.path.join(cwd, getattr(args, name)))
+    return run_command(_pooled_cli(args.base_url, env, use_cache=not args.no_cache), args, parser)
+
+def serve(args):
+    path = args.socket or lgp_daemon.socket_path()
+    if args.status:
+        status = lgp_daemon.ping(path)
+        if status is None:
+            print(f"No lgp daemon running on {path}")
+            return 1
+        print(f"lgp daemon running on {path}: pid {status['pid']}, "
+              f"up {status['uptime']}s, {status['served']} command(s) served, {status.get('in_flight', 0)} running")
+        for scope, budget in (status.get("rate_budget") or {}).items():
+            print(f"Rate budget {scope} ({budget['per_minute']:g}/min, {budget['tokens']:g} tokens):")
+            for cls, stats in budget["classes"].items():
+                print(f"  {cls:<12} waiting {stats['waiting']:>4}  granted {stats['granted']:>7}  "
+                      f"avg wait {stats['avg_wait']:.2f}s  max wait {stats['max_wait']:.2f}s")
+        latency = status.get("latency") or {}
+        for host, breaker in latency.get("breakers", {}).items():
+            detail = f" ({breaker['reason']}, retry in {breaker['reopens_in']:g}s)" if breaker["reason"] else ""
+            print(f"Circuit {host}: {breaker['state']}{detail}, {breaker['trips']} trip(s), "
+                  f"{breaker['refused']} refused")
+        for endpoint, stats in latency.get("endpoints", {}).items():
+            print(f"  {endpoint}: {stats['requests']} req  p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  "
+                  f"p99 {stats['p99_ms']} ms  {stats['timeouts']} timeout(s)  "
+                  f"{stats['hedged']} hedged ({stats['hedge_wins']} won)")
+        return 0
+    if args.stop:
+        if lgp_daemon.shutdown(path) is None:
+            print(f"No lgp daemon running on {path}")
+            return 1
+        print("lgp daemon stopped")
+        return 0
+    return lgp_daemon.serve(run_forwarded, path=path, idle_timeout=args.idle_timeout, detach=args.detach)
+
+def forwardable(argv):
+    """Whether argv may run on the daemon, judged from argv alone.
+
+    Deciding before the parser is built keeps a forwarded call from importing
+    the feature modules the daemon already holds. Anything not clearly
+    forwardable (help, --no-daemon, --profile, an unknown option) runs here.
+    """
+    args = iter(argv)
+    for arg in args:
+        if arg == "--base-url":
+            next(args, None)
+        elif arg.startswith("--base-url=") or arg == "--no-cache":
+            continue
+        elif arg.startswith("-"):
+            return False
+        else:
+            command, rest = arg, list(args)
+            break
+    else:
+        return False
+    if command in LOCAL_ONLY_COMMANDS:
+        return False
+    # Streamed listings print as they go; the daemon would hold the whole output until the end.
+    return not (command == "leads" and "list" in rest and "--all" in rest)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not os.environ.get("LGP_NO_DAEMON") and forwardable(argv):
+        exit_code = lgp_daemon.forward(argv)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    parser = build_parser()
+    # `lgp fleet run ... -- COMMAND`: the per-tenant command follows the first --.
+    fleet_argv = []
+    if "--" in argv and "fleet" in argv[:argv.index("--")]:
+        argv, fleet_argv = argv[:argv.index("--")], argv[argv.index("--") + 1:]
+    args = parser.parse_args(argv)
+    if fleet_argv:
+        args.fleet_argv = fleet_argv
+
+    if args.command == "serve":
+        sys.exit(serve(args))
 
+    # A profiled command runs in-process: the daemon's time isn't this process's.
+    import lgp_profile
+    lgp_profile.start(args.profile, "lgp")
+    if args.command == "fleet":
+        sys.exit(run_fleet(args))
+
+    cli = LeadGeniusCLI(base_url=args.base_url, use_cache=not args.no_cache)
+    exit_code = run_command(cli, args, parser)
+    if os.environ.get("LGP_TRANSFER_STATS"):
+        print(f"Transfer: {lgp_http.TRANSFER.summary()}", file=sys.stderr)
+    if os.environ.get("LGP_SCHEDULER_STATS"):
+        print(f"Rate budget: {lgp_scheduler.summary()}", file=sys.stderr)
+    if os.environ.get("LGP_LATENCY_STATS"):
+        print(f"Latency: {lgp_latency.summary()}", file=sys.stderr)
+    if exit_code:
+        sys.exit(exit_code)
+
+def _distribution_report(results, fmt):
+    rows = [(r["tenant"], name, cid, count) for r in results if r["value"] for name, cid, count in r["value"]["rows"]]
+    if fmt == "json":
+        return json.dumps({r["tenant"]: r["value"] for r in results if r["value"]}, indent=2) + "\n"
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(["tenant", "clientName", "client_id", "leads"])
+        writer.writerows(rows)
+        return out.getvalue()
+    lines = [f"{'Tenant':<20} | {'Client Name':<40} | {'Client ID':<30} | Leads", "-" * 104]
+    lines += [f"{tenant:<20} | {name or '':<40} | {cid or '':<30} | {count}" for tenant, name, cid, count in rows]
+    totals = ", ".join(f"{r['tenant']} {r['value']['total']}" for r in results if r["value"])
+    grand = sum(r["value"]["total"] for r in results if r["value"])
+    return "\n".join(lines) + f"\n\nTotal leads: {grand} ({totals})\n"
+
+def run_fleet(args):
+    import lead_distribution
+    import lgp_fleet
+
+    try:
+        required = lgp_fleet.DISTRIBUTION_FIELDS if args.action == "distribution" else lgp_fleet.API_FIELDS
+        tenants = lgp_fleet.select(lgp_fleet.load_tenants(args.tenants, required), args.only)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        return 1
+    if args.rate is not None:
+        for tenant in tenants:
+            tenant.setdefault("rate", str(args.rate))
+
+    if args.action == "run":
+        argv = args.fleet_argv
+        if not argv:
+            print("Error: give the command to run after --, e.g. lgp fleet run --tenants t.yaml -- pipeline")
+            return 1
+        inner = build_parser().parse_args(argv)
+        if inner.command in LOCAL_ONLY_COMMANDS:
+            print(f"Error: '{inner.command}' cannot run across a fleet")
+            return 2
+
+        def job(tenant):
+            # A CLI per tenant: its own credentials, session, cache scope, registry and limiter.
+            # The command is parsed again against the tenant's environment, so defaults such as
+            # --company-id are the tenant's own and never the parent's.
+            env = lgp_fleet.tenant_env(tenant)
+            tenant_parser = build_parser(env)
+            tenant_args = tenant_parser.parse_args(argv)
+            cli = LeadGeniusCLI(base_url=tenant_args.base_url or tenant.get("base_url") or args.base_url,
+                                env=env, use_cache=not (args.no_cache or tenant_args.no_cache), auth_file=False)
+            return run_command(cli, tenant_args, tenant_parser)
+
+        def merge(results):
+            return lgp_fleet.merge_outputs(results, args.merge)
+    else:
+        def job(tenant):
+            return lead_distribution.lead_distribution(tenant.get("appsync_url") or lead_distribution.DEFAULT_URL,
+                                                       tenant["appsync_key"], tenant["company_id"])
+
+        def merge(results):
+            return _distribution_report(results, args.merge)
+
+    def progress(result):
+        status = "ok" if result["exit_code"] == 0 else f"exit {result['exit_code']}"
+        detail = (result["stderr"] or result["stdout"]).strip().splitlines()[-1:] if result["exit_code"] else []
+        print(f"  {result['tenant']}: {status} ({result['seconds']:.1f}s){' ' + detail[0] if detail else ''}",
+              file=sys.stderr)
+
+    started = time.time()
+    print(f"Running {args.action} across {len(tenants)} tenant(s), {args.concurrency} at a time", file=sys.stderr)
+    results = lgp_fleet.run_fleet(tenants, job, args.concurrency, progress)
+    if args.output_dir:
+        lgp_fleet.write_outputs(results, args.output_dir)
+    try:
+        print(merge(results), end="")
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    print(lgp_fleet.summary(results, time.time() - started), file=sys.stderr)
+    return 1 if any(r["exit_code"] for r in results) else 0
+
+def run_bulk_update(cli, args, changes, ids=None):
+    sources = [s for s in (ids, args.ids_file, args.client) if s]
+    if len(sources) != 1:
+        print("Error: give exactly one of --ids-file or --client" + (" or --ids" if ids is not None else ""))
+        return 1
+    if args.where and not args.client:
+        print("Error: --where needs --client")
+        return 1
+    return cli.bulk_update_leads(
+        changes,
+        ids=ids,
+        ids_file=args.ids_file,
+        client=args.client,
+        where=args.where,
+        company_id=args.company_id,
+        transport=args.transport,
+        appsync_url=args.appsync_url,
+        appsync_key=args.appsync_key,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        chunk_size=args.chunk_size,
+        manifest=args.manifest,
+        dry_run=args.dry_run,
+        workdir=args.workdir,
+    )
+
+def run_command(cli, args, parser):
     if args.command == "auth":
         cli.auth(email=args.email)
     elif args.command == "generate-key":
         cli.generate_key(name=args.name, description=args.desc)
     elif args.command == "leads":
         if args.action == "list":
-            cli.list_leads()
+            if not (args.all or args.fields or args.client or args.format or args.limit):
+                cli.list_leads()
+                return
+            fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+            return cli.stream_leads(client=args.client, fields=fields, fmt=args.format or "ndjson",
+                                    limit=args.limit or (None if args.all else 20), company_id=args.company_id)
         elif args.action == "find":
-            if not any([args.first_name, args.last_name, args.full_name, args.email, args.company]):
-                print("Error: provide at least one filter: --first-name, --last-name, --full-name, --email, or --company")
+            if not any([args.first_name, args.last_name, args.full_name, args.email, args.company, args.client]):
+                print("Error: provide at least one filter: --first-name, --last-name, --full-name, --email, --company, or --client")
                 return
             cli.find_lead(
                 first_name=args.first_name,
@@ -393,12 +1363,69 @@ def main():
                 full_name=args.full_name,
                 email=args.email,
                 company=args.company,
+                client=args.client,
             )
         elif args.action == "enrich":
             if not args.ids:
                 print("Error: --ids required for enrichment")
                 return
             cli.enrich_leads(args.ids)
+        elif args.action == "set-status":
+            if not args.status:
+                print("Error: --status required")
+                return 1
+            return run_bulk_update(cli, args, {"status": args.status}, ids=args.ids)
+    elif args.command == "clients":
+        if args.action == "list":
+            cli.list_clients(refresh=args.refresh)
+        elif args.action == "resolve":
+            if not args.ref:
+                print("Error: client name, slug or UUID required")
+                return
+            if args.refresh:
+                cli.clients.refresh()
+            cli.resolve_client(args.ref)
+    elif args.command == "import":
+        if args.source == "hubspot":
+            token = args.hubspot_token or cli.env.get("HUBSPOT_ACCESS_TOKEN")
+            if not token:
+                print("Error: HubSpot token required. Use --hubspot-token or set HUBSPOT_ACCESS_TOKEN.")
+                return 1
+            return cli.import_hubspot(
+                args.client, token,
+                hubspot_url=args.hubspot_url or cli.env.get("HUBSPOT_API_URL"),
+                incremental=args.incremental,
+                concurrency=args.concurrency,
+                rate=args.rate,
+                dry_run=args.dry_run,
+            )
+    elif args.command == "emails":
+        if args.update_leads and not args.client:
+            print("Error: --update-leads needs --client (lead files carry no lead IDs)")
+            return 1
+        return cli.verify_emails(
+            input_path=args.input,
+            client=args.client,
+            company_id=args.company_id,
+            output=args.output,
+            update_leads=args.update_leads,
+            status_field=args.status_field,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            deep_probe=not args.no_probe,
+            dns_check=not args.no_dns,
+        )
+    elif args.command == "webhooks":
+        return cli.serve_webhooks(
+            args.client,
+            company_id=args.company_id,
+            host=args.host,
+            port=args.port,
+            secret=args.secret,
+            window=args.window,
+            concurrency=args.concurrency,
+            rate=args.rate,
+        )
     elif args.command == "campaigns":
         if args.action == "list":
             cli.list_campaigns()
@@ -407,11 +1434,38 @@ def main():
                 print("Error: --name required")
                 return
             cli.create_campaign(args.name)
+        elif args.action == "assign":
+            if not args.campaign_id:
+                print("Error: --campaign-id required")
+                return 1
+            return run_bulk_update(cli, args, {"campaignId": args.campaign_id})
     elif args.command == "pipeline":
-        # Check for --start and --end from pipeline_parser (need to add them)
-        start_date = getattr(args, 'start', (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'))
-        end_date = getattr(args, 'end', datetime.now().strftime('%Y-%m-%d'))
-        cli.show_pipeline(start_date=start_date, end_date=end_date)
+        start_date = args.start or (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        end_date = args.end or datetime.now().strftime('%Y-%m-%d')
+        return cli.show_pipeline(start_date=start_date, end_date=end_date, client=args.client, refresh=args.refresh,
+                                 cube=args.cube)
+    elif args.command == "territory":
+        if args.action == "sync":
+            return cli.territory_sync(args.company_id, client=args.client)
+        elif args.action == "companies":
+            return cli.territory_companies(
+                args.company_id,
+                client=args.client,
+                industry=args.industry,
+                min_leads=args.min_leads,
+                max_leads=args.max_leads,
+                search=args.search,
+                start_date=args.start,
+                end_date=args.end,
+                sort_by=args.sort_by,
+                sort_direction=args.sort_direction,
+                fmt=args.format,
+                output=args.output,
+                limit=args.limit,
+            )
+        elif args.action == "push":
+            return cli.territory_push(args.company_id, client=args.client,
+                                      concurrency=args.concurrency, dry_run=args.dry_run)
     elif args.command == "maintenance":
         if args.mtype == "bugs":
             if args.action == "list":
@@ -434,6 +1488,11 @@ def main():
             cli.list_all_companies()
         elif args.resource == "users":
             cli.list_all_users()
+    elif args.command == "cache":
+        if args.action == "stats":
+            cli.cache_stats()
+        elif args.action == "clear":
+            cli.cache_clear()
     else:
         parser.print_help()
 
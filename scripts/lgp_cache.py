@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Disk-backed response cache for read-mostly LeadGenius endpoints.
+
+Agents re-read campaigns, maintenance lists, pipeline metrics, clients and
+settings constantly while the answers rarely change. Responses are stored in a
+small SQLite database keyed by endpoint + params + base URL + user (the same
+user id on staging and production must not share entries), expire after a
+per-endpoint TTL, are revalidated with If-None-Match / If-Modified-Since when
+the server sent validators, and are evicted least-recently-used once the cache
+grows past its size bound. Writes invalidate the related reads.
+
+Only endpoints listed in ENDPOINT_TTLS are ever cached.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CACHE_DIR = os.environ.get("LGP_CACHE_DIR") or os.path.expanduser("~/.leadgenius_cache")
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # 50 MB
+
+# TTL in seconds for each cacheable GET endpoint (path relative to /api).
+ENDPOINT_TTLS = {
+    "campaigns": 300,
+    "clients": 300,
+    "maintenance/bugs": 120,
+    "maintenance/enhancements": 120,
+    "analytics/pipeline": 600,
+    "settings/url": 900,
+    "settings/agent": 900,
+    "settings/sdr-ai": 900,
+}
+
+# A write to the key endpoint also invalidates cached reads of these endpoints.
+# Every write always invalidates its own endpoint.
+RELATED_INVALIDATIONS = {
+    "campaigns": ("analytics/pipeline",),
+    "leads": ("analytics/pipeline", "campaigns"),
+    "clients": ("analytics/pipeline",),
+}
+
+
+def normalize_endpoint(endpoint: str) -> str:
+    """'/api/maintenance/bugs?x=1' and 'maintenance/bugs' map to the same key."""
+    endpoint = endpoint.split("?", 1)[0].strip("/")
+    if endpoint.startswith("api/"):
+        endpoint = endpoint[4:]
+    return endpoint
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "last_modified", "expires_at")
+
+    def __init__(self, body: bytes, etag: Optional[str], last_modified: Optional[str], expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating a stale entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """SQLite-backed LRU cache of GET response bodies. Safe to share between threads."""
+
+    def __init__(self, path: str = None, max_bytes: int = DEFAULT_MAX_BYTES, ttls: Dict[str, int] = None):
+        self.path = path or os.path.join(CACHE_DIR, "responses.sqlite")
+        self.max_bytes = max_bytes
+        self.ttls = ENDPOINT_TTLS if ttls is None else ttls
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_endpoint ON responses (endpoint)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)")
+        self._db.commit()
+
+    def ttl_for(self, endpoint: str) -> int:
+        """TTL for an endpoint, or 0 if it is not cacheable."""
+        return self.ttls.get(normalize_endpoint(endpoint), 0)
+
+    @staticmethod
+    def make_key(endpoint: str, params: Optional[Dict[str, Any]], scope: str) -> str:
+        """Key for a GET; `scope` is "<base_url>|<user>", so servers and users never share entries."""
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        raw = json.dumps([normalize_endpoint(endpoint), params, scope or ""], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+        return CacheEntry(*row)
+
+    def put(self, key: str, endpoint: str, body: bytes, etag: str = None, last_modified: str = None, ttl: int = None):
+        ttl = self.ttl_for(endpoint) if ttl is None else ttl
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, normalize_endpoint(endpoint), body, etag, last_modified, now + ttl, now, len(body)),
+            )
+            self._evict()
+            self._db.commit()
+
+    def refresh(self, key: str, endpoint: str):
+        """Extend a stale entry after the server answered 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?",
+                (now + self.ttl_for(endpoint), now, key),
+            )
+            self._db.commit()
+
+    def invalidate_for_write(self, endpoint: str) -> int:
+        """Drop cached reads affected by a write to `endpoint`. Returns the number of entries removed."""
+        endpoint = normalize_endpoint(endpoint)
+        targets = {endpoint, *RELATED_INVALIDATIONS.get(endpoint.split("/", 1)[0], ())}
+        removed = 0
+        with self._lock:
+            for target in targets:
+                cur = self._db.execute(
+                    "DELETE FROM responses WHERE endpoint = ? OR endpoint LIKE ?", (target, target + "/%")
+                )
+                removed += cur.rowcount
+            self._db.commit()
+        return removed
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = self._db.execute("DELETE FROM responses").rowcount
+            self._db.commit()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT endpoint, COUNT(*), SUM(size), SUM(expires_at > ?) FROM responses GROUP BY endpoint",
+                (now,),
+            ).fetchall()
+        return {
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "endpoints": {ep: {"entries": n, "bytes": size, "fresh": fresh} for ep, n, size, fresh in rows},
+        }
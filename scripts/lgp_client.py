@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+"""
+Importable LeadGenius Pro client for Python services.
+
+    from lgp_client import LeadGeniusClient
+
+    lg = LeadGeniusClient.from_env()              # LGP_API_KEY / ~/.leadgenius_auth.json
+    for lead in lg.iter_leads("acme-corp", fields=["id", "email", "status"]):
+        ...
+    lg.update_leads([{"id": lead_id, "status": "contacted"}])
+
+Methods return the decoded JSON and raise LeadGeniusError on failure;
+nothing is printed. List methods are lazy generators over the API's
+nextToken/cursor pagination, so a page is requested only when the caller
+reaches it:
+
+- prefetch=True (default): while the caller works through a page, the next
+  one is fetched on a background thread.
+- prefetch=False: each page is stream-decoded item by item straight off the
+  socket (lgp_json.iter_json_items), so memory holds one item, not a page.
+
+429 and 5xx answers are retried with exponential backoff (Retry-After is
+honoured), as are connection errors except on POST. Requests of both clients
+carry the per-endpoint timeouts, hedging and circuit breakers of lgp_latency;
+while a host's breaker is open, calls raise LeadGeniusError at once. `rate_per_minute`
+optionally paces every request, and `priority` places the requests in the
+account's shared rate budget when LGP_RATE_BUDGET is set (lgp_scheduler).
+
+The operations are defined once in LeadGeniusOperations on top of `call()`;
+LeadGeniusClient runs them over a pooled requests session, and
+AsyncLeadGeniusClient runs them as coroutines with async iterators for the
+listings (see its docstring).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import lgp_json
+import lgp_latency
+import lgp_scheduler
+from lgp_clients import ClientRegistry
+from lgp_http import RateLimiter, new_session
+
+try:
+    import aiohttp
+except ImportError:  # optional: AsyncLeadGeniusClient falls back to a thread-pool transport
+    aiohttp = None
+
+DEFAULT_BASE_URL = "https://last.leadgenius.app"
+AUTH_FILE = os.path.expanduser("~/.leadgenius_auth.json")
+MAX_RETRIES = 5
+LEADS_PAGE_SIZE = 1000     # GET /api/leads maximum
+BULK_PAGE_SIZE = 5000      # GET /api/enrich-leads/list maximum
+SINGLE_POST_RATE = 400     # requests/min; the documented safe rate for single-lead POSTs
+NEXT_TOKEN_KEYS = ("nextToken", "nextCursor", "cursor", "lastKey")
+PROCESS_KINDS = ("enrich", "copyright", "sdr")
+
+
+class LeadGeniusError(Exception):
+    """An API call failed. `status` is the HTTP status (None for transport errors)."""
+
+    def __init__(self, message: str, status: int = None, body: str = None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+def load_credentials(env=None, auth_file: bool = True) -> Tuple[Optional[str], Optional[str]]:
+    """(token, user_id) from LGP_API_KEY/LGP_USER_ID, falling back to the auth file.
+
+    auth_file=False reads the environment only: a fleet tenant's credentials
+    must never be completed with the operator's stored key or user id.
+    """
+    env = os.environ if env is None else env
+    stored = {}
+    if auth_file and os.path.exists(AUTH_FILE):
+        try:
+            with open(AUTH_FILE, "r") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = {}
+    api_key = env.get("LGP_API_KEY")
+    if api_key:
+        return api_key, env.get("LGP_USER_ID") or stored.get("user_id")
+    # Prefer an API key when the file stores both.
+    return stored.get("api_key") or stored.get("token"), stored.get("user_id")
+
+
+def auth_headers(token: str, user_id: str = None) -> Dict[str, str]:
+    """x-api-key headers for `lgp_` keys, Bearer for JWTs."""
+    if not token:
+        raise LeadGeniusError("not authenticated: set LGP_API_KEY or run 'lgp auth'")
+    headers = {"Content-Type": "application/json"}
+    if token.startswith("lgp_"):
+        if not user_id:
+            raise LeadGeniusError("an API key needs a user id (LGP_USER_ID or user_id in the auth file)")
+        headers["x-api-key"] = token
+        headers["x-user-id"] = user_id
+    else:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+def next_token(meta: Dict[str, Any]) -> Optional[str]:
+    return next((meta[k] for k in NEXT_TOKEN_KEYS if meta.get(k)), None)
+
+
+def project(item: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    return {k: item[k] for k in fields if k in item} if fields else item
+
+
+def retry_delay(attempt: int, retry_after: str = None) -> float:
+    try:
+        return min(float(retry_after), 300.0)
+    except (TypeError, ValueError):
+        return min(2.0 ** attempt, 60.0)
+
+
+class LeadGeniusOperations:
+    """API operations shared by the sync and async clients.
+
+    Every method returns `self.call(...)` or `self.paginate(...)`: the decoded
+    body (or the member named by `pick`) and a generator for the sync client,
+    an awaitable and an async generator for the async one.
+    """
+
+    @classmethod
+    def from_env(cls, env=None, **kwargs):
+        """Credentials from LGP_API_KEY / LGP_USER_ID or ~/.leadgenius_auth.json; company from LGP_COMPANY_ID."""
+        env = os.environ if env is None else env
+        token, user_id = load_credentials(env)
+        kwargs.setdefault("base_url", env.get("LGP_BASE_URL"))
+        kwargs.setdefault("company_id", env.get("LGP_COMPANY_ID"))
+        return cls(token, user_id, **kwargs)
+
+    @property
+    def scope(self) -> str:
+        """Tenant key for local state; matches the CLI's so they share the client registry."""
+        user = self.user_id or hashlib.sha256((self.token or "").encode("utf-8")).hexdigest()[:16]
+        return f"{self.base_url}|{user}"
+
+    def _budget(self):
+        # The account's priority budget (LGP_RATE_BUDGET), shared with the CLI and scripts.
+        return lgp_scheduler.budget(self.scope.split("|", 1)[1])
+
+    def call(self, method: str, path: str, payload: Any = None, params: Dict[str, Any] = None,
+             pick: str = None):
+        raise NotImplementedError
+
+    def paginate(self, path: str, params: Dict[str, Any] = None, keys: Sequence[str] = lgp_json.LIST_KEYS,
+                 token_param: str = "nextToken", prefetch: bool = True):
+        raise NotImplementedError
+
+    # Leads
+    def find_leads(self, client_id: str = None, limit: int = 100, **filters):
+        """One page of leads matching exact-field filters (firstName, email, companyName, ...)."""
+        params = {"limit": limit, **filters}
+        if client_id:
+            params["client_id"] = client_id
+        return self.call("GET", "leads", params=params, pick="data")
+
+    def create_lead(self, lead: Dict[str, Any]):
+        """Create one lead (single-lead POST, the reliable path). Returns the stored lead."""
+        return self.call("POST", "leads", lead, pick="lead")
+
+    def update_lead(self, lead_id: str, **fields):
+        return self.call("PUT", "leads", {"id": lead_id, **fields})
+
+    def update_leads(self, updates: List[Dict[str, Any]]):
+        """Batch update: each dict carries the lead `id` plus the fields to set."""
+        return self.call("PUT", "leads", {"leads": updates})
+
+    def delete_lead(self, lead_id: str):
+        return self.call("DELETE", "leads", params={"id": lead_id})
+
+    def delete_leads(self, lead_ids: List[str]):
+        return self.call("DELETE", "leads", {"ids": lead_ids})
+
+    # Clients
+    def list_clients(self):
+        return self.call("GET", "clients", pick="clients")
+
+    def create_client(self, name: str, **fields):
+        """Create a client. Leads must use the returned `client_id` slug, never its `id`."""
+        return self.call("POST", "clients", {"clientName": name, **fields}, pick="client")
+
+    def update_client(self, client_uuid: str, **fields):
+        return self.call("PUT", "clients", {"id": client_uuid, **fields})
+
+    def delete_client(self, client_uuid: str, purge: bool = False):
+        params = {"id": client_uuid}
+        if purge:
+            params["purge"] = "true"
+        return self.call("DELETE", "clients", params=params)
+
+    # Campaigns
+    def list_campaigns(self):
+        return self.call("GET", "campaigns", pick="campaigns")
+
+    def create_campaign(self, name: str, campaign_type: str = "abm", **fields):
+        return self.call("POST", "campaigns", {"name": name, "campaignType": campaign_type,
+                                               "status": "active", **fields})
+
+    # Processing
+    def process_lead(self, kind: str, lead_id: str, overwrite: bool = False, **options):
+        """Trigger enrich (services=[...]), copyright (processes=[...]) or sdr (fields=[...]) on one lead."""
+        if kind not in PROCESS_KINDS:
+            raise ValueError(f"unknown processing kind '{kind}' (expected one of {', '.join(PROCESS_KINDS)})")
+        return self.call("POST", f"leads/process/{kind}", {"leadId": lead_id, "overwrite": overwrite, **options})
+
+    def enrich_leads(self, lead_ids: List[str], enrichment_type: str = "technographic"):
+        return self.call("POST", "enrichment/trigger", {"leadIds": lead_ids, "enrichmentType": enrichment_type})
+
+    def task_status(self, run_id: str):
+        return self.call("GET", "trigger-task-status", params={"runId": run_id})
+
+    # Analytics, email
+    def pipeline(self, start_date: str, end_date: str, client_id: str = None):
+        params = {"startDate": start_date, "endDate": end_date}
+        if client_id:
+            params["client_id"] = client_id
+        return self.call("GET", "analytics/pipeline", params=params)
+
+    def validate_email(self, email: str, deep: bool = False):
+        return self.call("POST", "email-verify" if deep else "email-validate", {"email": email})
+
+    # Listings (generators for the sync client, async generators for the async one)
+    def iter_source_leads(self, company_id: str = None, client_id: str = None, fields: Sequence[str] = None,
+                          page_size: int = None, prefetch: bool = True):
+        """Bulk SourceLeads listing (API key)."""
+        params = {"companyId": company_id or self.company_id, "clientId": client_id,
+                  "fields": ",".join(fields) if fields else None,
+                  "limit": min(page_size or BULK_PAGE_SIZE, BULK_PAGE_SIZE)}
+        return self.paginate("source-leads/list", params, prefetch=prefetch)
+
+    def iter_clients(self, prefetch: bool = True):
+        return self.paginate("clients", keys=("clients",) + lgp_json.LIST_KEYS, prefetch=prefetch)
+
+    def iter_campaigns(self, prefetch: bool = True):
+        return self.paginate("campaigns", keys=("campaigns",) + lgp_json.LIST_KEYS, prefetch=prefetch)
+
+    def iter_search_history(self, prefetch: bool = True, **filters):
+        """Search history runs (filters: client_id, status, icpId, category, limit); cursor-paged."""
+        return self.paginate("search-history", filters, keys=("searchHistory", "history") + lgp_json.LIST_KEYS,
+                             token_param="cursor", prefetch=prefetch)
+
+    # Leads listing request (paged by the concrete client's iter_leads)
+    def _leads_listing(self, client_id: str, fields: Optional[Sequence[str]], company_id: Optional[str],
+                       page_size: Optional[int], filters: Dict[str, Any]) -> Tuple[str, Dict[str, Any], bool]:
+        """(path, params, projected by the server) for a client's leads.
+
+        The bulk endpoint (API key + company ID + fields) returns up to 5000
+        projected items per page; otherwise GET /api/leads pages full items.
+        """
+        company_id = company_id or self.company_id
+        if fields and company_id and "x-api-key" in self.headers and not filters:
+            return "enrich-leads/list", {"companyId": company_id, "clientId": client_id or "ALL",
+                                         "fields": ",".join(fields),
+                                         "limit": min(page_size or BULK_PAGE_SIZE, BULK_PAGE_SIZE)}, True
+        params = {"client_id": client_id, "limit": min(page_size or LEADS_PAGE_SIZE, LEADS_PAGE_SIZE), **filters}
+        return "leads", params, False
+
+
+class LeadGeniusClient(LeadGeniusOperations):
+    """Blocking client over one pooled keep-alive session. Safe to share between threads."""
+
+    def __init__(self, api_key: str = None, user_id: str = None, base_url: str = None, company_id: str = None,
+                 session=None, timeout: float = None, max_retries: int = MAX_RETRIES, rate_per_minute: float = 0,
+                 priority: str = "normal"):
+        self.token = api_key
+        self.user_id = user_id
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.company_id = company_id
+        self.session = session or new_session()
+        self.timeout = timeout  # None: the endpoint's budget in lgp_latency.TIMEOUTS
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(rate_per_minute, priority=priority, budget=self._budget())
+        self.headers = auth_headers(api_key, user_id)
+        self._registry = None
+
+    # ── Transport ───────────────────────────────────────────────────────────
+    def request(self, method: str, path: str, payload: Any = None, params: Dict[str, Any] = None,
+                stream: bool = False):
+        """Send one request with retries; returns the requests Response (status < 400)."""
+        url = f"{self.base_url}/api/{path.lstrip('/')}"
+        for attempt in range(self.max_retries):
+            self.limiter.acquire()
+            try:
+                response = lgp_json.request_json(self.session, method, url, payload, headers=self.headers,
+                                                 params=params, stream=stream, timeout=self.timeout,
+                                                 priority=self.limiter.priority)
+            except lgp_latency.CircuitOpenError as e:
+                raise LeadGeniusError(f"{method} {path}: {e}") from e
+            except Exception as e:
+                # A POST that may have reached the server is not resent (it could duplicate a lead).
+                if attempt + 1 >= self.max_retries or method == "POST":
+                    raise LeadGeniusError(f"{method} {path}: {e}") from e
+                time.sleep(retry_delay(attempt))
+                continue
+            if response.status_code == 429 or response.status_code >= 500:
+                if attempt + 1 < self.max_retries:
+                    response.close()
+                    time.sleep(retry_delay(attempt, response.headers.get("Retry-After")))
+                    continue
+            if response.status_code >= 400:
+                body = response.text
+                raise LeadGeniusError(f"{method} {path}: HTTP {response.status_code}: {body[:200]}",
+                                      response.status_code, body)
+            return response
+        raise LeadGeniusError(f"{method} {path}: retries exhausted")
+
+    def call(self, method: str, path: str, payload: Any = None, params: Dict[str, Any] = None, pick: str = None):
+        body = lgp_json.response_json(self.request(method, path, payload, params))
+        return body.get(pick) if pick and isinstance(body, dict) else body
+
+    # ── Pagination ──────────────────────────────────────────────────────────
+    def _fetch_page(self, path: str, params: Dict[str, Any], keys: Sequence[str]) -> Tuple[List[Any], Optional[str]]:
+        meta = {}
+        items = list(lgp_json.stream_response_items(self.request("GET", path, params=params, stream=True),
+                                                    keys, meta))
+        return items, next_token(meta)
+
+    def paginate(self, path: str, params: Dict[str, Any] = None, keys: Sequence[str] = lgp_json.LIST_KEYS,
+                 token_param: str = "nextToken", prefetch: bool = True) -> Iterator[Any]:
+        """Lazily yield the items of every page of a listing endpoint."""
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+        if not prefetch:
+            token = None
+            while True:
+                meta = {}
+                response = self.request("GET", path, params={**params, token_param: token} if token else params,
+                                        stream=True)
+                yield from lgp_json.stream_response_items(response, keys, meta)
+                token = next_token(meta)
+                if not token:
+                    return
+        pool = ThreadPoolExecutor(max_workers=1)
+        future = pool.submit(self._fetch_page, path, params, keys)
+        try:
+            while future is not None:
+                items, token = future.result()
+                future = pool.submit(self._fetch_page, path, {**params, token_param: token}, keys) if token else None
+                yield from items
+        finally:
+            # A caller that stops early leaves at most one prefetched page behind.
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def iter_leads(self, client_id: str = None, fields: Sequence[str] = None, company_id: str = None,
+                   page_size: int = None, prefetch: bool = True, **filters) -> Iterator[Dict[str, Any]]:
+        """Every lead of a client (all clients of the company on the bulk endpoint when client_id is None).
+
+        `fields` limits each lead to those keys (server-side on the bulk
+        endpoint); extra keyword filters are passed to GET /api/leads.
+        """
+        path, params, projected = self._leads_listing(client_id, fields, company_id, page_size, filters)
+        for lead in self.paginate(path, params, prefetch=prefetch):
+            yield lead if projected else project(lead, fields)
+
+    # ── Clients by reference ────────────────────────────────────────────────
+    @property
+    def clients(self) -> ClientRegistry:
+        """Local client registry (name / slug / UUID lookups), shared with the CLI."""
+        if self._registry is None:
+            self._registry = ClientRegistry(self.scope, lambda: list(self.iter_clients(prefetch=False)))
+        return self._registry
+
+    def client_slug(self, ref: str) -> str:
+        """The `client_id` slug for a client name, slug or UUID."""
+        client = self.clients.resolve(ref)
+        if not client:
+            raise LeadGeniusError(f"no client matches '{ref}'")
+        return client["client_id"]
+
+    # ── Bulk helpers ────────────────────────────────────────────────────────
+    def bulk_create(self, leads: Iterable[Dict[str, Any]], client_id: str = None, concurrency: int = 8,
+                    rate_per_minute: float = SINGLE_POST_RATE) -> Dict[str, Any]:
+        """Create many leads with concurrent single-lead POSTs.
+
+        Batch POST can answer 201 without persisting (see SKILL.md), so each
+        lead is its own request, `concurrency` in flight under a shared rate
+        limit. `leads` may be any iterable; it is consumed as requests free up.
+        Returns {"created": [lead ids], "failed": [(lead, error message)]}.
+        """
+        limiter = RateLimiter(rate_per_minute, burst=concurrency)
+        result = {"created": [], "failed": []}
+
+        def post(lead):
+            limiter.acquire()
+            return self.create_lead(lead)
+
+        source = iter(leads)
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            inflight = {}
+            while True:
+                for lead in source:
+                    if client_id:
+                        lead = {**lead, "client_id": client_id}
+                    inflight[pool.submit(post, lead)] = lead
+                    if len(inflight) >= concurrency:
+                        break
+                if not inflight:
+                    return result
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    lead = inflight.pop(future)
+                    try:
+                        stored = future.result()
+                        result["created"].append((stored or {}).get("id"))
+                    except Exception as e:
+                        result["failed"].append((lead, str(e)))
+
+
+# ── Asyncio client ──────────────────────────────────────────────────────────
+
+class _AiohttpTransport:
+    """One aiohttp session; its connector pools up to `concurrency` connections."""
+
+    name = "aiohttp"
+
+    def __init__(self, concurrency: int):
+        self._concurrency = concurrency
+        self._session = None
+
+    async def send(self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str],
+                   params: Optional[Dict[str, str]], timeout: Tuple[float, float]):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self._concurrency))
+        # requests' (connect, read) timeout: the read budget bounds each wait for data, not the whole body.
+        limits = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        async with self._session.request(method, url, data=body, headers=headers, params=params,
+                                         timeout=limits) as response:
+            return response.status, response.headers, await response.read()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class _ThreadTransport:
+    """The pooled requests session run on a bounded thread pool, for hosts without aiohttp."""
+
+    name = "threads"
+
+    def __init__(self, concurrency: int):
+        self._session = new_session(concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=concurrency)
+
+    def _send(self, method, url, body, headers, params, timeout):
+        response = self._session.request(method, url, data=body, headers=headers, params=params, timeout=timeout)
+        return response.status_code, response.headers, response.content
+
+    async def send(self, method: str, url: str, body: Optional[bytes], headers: Dict[str, str],
+                   params: Optional[Dict[str, str]], timeout: Tuple[float, float]):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, self._send, method, url, body,
+                                                                headers, params, timeout)
+
+    async def close(self):
+        self._pool.shutdown(wait=False)
+        self._session.close()
+
+
+class AsyncLeadGeniusClient(LeadGeniusOperations):
+    """asyncio client with the same operations, as coroutines; listings are async iterators.
+
+        async with AsyncLeadGeniusClient.from_env() as lg:
+            async for lead in lg.iter_leads("acme-corp", fields=["id", "email"]):
+                ...
+            await asyncio.gather(*(lg.update_lead(i, status="contacted") for i in ids))
+
+    Requests go through aiohttp when it is installed, otherwise through the
+    pooled requests session on a thread pool; the event loop never blocks
+    either way. One semaphore bounds the requests in flight across every task
+    sharing the client, and `rate_per_minute` paces them without blocking.
+    Timeouts, hedging and circuit breakers are the sync client's
+    (lgp_latency.send_async); hedges are not counted by the semaphore.
+    """
+
+    def __init__(self, api_key: str = None, user_id: str = None, base_url: str = None, company_id: str = None,
+                 concurrency: int = 10, timeout: float = None, max_retries: int = MAX_RETRIES,
+                 rate_per_minute: float = 0, transport=None, priority: str = "normal"):
+        self.token = api_key
+        self.user_id = user_id
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.company_id = company_id
+        self.concurrency = concurrency
+        self.timeout = timeout  # None: the endpoint's budget in lgp_latency.TIMEOUTS
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(rate_per_minute, priority=priority, budget=self._budget())
+        self.headers = auth_headers(api_key, user_id)
+        self.transport = transport or (_AiohttpTransport if aiohttp is not None else _ThreadTransport)(concurrency)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._registry = None
+        self._loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.transport.close()
+
+    # ── Transport ───────────────────────────────────────────────────────────
+    async def request(self, method: str, path: str, payload: Any = None, params: Dict[str, Any] = None) -> bytes:
+        """Send one request with retries; returns the response body (status < 400)."""
+        url = f"{self.base_url}/api/{path.lstrip('/')}"
+        body, headers = (None, self.headers) if payload is None else lgp_json.encode_body(payload, self.headers)
+        query = {k: str(v) for k, v in (params or {}).items() if v is not None} or None
+        timeout = lgp_latency.timeout_for(url, self.timeout)
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+
+        def send():
+            return self.transport.send(method, url, body, headers, query, timeout)
+
+        for attempt in range(self.max_retries):
+            await asyncio.sleep(self.limiter.reserve())
+            if self.limiter.budget is not None:
+                await asyncio.to_thread(self.limiter.budget.acquire, self.limiter.priority)
+            try:
+                async with self._semaphore:
+                    status, response_headers, content = await lgp_latency.send_async(
+                        send, method, url, self.limiter.priority)
+            except lgp_latency.CircuitOpenError as e:
+                raise LeadGeniusError(f"{method} {path}: {e}") from e
+            except Exception as e:
+                # A POST that may have reached the server is not resent (it could duplicate a lead).
+                if attempt + 1 >= self.max_retries or method == "POST":
+                    raise LeadGeniusError(f"{method} {path}: {e}") from e
+                await asyncio.sleep(retry_delay(attempt))
+                continue
+            if (status == 429 or status >= 500) and attempt + 1 < self.max_retries:
+                await asyncio.sleep(retry_delay(attempt, response_headers.get("Retry-After")))
+                continue
+            if status >= 400:
+                text = content.decode("utf-8", "replace")
+                raise LeadGeniusError(f"{method} {path}: HTTP {status}: {text[:200]}", status, text)
+            return content
+        raise LeadGeniusError(f"{method} {path}: retries exhausted")
+
+    async def call(self, method: str, path: str, payload: Any = None, params: Dict[str, Any] = None,
+                   pick: str = None):
+        content = await self.request(method, path, payload, params)
+        body = lgp_json.loads(content) if content else None
+        return body.get(pick) if pick and isinstance(body, dict) else body
+
+    # ── Pagination ──────────────────────────────────────────────────────────
+    async def _fetch_page(self, path: str, params: Dict[str, Any], keys: Sequence[str]) -> Tuple[List[Any], Optional[str]]:
+        body = lgp_json.loads(await self.request("GET", path, params=params))
+        if isinstance(body, list):
+            return body, None
+        items = next((body[k] for k in keys if isinstance(body.get(k), list)), [])
+        return items, next_token(body)
+
+    async def paginate(self, path: str, params: Dict[str, Any] = None, keys: Sequence[str] = lgp_json.LIST_KEYS,
+                       token_param: str = "nextToken", prefetch: bool = True):
+        """Lazily yield the items of every page; with prefetch the next page loads while this one is consumed."""
+        params = {k: v for k, v in (params or {}).items() if v is not None}
+
+        def fetch(token):
+            return asyncio.ensure_future(
+                self._fetch_page(path, {**params, token_param: token} if token else params, keys))
+
+        task = fetch(None)
+        try:
+            while task is not None:
+                items, token = await task
+                task = fetch(token) if token and prefetch else None
+                for item in items:
+                    yield item
+                if token and task is None:
+                    task = fetch(token)
+        finally:
+            if task is not None and not task.done():
+                task.cancel()
+
+    async def iter_leads(self, client_id: str = None, fields: Sequence[str] = None, company_id: str = None,
+                         page_size: int = None, prefetch: bool = True, **filters):
+        """Every lead of a client; see LeadGeniusClient.iter_leads."""
+        path, params, projected = self._leads_listing(client_id, fields, company_id, page_size, filters)
+        async for lead in self.paginate(path, params, prefetch=prefetch):
+            yield lead if projected else project(lead, fields)
+
+    # ── Clients by reference ────────────────────────────────────────────────
+    def _fetch_clients(self) -> List[Dict[str, Any]]:
+        # Called by the registry on a worker thread; the listing itself runs on the client's loop.
+        async def collect():
+            return [c async for c in self.iter_clients(prefetch=False)]
+        return asyncio.run_coroutine_threadsafe(collect(), self._loop).result()
+
+    async def client_slug(self, ref: str) -> str:
+        """The `client_id` slug for a client name, slug or UUID (shared local registry)."""
+        self._loop = asyncio.get_running_loop()
+        if self._registry is None:
+            self._registry = ClientRegistry(self.scope, self._fetch_clients)
+        client = await asyncio.to_thread(self._registry.resolve, ref)
+        if not client:
+            raise LeadGeniusError(f"no client matches '{ref}'")
+        return client["client_id"]
+
+    # ── Bulk helpers ────────────────────────────────────────────────────────
+    async def bulk_create(self, leads: Iterable[Dict[str, Any]], client_id: str = None, concurrency: int = None,
+                          rate_per_minute: float = SINGLE_POST_RATE) -> Dict[str, Any]:
+        """Concurrent single-lead POSTs; see LeadGeniusClient.bulk_create."""
+        concurrency = concurrency or self.concurrency
+        limiter = RateLimiter(rate_per_minute, burst=concurrency)
+        result = {"created": [], "failed": []}
+        source = iter(leads)
+
+        async def worker():
+            # Workers share one iterator, so leads are drawn only as requests free up.
+            for lead in source:
+                if client_id:
+                    lead = {**lead, "client_id": client_id}
+                await asyncio.sleep(limiter.reserve())
+                try:
+                    stored = await self.create_lead(lead)
+                    result["created"].append((stored or {}).get("id"))
+                except Exception as e:
+                    result["failed"].append((lead, str(e)))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return result
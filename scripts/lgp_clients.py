@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Persistent local client registry.
+
+Every import resolves a client before writing leads, and reports need to map
+the three client identifiers (`id` UUID, `client_id` slug, `clientName`) onto
+each other. Instead of downloading the client list on every run, the registry
+keeps it on disk per tenant with in-memory indexes by name, slug and UUID, and
+only re-fetches when the copy is older than `max_age` or a lookup misses.
+
+Resolution always yields the record, so callers take `client_id` (the slug)
+from it even when they were handed the UUID — the "invisible leads" mix-up
+cannot happen through the registry.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from lgp_cache import CACHE_DIR
+
+REGISTRY_FILE = os.path.join(CACHE_DIR, "clients.json")
+CLIENTS_MAX_AGE = 24 * 3600  # seconds before a full refresh
+MISS_REFRESH_INTERVAL = 60   # at most one refresh per minute triggered by unknown references
+
+# Registries of several tenants can live in one process (lgp serve, lgp fleet)
+# and share the file; their read-modify-write saves must not interleave.
+_save_lock = threading.Lock()
+
+
+def _name_key(name: str) -> str:
+    return " ".join((name or "").split()).casefold()
+
+
+class ClientRegistry:
+    """Indexed, lazily refreshed view of a tenant's clients.
+
+    `scope` identifies the tenant (base URL + user, or AppSync URL + company)
+    and `fetch` returns the full client list as dicts with `id`, `client_id`
+    and `clientName`.
+    """
+
+    def __init__(self, scope: str, fetch: Callable[[], List[Dict[str, Any]]],
+                 path: str = None, max_age: int = CLIENTS_MAX_AGE):
+        self.scope = scope
+        self.fetch = fetch
+        self.path = path or REGISTRY_FILE
+        self.max_age = max_age
+        self._fetched_at = 0.0
+        self._last_miss_refresh = 0.0
+        self._clients: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_slug: Dict[str, Dict[str, Any]] = {}
+        self._by_name: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    # ── Persistence ─────────────────────────────────────────────────────────
+    def _read_file(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self):
+        entry = self._read_file().get(self.scope)
+        if entry:
+            self._fetched_at = entry.get("fetched_at", 0.0)
+            self._index(entry.get("clients", []))
+
+    def _save(self):
+        with _save_lock:
+            data = self._read_file()
+            data[self.scope] = {"fetched_at": self._fetched_at, "clients": self._clients}
+            os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+
+    def _index(self, clients: List[Dict[str, Any]]):
+        self._clients = [
+            {k: c.get(k) for k in ("id", "client_id", "clientName") if c.get(k)}
+            for c in clients
+        ]
+        self._by_id = {c["id"]: c for c in self._clients if c.get("id")}
+        self._by_slug = {c["client_id"]: c for c in self._clients if c.get("client_id")}
+        self._by_name = {}
+        for c in self._clients:
+            # First client wins on duplicate names, matching the list order the API returns.
+            self._by_name.setdefault(_name_key(c.get("clientName")), c)
+
+    # ── Public API ──────────────────────────────────────────────────────────
+    @property
+    def stale(self) -> bool:
+        return time.time() - self._fetched_at > self.max_age
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        """Re-download the client list and persist it."""
+        self._index(self.fetch() or [])
+        self._fetched_at = time.time()
+        self._save()
+        return self._clients
+
+    def all(self) -> List[Dict[str, Any]]:
+        if self.stale:
+            self.refresh()
+        return list(self._clients)
+
+    def _lookup(self, ref: str) -> Optional[Dict[str, Any]]:
+        return self._by_slug.get(ref) or self._by_id.get(ref) or self._by_name.get(_name_key(ref))
+
+    def resolve(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Find a client by slug, UUID or name (case-insensitive). Refreshes lazily on a miss."""
+        if not ref:
+            return None
+        if self.stale:
+            self.refresh()
+            return self._lookup(ref)
+
+        client = self._lookup(ref)
+        if client is None and time.time() - self._last_miss_refresh > MISS_REFRESH_INTERVAL:
+            self._last_miss_refresh = time.time()
+            self.refresh()
+            client = self._lookup(ref)
+        return client
+
+    def slug_for(self, ref: str) -> Optional[str]:
+        """The lead-facing `client_id` slug for any client reference."""
+        client = self.resolve(ref)
+        return client.get("client_id") if client else None
+
+    def is_uuid(self, ref: str) -> bool:
+        """True when `ref` is a client's internal `id` rather than its slug."""
+        return ref in self._by_id and ref not in self._by_slug
+
+    def name_for(self, ref: str) -> Optional[str]:
+        """Display name for a slug or UUID without triggering a refresh."""
+        client = self._by_slug.get(ref) or self._by_id.get(ref)
+        return client.get("clientName") if client else None
+
+    def add(self, client: Dict[str, Any]):
+        """Record a client we just created so the next lookup needs no list call."""
+        others = [c for c in self._clients if c.get("id") != client.get("id")]
+        self._index(others + [client])
+        self._save()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Background daemon for the lgp CLI.
+
+`lgp serve` keeps warm LeadGeniusCLI instances (HTTP session, token, local
+caches) in one long-lived process and answers forwarded commands over a Unix
+socket. Normal `lgp` invocations forward to it when it is running, so agent
+loops that call the CLI hundreds of times a minute skip auth-file parsing and
+TLS handshakes on every call.
+
+Protocol: one JSON object per line in each direction.
+    request:  {"op": "run", "argv": [...], "env": {"LGP_API_KEY": ..., ...}, "cwd": "/path"}
+    response: {"stdout": "...", "stderr": "...", "exit_code": 0}
+
+Other ops: "ping" (status) and "shutdown".
+"""
+
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+import lgp_latency
+import lgp_scheduler
+
+DEFAULT_SOCKET = os.path.expanduser("~/.leadgenius_lgp.sock")
+
+# Environment variables a forwarded command may depend on: every LGP_* one
+# (credentials, company ID, AppSync key, rate...). Only these are sent to the
+# daemon, so each caller keeps its own credentials and defaults.
+FORWARDED_ENV_PREFIX = "LGP_"
+
+
+class DaemonLost(Exception):
+    """The daemon accepted a request and then went away before answering.
+
+    The command may already have run (or be running), so it must not be
+    retried in-process: a bulk update would be applied twice.
+    """
+
+
+def socket_path() -> str:
+    """Resolve the daemon socket path (LGP_DAEMON_SOCKET overrides the default)."""
+    return os.environ.get("LGP_DAEMON_SOCKET") or DEFAULT_SOCKET
+
+
+class ThreadLocalStream:
+    """Stream proxy that routes writes to a per-thread buffer when one is set.
+
+    The daemon serves commands concurrently, and every command prints its
+    output, so sys.stdout/sys.stderr are swapped for these proxies once and
+    each handler thread captures only its own writes.
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def capture(self):
+        self._local.buffer = io.StringIO()
+        return self._local.buffer
+
+    def release(self):
+        self._local.buffer = None
+
+    def _target(self):
+        return getattr(self._local, "buffer", None) or self._default
+
+    def write(self, s):
+        return self._target().write(s)
+
+    def flush(self):
+        return self._target().flush()
+
+    def isatty(self):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._default, name)
+
+
+def run_captured(func, stdout_proxy: ThreadLocalStream, stderr_proxy: ThreadLocalStream,
+                 error_prefix: str = "Error"):
+    """Call func() with this thread's output captured, like a process of its own.
+
+    Returns (result, stdout, stderr, exit_code): SystemExit becomes its exit
+    code, an exception becomes exit code 1 and a stderr line.
+    """
+    out = stdout_proxy.capture()
+    err = stderr_proxy.capture()
+    result, exit_code = None, 0
+    try:
+        result = func()
+        if isinstance(result, int):
+            exit_code = result
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        if e.code is not None and not isinstance(e.code, int):
+            err.write(f"{e.code}\n")
+    except Exception as e:
+        err.write(f"{error_prefix}: {e}\n")
+        exit_code = 1
+    finally:
+        stdout_proxy.release()
+        stderr_proxy.release()
+    return result, out.getvalue(), err.getvalue(), exit_code
+
+
+def _request(path: str, message: dict, timeout: float = None):
+    """Send one message to the daemon. Returns the decoded reply or None if no daemon is listening.
+
+    Once connected, a dropped connection or an empty reply raises DaemonLost.
+    """
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+
+    chunks = []
+    try:
+        sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if chunk.endswith(b"\n"):
+                break
+    except OSError as e:
+        raise DaemonLost(f"connection to the lgp daemon failed mid-request: {e}") from e
+    finally:
+        sock.close()
+
+    if not chunks:
+        raise DaemonLost("the lgp daemon closed the connection without answering")
+    try:
+        return json.loads(b"".join(chunks))
+    except ValueError as e:
+        raise DaemonLost(f"truncated reply from the lgp daemon: {e}") from e
+
+
+def forward(argv, path: str = None):
+    """Run argv on the daemon and replay its output.
+
+    Returns the command's exit code, or None when no daemon is available and
+    the caller should run the command in-process. A daemon lost after it took
+    the command is an error (exit code 1), never a reason to run it again.
+    """
+    env = {k: v for k, v in os.environ.items() if k.startswith(FORWARDED_ENV_PREFIX)}
+    try:
+        reply = _request(path or socket_path(), {"op": "run", "argv": list(argv), "env": env, "cwd": os.getcwd()})
+    except DaemonLost as e:
+        sys.stderr.write(f"Error: {e}; the command may have run, so it was not retried\n")
+        return 1
+    if reply is None:
+        return None
+
+    if reply.get("stdout"):
+        sys.stdout.write(reply["stdout"])
+    if reply.get("stderr"):
+        sys.stderr.write(reply["stderr"])
+    return reply.get("exit_code", 0)
+
+
+def ping(path: str = None):
+    try:
+        return _request(path or socket_path(), {"op": "ping"}, timeout=5)
+    except DaemonLost:
+        return None
+
+
+def shutdown(path: str = None):
+    try:
+        return _request(path or socket_path(), {"op": "shutdown"}, timeout=5)
+    except DaemonLost:
+        return None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            message = json.loads(line)
+        except ValueError:
+            self._reply({"stderr": "Error: malformed daemon request\n", "exit_code": 2})
+            return
+
+        server = self.server
+        server.last_activity = time.time()
+        op = message.get("op", "run")
+
+        if op == "ping":
+            self._reply({
+                "pid": os.getpid(),
+                "uptime": round(time.time() - server.started_at, 1),
+                "served": server.served,
+                "in_flight": server.in_flight - 1,  # not counting this ping
+                "socket": server.server_address,
+                "rate_budget": lgp_scheduler.all_metrics(),
+                "latency": lgp_latency.metrics(),
+            })
+        elif op == "shutdown":
+            self._reply({"stopping": True})
+            threading.Thread(target=server.shutdown, daemon=True).start()
+        elif op == "run":
+            self._reply(self._run(message.get("argv") or [], message.get("env") or {}, message.get("cwd")))
+        else:
+            self._reply({"stderr": f"Error: unknown daemon op '{op}'\n", "exit_code": 2})
+
+    def _run(self, argv, env, cwd):
+        server = self.server
+        _, stdout, stderr, exit_code = run_captured(lambda: server.runner(argv, env, cwd), server.stdout_proxy,
+                                                    server.stderr_proxy, error_prefix="Daemon Error")
+        with server.lock:
+            server.served += 1
+        return {"stdout": stdout, "stderr": stderr, "exit_code": exit_code}
+
+    def _reply(self, payload):
+        try:
+            self.wfile.write(json.dumps(payload).encode("utf-8") + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    # Requests are counted from accept() (on the serving thread) until the reply
+    # is sent, so the idle reaper and shutdown never miss one that just arrived.
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.in_flight += 1
+        super().process_request(request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.last_activity = time.time()
+                self.drained.notify_all()
+
+
+def _clear_stale_socket(path: str) -> bool:
+    """Remove a leftover socket file. Returns False if a live daemon owns it."""
+    if not os.path.exists(path):
+        return True
+    if ping(path) is not None:
+        return False
+    os.unlink(path)
+    return True
+
+
+def _detach():
+    """Double-fork into the background (POSIX only). Returns True in the daemon process."""
+    if os.fork() > 0:
+        return False
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    return True
+
+
+def serve(runner, path: str = None, idle_timeout: float = 0, detach: bool = False) -> int:
+    """Serve forwarded lgp commands until shutdown or idle timeout.
+
+    `runner(argv, env, cwd)` executes one command in-process for a caller in
+    directory `cwd` and may print, return an exit code, or raise SystemExit.
+    The daemon never changes its own directory: commands run concurrently, so
+    the runner resolves the caller's relative paths against `cwd` instead.
+    Neither the idle timeout nor a shutdown request cuts a running command
+    short: the daemon stops accepting and exits once in-flight commands finish.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        print("Error: lgp serve requires Unix domain sockets, which this platform does not support.")
+        return 1
+
+    path = path or socket_path()
+    if not _clear_stale_socket(path):
+        print(f"lgp daemon already running on {path}")
+        return 1
+
+    if detach:
+        if not _detach():
+            # Parent: wait briefly for the daemon to start listening.
+            for _ in range(50):
+                if ping(path) is not None:
+                    print(f"lgp daemon started on {path}")
+                    return 0
+                time.sleep(0.1)
+            print(f"Warning: lgp daemon did not come up on {path}")
+            return 1
+
+    old_umask = os.umask(0o177)  # socket is owner-only: it fronts your credentials
+    try:
+        server = _DaemonServer(path, _Handler)
+    finally:
+        os.umask(old_umask)
+
+    server.runner = runner
+    server.lock = threading.Lock()
+    server.drained = threading.Condition(server.lock)
+    server.started_at = server.last_activity = time.time()
+    server.served = server.in_flight = 0
+    server.stdout_proxy = ThreadLocalStream(sys.stdout)
+    server.stderr_proxy = ThreadLocalStream(sys.stderr)
+    sys.stdout, sys.stderr = server.stdout_proxy, server.stderr_proxy
+
+    if idle_timeout:
+        def _reaper():
+            while True:
+                time.sleep(min(idle_timeout, 5))
+                with server.lock:
+                    idle = not server.in_flight and time.time() - server.last_activity >= idle_timeout
+                if idle:
+                    server.shutdown()
+                    return
+        threading.Thread(target=_reaper, daemon=True).start()
+
+    if not detach:
+        print(f"lgp daemon listening on {path} (pid {os.getpid()}). Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # Stop taking commands first, then let the ones already running finish and reply.
+        if os.path.exists(path):
+            os.unlink(path)
+        server.server_close()
+        with server.lock:
+            server.drained.wait_for(lambda: not server.in_flight)
+        sys.stdout, sys.stderr = server.stdout_proxy._default, server.stderr_proxy._default
+    return 0
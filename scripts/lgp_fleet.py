@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Run one job across many LeadGenius tenants concurrently (`lgp fleet`).
+
+A tenants file lists the companies with their own credentials:
+
+    tenants:
+      - name: acme
+        api_key: ${ACME_LGP_API_KEY}
+        user_id: 6f1c...
+        company_id: company-123
+        appsync_key: ${ACME_APPSYNC_KEY}   # for `lgp fleet distribution`
+        rate: 200                          # requests/min for this tenant (optional)
+
+YAML or JSON (a list, or {"tenants": [...]}), or CSV with these column
+names. `$VAR` / `${VAR}` values are expanded from the environment, so keys
+can stay out of the file. Optional fields: base_url, appsync_url.
+
+Every tenant must carry its own api_key and user_id (`fleet distribution`
+needs appsync_key and company_id instead): a tenant's job never falls back
+to the operator's ~/.leadgenius_auth.json.
+
+Each tenant runs on its own thread with its own credentials, HTTP session,
+cache scope, client registry and RateLimiter, so a slow or throttled tenant
+holds up nobody else. What a tenant's job prints is captured per thread
+(lgp_daemon.ThreadLocalStream) and merged once every tenant is done: text
+sections, one JSON object keyed by tenant, or one CSV with a leading
+`tenant` column.
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Sequence
+
+import lgp_daemon
+
+DEFAULT_CONCURRENCY = 8
+MERGE_FORMATS = ("text", "json", "csv")
+TENANT_FIELDS = ("name", "api_key", "user_id", "company_id", "appsync_key", "appsync_url", "base_url", "rate")
+# Fields every tenant needs for `fleet run` (API calls) and `fleet distribution` (AppSync).
+API_FIELDS = ("api_key", "user_id")
+DISTRIBUTION_FIELDS = ("appsync_key", "company_id")
+# Tenant fields handed to an in-process lgp command through its environment.
+TENANT_ENV = {
+    "api_key": "LGP_API_KEY",
+    "user_id": "LGP_USER_ID",
+    "company_id": "LGP_COMPANY_ID",
+    "appsync_key": "LGP_APPSYNC_KEY",
+    "appsync_url": "LGP_APPSYNC_URL",
+    "rate": "LGP_RATE",
+}
+
+
+def load_tenants(path: str, required: Sequence[str] = API_FIELDS) -> List[Dict[str, str]]:
+    """Tenants from a YAML, JSON or CSV file, with environment variables expanded.
+
+    Every tenant must set the `required` fields.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.endswith(".csv"):
+            entries = list(csv.DictReader(f))
+        elif path.endswith((".yaml", ".yml")):
+            try:
+                import yaml  # optional: only needed for .yaml tenant files
+            except ImportError:
+                raise RuntimeError("YAML tenant files require PyYAML: pip install pyyaml") from None
+            entries = yaml.safe_load(f)
+        else:
+            entries = json.load(f)
+    if isinstance(entries, dict):
+        entries = entries.get("tenants")
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a list of tenants")
+
+    tenants, seen = [], set()
+    for i, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{path}: tenant #{i} is not a mapping")
+        unknown = set(entry) - set(TENANT_FIELDS)
+        if unknown:
+            raise ValueError(f"{path}: tenant #{i} has unknown field(s) {', '.join(sorted(unknown))}")
+        tenant = {k: os.path.expandvars(str(v)).strip() for k, v in entry.items() if v not in (None, "")}
+        name = tenant.get("name")
+        if not name:
+            raise ValueError(f"{path}: tenant #{i} has no name")
+        if name in seen:
+            raise ValueError(f"{path}: duplicate tenant '{name}'")
+        unresolved = [k for k, v in tenant.items() if "$" in v]
+        if unresolved:
+            raise ValueError(f"{path}: tenant '{name}' references unset variables in {', '.join(unresolved)}")
+        missing = [field for field in required if not tenant.get(field)]
+        if missing:
+            raise ValueError(f"{path}: tenant '{name}' has no {', '.join(missing)}")
+        try:
+            float(tenant.get("rate", 0))
+        except ValueError:
+            raise ValueError(f"{path}: tenant '{name}' has a non-numeric rate") from None
+        seen.add(name)
+        tenants.append(tenant)
+    return tenants
+
+
+def select(tenants: List[Dict[str, str]], names: List[str] = None) -> List[Dict[str, str]]:
+    """The tenants named in `names` (all when empty), in file order."""
+    if not names:
+        return tenants
+    missing = set(names) - {t["name"] for t in tenants}
+    if missing:
+        raise ValueError(f"unknown tenant(s): {', '.join(sorted(missing))}")
+    return [t for t in tenants if t["name"] in names]
+
+
+def tenant_env(tenant: Dict[str, str], base: Dict[str, str] = None) -> Dict[str, str]:
+    """The environment an lgp command sees for a tenant: the caller's, minus other credentials.
+
+    Every TENANT_ENV variable comes from the tenant or is unset, so the
+    parent's LGP_COMPANY_ID or keys never reach a tenant's command.
+    """
+    env = {k: v for k, v in (os.environ if base is None else base).items() if k not in TENANT_ENV.values()}
+    env.update({var: tenant[field] for field, var in TENANT_ENV.items() if tenant.get(field)})
+    return env
+
+
+def run_fleet(tenants: List[Dict[str, str]], job: Callable[[Dict[str, str]], Any],
+              concurrency: int = DEFAULT_CONCURRENCY,
+              progress: Callable[[Dict[str, Any]], None] = None) -> List[Dict[str, Any]]:
+    """Run job(tenant) for every tenant, `concurrency` at a time.
+
+    Returns one result per tenant, in tenant order: {"tenant", "exit_code",
+    "value" (job's return), "stdout", "stderr", "seconds"}. `progress` is
+    called on the calling thread as each tenant finishes.
+    """
+    out, err = lgp_daemon.ThreadLocalStream(sys.stdout), lgp_daemon.ThreadLocalStream(sys.stderr)
+
+    def run(tenant):
+        started = time.monotonic()
+        value, stdout, stderr, exit_code = lgp_daemon.run_captured(lambda: job(tenant), out, err)
+        return {"tenant": tenant["name"], "exit_code": exit_code, "value": value,
+                "stdout": stdout, "stderr": stderr, "seconds": time.monotonic() - started}
+
+    results: List[Dict[str, Any]] = [None] * len(tenants)
+    sys.stdout, sys.stderr = out, err
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = {pool.submit(run, tenant): i for i, tenant in enumerate(tenants)}
+            for future in as_completed(futures):
+                result = results[futures[future]] = future.result()
+                if progress:
+                    progress(result)
+    finally:
+        sys.stdout, sys.stderr = out._default, err._default
+    return results
+
+
+# ── Merging ─────────────────────────────────────────────────────────────────
+
+def merge_outputs(results: List[Dict[str, Any]], fmt: str = "text") -> str:
+    """Combine the tenants' printed output into one document."""
+    if fmt == "json":
+        merged = {}
+        for r in results:
+            try:
+                merged[r["tenant"]] = json.loads(r["stdout"])
+            except ValueError:
+                merged[r["tenant"]] = {"output": r["stdout"], "exit_code": r["exit_code"]}
+        return json.dumps(merged, indent=2) + "\n"
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        header = None
+        for r in results:
+            rows = list(csv.reader(io.StringIO(r["stdout"])))
+            if not rows:
+                continue
+            if header is None:
+                header = rows[0]
+                writer.writerow(["tenant"] + header)
+            elif rows[0] != header:
+                raise ValueError(f"tenant '{r['tenant']}' printed a different CSV header")
+            writer.writerows([r["tenant"]] + row for row in rows[1:] if row)
+        return buffer.getvalue()
+
+    sections = []
+    for r in results:
+        status = "ok" if r["exit_code"] == 0 else f"exit {r['exit_code']}"
+        sections.append(f"=== {r['tenant']} ({status}, {r['seconds']:.1f}s) ===\n{r['stdout'].rstrip()}")
+    return "\n\n".join(sections) + "\n"
+
+
+def write_outputs(results: List[Dict[str, Any]], directory: str):
+    """One <tenant>.out (and .err when non-empty) file per tenant."""
+    os.makedirs(directory, exist_ok=True)
+    for r in results:
+        with open(os.path.join(directory, f"{r['tenant']}.out"), "w", encoding="utf-8") as f:
+            f.write(r["stdout"])
+        if r["stderr"]:
+            with open(os.path.join(directory, f"{r['tenant']}.err"), "w", encoding="utf-8") as f:
+                f.write(r["stderr"])
+
+
+def summary(results: List[Dict[str, Any]], wall: float) -> str:
+    failed = [r["tenant"] for r in results if r["exit_code"]]
+    busy = sum(r["seconds"] for r in results)
+    line = (f"{len(results)} tenant(s) in {wall:.1f}s ({busy:.1f}s of tenant time), "
+            f"{len(results) - len(failed)} ok, {len(failed)} failed")
+    return line + (f": {', '.join(failed)}" if failed else "")
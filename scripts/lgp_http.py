@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport helpers for the LeadGenius scripts.
+
+- new_session(): a requests Session whose pool keeps enough keep-alive
+  connections open for concurrent workers (requests' default is 10 per host
+  and silently discards the rest, forcing new TLS handshakes).
+- RateLimiter: thread-safe token bucket so concurrent workers share one
+  requests-per-minute budget instead of each sleeping on its own (reserve()
+  is the non-blocking form for asyncio tasks). A limiter given a `priority`
+  also draws from the account-wide priority budget (lgp_scheduler) when
+  LGP_RATE_BUDGET is set.
+- Compression: sessions advertise every response encoding urllib3 can decode
+  (br and zstd when brotli / zstandard are installed, gzip and deflate
+  always). Request bodies are gzipped above GZIP_MIN_BYTES when
+  LGP_GZIP_REQUESTS=1 (or gzip_requests is set), and hosts answering 415 get
+  plain bodies from then on. TRANSFER counts payload vs wire bytes both ways.
+"""
+
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+import lgp_scheduler
+
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+GZIP_MIN_BYTES = 4096  # smaller bodies don't repay the CPU and header overhead
+gzip_requests = os.environ.get("LGP_GZIP_REQUESTS", "").lower() in ("1", "true", "yes")
+
+
+def new_session(pool_size: int = 10) -> requests.Session:
+    """Session that can keep `pool_size` connections per host alive for reuse."""
+    session = requests.Session()
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class RateLimiter:
+    """Token bucket allowing `per_minute` acquisitions per minute with a burst of `burst`.
+
+    A limiter with per_minute <= 0 never blocks on its own bucket. With a
+    `priority` ("interactive", "normal" or "bulk"), acquire() then also waits
+    for that class's turn in `budget` (default: the process's budget for the
+    current credentials, see lgp_scheduler.budget()).
+    """
+
+    def __init__(self, per_minute: float, burst: int = None, priority: str = None,
+                 budget: "lgp_scheduler.Scheduler" = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or max(1, int(self.rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.priority = priority
+        self.budget = (budget or lgp_scheduler.budget()) if priority else None
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns the seconds spent waiting."""
+        waited = self._acquire_own()
+        if self.budget is not None:
+            waited += self.budget.acquire(self.priority)
+        return waited
+
+    def _acquire_own(self) -> float:
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def reserve(self) -> float:
+        """Take a token without blocking; returns the seconds to wait before using it.
+
+        For asyncio callers (`await asyncio.sleep(limiter.reserve())`). The
+        bucket may go into debt, so concurrent reservations queue up in order.
+        The priority budget is not included; it blocks, so async callers take
+        it on a worker thread (`await asyncio.to_thread(limiter.budget.acquire, ...)`).
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1e6:.1f} MB" if n >= 100_000 else f"{n / 1e3:.1f} KB"
+
+
+class TransferStats:
+    """Thread-safe payload vs on-the-wire byte counters for requests and responses."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.sent = 0           # request bodies before compression
+        self.sent_wire = 0      # request bodies as sent
+        self.received = 0       # response bodies after decoding
+        self.received_wire = 0  # response bodies as received
+        self.encodings = {}     # response Content-Encoding -> count
+
+    def record_sent(self, raw: int, wire: int):
+        with self._lock:
+            self.requests += 1
+            self.sent += raw
+            self.sent_wire += wire
+
+    def record_received(self, response, decoded: int):
+        """Count a fully consumed response. Wire size comes from urllib3's byte counter."""
+        try:
+            wire = response.raw.tell()
+        except Exception:
+            wire = 0
+        wire = wire or int(response.headers.get("Content-Length") or decoded)
+        encoding = response.headers.get("Content-Encoding") or "identity"
+        with self._lock:
+            self.received += decoded
+            self.received_wire += wire
+            self.encodings[encoding] = self.encodings.get(encoding, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "sent": self.sent,
+                "sent_wire": self.sent_wire,
+                "received": self.received,
+                "received_wire": self.received_wire,
+                "encodings": dict(self.encodings),
+            }
+
+    def summary(self) -> str:
+        s = self.snapshot()
+
+        def ratio(raw, wire):
+            return f"{raw / wire:.1f}x" if wire else "-"
+        encodings = ", ".join(f"{k} {v}" for k, v in sorted(s["encodings"].items())) or "none"
+        return (f"↓ {_mb(s['received_wire'])} on the wire for {_mb(s['received'])} of JSON "
+                f"({ratio(s['received'], s['received_wire'])}; {encodings}) | "
+                f"↑ {_mb(s['sent_wire'])} for {_mb(s['sent'])} ({ratio(s['sent'], s['sent_wire'])})")
+
+
+TRANSFER = TransferStats()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+JSON encode/decode layer for the LeadGenius transports.
+
+- dumps()/loads() use orjson when it is installed and the stdlib otherwise.
+  Set LGP_JSON=stdlib (or call set_backend) to force the fallback.
+- iter_json_items() stream-decodes a list response such as
+  {"items": [...], "nextToken": "..."} item by item from the socket, so a
+  5000-item bulk page is never materialised as one string plus one list.
+- post_json()/request_json() send a pre-encoded body instead of letting
+  requests run the stdlib encoder, gzip it when lgp_http.gzip_requests is
+  on, and record payload vs wire sizes in lgp_http.TRANSFER. Every request
+  gets a timeout and goes through lgp_latency (circuit breaker, hedging).
+"""
+
+import codecs
+import gzip
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import lgp_http
+import lgp_latency
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib
+    orjson = None
+
+STREAM_CHUNK_BYTES = 64 * 1024
+LIST_KEYS = ("items", "data", "leads")
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = ",]}" + _WHITESPACE
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=str)
+
+
+BACKENDS = {"stdlib": (_stdlib_dumps, json.loads)}
+if orjson is not None:
+    BACKENDS["orjson"] = (_orjson_dumps, orjson.loads)
+
+backend = "stdlib"
+dumps = _stdlib_dumps
+loads = json.loads
+
+
+def set_backend(name: str):
+    """Select the JSON backend ('orjson' or 'stdlib')."""
+    global backend, dumps, loads
+    if name not in BACKENDS:
+        raise ValueError(f"JSON backend '{name}' is not available (installed: {', '.join(BACKENDS)})")
+    backend = name
+    dumps, loads = BACKENDS[name]
+
+
+set_backend(os.environ.get("LGP_JSON") or ("orjson" if orjson is not None else "stdlib"))
+
+
+# Hosts that answered 415 to a gzipped body; they get plain bodies from then on.
+_gzip_rejected = set()
+_gzip_lock = threading.Lock()
+
+
+def encode_body(payload: Any, headers: Dict[str, str] = None, compress: bool = False) -> Tuple[bytes, Dict[str, str]]:
+    """(body, headers) for a JSON request; headers get a Content-Type if missing.
+
+    With `compress`, bodies of at least lgp_http.GZIP_MIN_BYTES are gzipped.
+    """
+    headers = dict(headers or {})
+    headers.setdefault("Content-Type", "application/json")
+    body = dumps(payload)
+    if compress and len(body) >= lgp_http.GZIP_MIN_BYTES:
+        headers["Content-Encoding"] = "gzip"
+        return gzip.compress(body, compresslevel=5), headers
+    return body, headers
+
+
+def request_json(http, method: str, url: str, payload: Any = None, headers: Dict[str, str] = None,
+                 priority: str = None, idempotent: bool = None, **kwargs):
+    """http.request() with the body encoded by the active backend. `http` is a Session or the requests module.
+
+    The timeout defaults to the endpoint's budget (lgp_latency.timeout_for).
+    `priority` ("bulk" is shed while the host's breaker is not closed) and
+    `idempotent` (hedge a POST, e.g. a GraphQL query; GETs are hedged by
+    default) are passed to lgp_latency.send().
+    """
+    kwargs["timeout"] = lgp_latency.timeout_for(url, kwargs.get("timeout"))
+
+    def send(**request_kwargs):
+        return lgp_latency.send(lambda: http.request(method, url, **request_kwargs, **kwargs),
+                                method, url, priority, idempotent)
+
+    if payload is None:
+        lgp_http.TRANSFER.record_sent(0, 0)
+        return send(headers=headers)
+    host = urlsplit(url).netloc
+    compress = lgp_http.gzip_requests and host not in _gzip_rejected
+    raw = dumps(payload) if compress else None
+    body, sent_headers = encode_body(payload, headers, compress)
+    lgp_http.TRANSFER.record_sent(len(raw) if raw is not None else len(body), len(body))
+    response = send(data=body, headers=sent_headers)
+    if response.status_code == 415 and sent_headers.get("Content-Encoding") == "gzip":
+        with _gzip_lock:
+            _gzip_rejected.add(host)
+        response.close()
+        body, sent_headers = encode_body(payload, headers)
+        lgp_http.TRANSFER.record_sent(len(body), len(body))
+        response = send(data=body, headers=sent_headers)
+    return response
+
+
+def post_json(http, url: str, payload: Any, headers: Dict[str, str] = None, **kwargs):
+    return request_json(http, "POST", url, payload, headers, **kwargs)
+
+
+def response_json(response) -> Any:
+    """Decode a requests Response body with the active backend."""
+    content = response.content
+    lgp_http.TRANSFER.record_received(response, len(content))
+    return loads(content)
+
+
+# ── Streaming list decoder ──────────────────────────────────────────────────
+
+class _Buffer:
+    """Text window over an iterator of byte chunks, decoded incrementally."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk. Returns False at end of input."""
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            self.text += self._utf8.decode(b"", final=True)
+            return False
+        # Drop the consumed prefix so the window stays about one chunk wide.
+        self.text = self.text[self.pos:] + self._utf8.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of input), without consuming it."""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Malformed JSON stream: expected {char!r}, got {found!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one complete JSON value, reading more input until it fits."""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number cut by the window edge ("-2" of "-2.5e10") parses early; it is
+            # only complete once a delimiter follows it.
+            if (not self.eof and isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end == len(self.text) or self.text[end] not in _DELIMITERS)):
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_items(chunks: Iterable[bytes], keys: Iterable[str] = LIST_KEYS,
+                    meta: Dict[str, Any] = None, path: Sequence[str] = ()) -> Iterator[Any]:
+    """Yield the elements of the first array under one of `keys`, one at a time.
+
+    `chunks` is any byte-chunk iterator, e.g. response.iter_content(STREAM_CHUNK_BYTES)
+    on a request made with stream=True. `path` names the objects to descend
+    into first, e.g. ("data", "listEnrichLeadsByCompanyId") for a GraphQL
+    connection. Every other member at the list's level (nextToken, lastKey,
+    count, ...) is decoded into `meta`, which is complete once the iterator is
+    exhausted; members on the way down (e.g. GraphQL "errors") are stored
+    under their own names too. A top-level array body is streamed as the list
+    itself.
+    """
+    meta = {} if meta is None else meta
+    buf = _Buffer(chunks)
+    if buf.peek() == "[":
+        yield from _iter_array(buf)
+        return
+    yield from _iter_object(buf, tuple(path), tuple(keys), meta)
+
+
+def _iter_object(buf: _Buffer, path: Tuple[str, ...], keys: Tuple[str, ...], meta: Dict[str, Any]) -> Iterator[Any]:
+    buf.expect("{")
+    if buf.peek() == "}":
+        buf.pos += 1
+        return
+    streamed = False
+    while True:
+        key = buf.value()
+        buf.expect(":")
+        nxt = buf.peek()
+        if path and key == path[0] and nxt == "{":
+            yield from _iter_object(buf, path[1:], keys, meta)
+        elif not path and not streamed and key in keys and nxt == "[":
+            streamed = True
+            yield from _iter_array(buf)
+        else:
+            meta[key] = buf.value()
+        sep = buf.peek()
+        buf.pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError(f"Malformed JSON stream: expected ',' or '}}', got {sep!r}")
+
+
+def _iter_array(buf: _Buffer) -> Iterator[Any]:
+    buf.expect("[")
+    if buf.peek() == "]":
+        buf.pos += 1
+        return
+    while True:
+        yield buf.value()
+        sep = buf.peek()
+        buf.pos += 1
+        if sep == "]":
+            return
+        if sep != ",":
+            raise ValueError(f"Malformed JSON stream: expected ',' or ']', got {sep!r}")
+
+
+def stream_response_items(response, keys: Iterable[str] = LIST_KEYS, meta: Dict[str, Any] = None,
+                          path: Sequence[str] = ()) -> Iterator[Any]:
+    """iter_json_items() over a requests Response opened with stream=True; closes it when done."""
+    decoded = 0
+
+    def chunks():
+        nonlocal decoded
+        for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+            decoded += len(chunk)
+            yield chunk
+    try:
+        yield from iter_json_items(chunks(), keys, meta, path)
+    finally:
+        lgp_http.TRANSFER.record_received(response, decoded)
+        response.close()
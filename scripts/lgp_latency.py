@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Tail-latency controls for every request sent through lgp_json.request_json(),
+and, through send_async(), for AsyncLeadGeniusClient's requests.
+
+- Timeouts: no request waits forever. Each endpoint has a read-timeout budget
+  (TIMEOUTS, e.g. 120s for 5000-item bulk pages, 15s for the client list), and
+  connects give up after LGP_CONNECT_TIMEOUT. LGP_TIMEOUTS overrides by
+  endpoint path: LGP_TIMEOUTS="leads=10,enrich-leads/list=180,graphql=30".
+  With stream=True the read timeout bounds each wait for data, so a connection
+  that stalls mid-page fails too.
+- Hedging: an idempotent request (GET, or one sent with idempotent=True such as
+  an AppSync query) that is still unanswered after its endpoint's p95 latency
+  gets a duplicate on a second connection. The first good answer wins and the
+  other is discarded. Hedges are capped at LGP_HEDGE_BUDGET (5%) of requests,
+  need HEDGE_MIN_SAMPLES latencies before an endpoint qualifies, and bypass the
+  RateLimiter, which the cap keeps within a few percent. LGP_HEDGE=0 turns
+  hedging off.
+- Circuit breakers, one per host (last.leadgenius.app, the AppSync endpoint,
+  HubSpot). Timeouts, connection errors and 5xx answers count as failures; 429
+  does not. The breaker opens when BREAKER_FAILURES calls in a row fail, or
+  when at least LGP_BREAKER_THRESHOLD of the last BREAKER_WINDOW calls failed.
+  While it is open, requests fail at once with CircuitOpenError. After
+  LGP_BREAKER_COOLDOWN seconds one probe request is let through: success
+  closes the breaker, failure opens it again. Bulk requests (priority="bulk")
+  may only probe half a cooldown later and are refused until then, so imports
+  stop adding load while the host is degraded and interactive commands find
+  out first whether it has recovered.
+
+metrics() reports per-endpoint latency percentiles, timeouts, errors and
+hedges, plus each breaker's state. `lgp serve --status` and
+LGP_LATENCY_STATS=1 print them.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name) or default)
+    except ValueError:
+        return default
+
+
+CONNECT_TIMEOUT = _env_float("LGP_CONNECT_TIMEOUT", 5)
+DEFAULT_TIMEOUT = _env_float("LGP_TIMEOUT", 60)
+# Read timeout per endpoint path (after /api/); the longest matching prefix wins.
+TIMEOUTS = {
+    "auth": 15,
+    "clients": 15,
+    "leads": 30,
+    "enrich-leads/list": 120,      # 5000-item pages
+    "graphql": 60,
+    "territory-workbench": 60,
+    "crm": 60,                     # HubSpot
+}
+HEDGE = os.environ.get("LGP_HEDGE", "1").lower() not in ("0", "false", "no")
+HEDGE_PERCENTILE = _env_float("LGP_HEDGE_PERCENTILE", 95)
+HEDGE_BUDGET = _env_float("LGP_HEDGE_BUDGET", 0.05)  # hedges allowed per request sent
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.05    # seconds; never hedge sooner than this
+LATENCY_WINDOW = 200      # latencies kept per endpoint for the percentiles
+BREAKER_FAILURES = 5      # consecutive failures that open a breaker
+BREAKER_WINDOW = 20
+BREAKER_MIN_CALLS = 10    # calls in the window before the failure ratio counts
+BREAKER_THRESHOLD = _env_float("LGP_BREAKER_THRESHOLD", 0.5)
+BREAKER_COOLDOWN = _env_float("LGP_BREAKER_COOLDOWN", 30)
+BULK_COOLDOWN_FACTOR = 1.5
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{16,}|[A-Za-z0-9_-]{20,})$")
+
+
+def _parse_overrides(spec: str) -> Dict[str, float]:
+    overrides = {}
+    for part in (spec or "").split(","):
+        path, _, seconds = part.partition("=")
+        try:
+            overrides[path.strip().strip("/")] = float(seconds)
+        except ValueError:
+            continue
+    return overrides
+
+
+TIMEOUT_OVERRIDES = _parse_overrides(os.environ.get("LGP_TIMEOUTS", ""))
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """A request was refused without being sent because its host's breaker is open."""
+
+    def __init__(self, host: str, retry_after: float, reason: str):
+        super().__init__(f"{host} is degraded ({reason}); not sending requests for {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def _path(url: str) -> Tuple[str, str]:
+    """(host, endpoint path) with the /api/ prefix dropped and id-like segments collapsed."""
+    parts = urlsplit(url)
+    path = parts.path.strip("/")
+    if path.startswith("api/"):
+        path = path[4:]
+    return parts.netloc, "/".join(":id" if _ID_SEGMENT.match(s) else s for s in path.split("/"))
+
+
+def _lookup(table: Dict[str, float], path: str) -> Optional[float]:
+    matches = [k for k in table if path == k or path.startswith(k + "/")]
+    return table[max(matches, key=len)] if matches else None
+
+
+def timeout_for(url: str, requested=None):
+    """(connect, read) timeout for a request: LGP_TIMEOUTS, else the caller's, else TIMEOUTS."""
+    _, path = _path(url)
+    override = _lookup(TIMEOUT_OVERRIDES, path)
+    if override is not None:
+        return (CONNECT_TIMEOUT, override)
+    if requested is not None:
+        return requested
+    read = _lookup(TIMEOUTS, path)
+    return (CONNECT_TIMEOUT, read if read is not None else DEFAULT_TIMEOUT)
+
+
+class EndpointStats:
+    """Recent latencies and outcome counters for one method + endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def record(self, seconds: float = None, timeout: bool = False, error: bool = False):
+        with self._lock:
+            self.requests += 1
+            if seconds is not None:
+                self._latencies.append(seconds)
+            self.timeouts += timeout
+            self.errors += error
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there are too few samples."""
+        if len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return max(HEDGE_MIN_DELAY, self.percentile(HEDGE_PERCENTILE))
+
+    def snapshot(self) -> Dict[str, Any]:
+        def ms(pct):
+            value = self.percentile(pct)
+            return round(value * 1000) if value is not None else None
+        return {"requests": self.requests, "p50_ms": ms(50), "p95_ms": ms(95), "p99_ms": ms(99),
+                "timeouts": self.timeouts, "errors": self.errors,
+                "hedged": self.hedged, "hedge_wins": self.hedge_wins}
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over the recent outcomes of one host's requests."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.state = CLOSED
+        self.trips = 0
+        self.refused = 0
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=BREAKER_WINDOW)
+        self._consecutive = 0
+        self._opened = 0.0
+        self._probing = False
+        self._reason = ""
+
+    def before(self, priority: str = None) -> bool:
+        """Raise CircuitOpenError unless a request of `priority` may be sent now; True for the probe."""
+        with self._lock:
+            if self.state == CLOSED:
+                return False
+            # Bulk work may probe only half a cooldown later, so a recovering host sees interactive traffic first.
+            ready = self._opened + BREAKER_COOLDOWN * (BULK_COOLDOWN_FACTOR if priority == "bulk" else 1)
+            remaining = ready - time.monotonic()
+            if remaining <= 0 and not self._probing:
+                self.state = HALF_OPEN
+                self._probing = True
+                return True
+            self.refused += 1
+            raise CircuitOpenError(self.host, max(remaining, 1.0), self._reason)
+
+    def record(self, ok: bool, probe: bool = False):
+        with self._lock:
+            self._outcomes.append(ok)
+            self._consecutive = 0 if ok else self._consecutive + 1
+            if probe:
+                self._probing = False
+                if ok:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                else:
+                    self._open("probe failed")
+                return
+            if self.state != CLOSED or ok:
+                return
+            failures = self._outcomes.count(False)
+            if self._consecutive >= BREAKER_FAILURES:
+                self._open(f"{self._consecutive} failures in a row")
+            elif len(self._outcomes) >= BREAKER_MIN_CALLS and failures / len(self._outcomes) >= BREAKER_THRESHOLD:
+                self._open(f"{failures} of the last {len(self._outcomes)} calls failed")
+
+    def _open(self, reason: str):
+        self.state = OPEN
+        self.trips += 1
+        self._opened = time.monotonic()
+        self._reason = reason
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            reopens = max(0.0, self._opened + BREAKER_COOLDOWN - time.monotonic()) if self.state == OPEN else 0.0
+            return {"state": self.state, "trips": self.trips, "refused": self.refused,
+                    "recent_failures": self._outcomes.count(False), "recent_calls": len(self._outcomes),
+                    "reopens_in": round(reopens, 1), "reason": self._reason if self.state != CLOSED else ""}
+
+
+_lock = threading.Lock()
+_endpoints: Dict[str, EndpointStats] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_hedge_credit = 1.0
+
+
+def _get(table: Dict[str, Any], key: str, factory):
+    with _lock:
+        if key not in table:
+            table[key] = factory()
+        return table[key]
+
+
+def breaker(host: str) -> CircuitBreaker:
+    return _get(_breakers, host, lambda: CircuitBreaker(host))
+
+
+def _take_hedge() -> bool:
+    """Spend one hedge from the budget, which earns HEDGE_BUDGET per request sent."""
+    global _hedge_credit
+    with _lock:
+        if _hedge_credit < 1:
+            return False
+        _hedge_credit -= 1
+        return True
+
+
+def _earn_hedge():
+    global _hedge_credit
+    with _lock:
+        _hedge_credit = min(10.0, _hedge_credit + HEDGE_BUDGET)
+
+
+def _spawn(func: Callable[[], Any]) -> Future:
+    """Run func on a daemon thread, so an abandoned slow request never delays exit."""
+    future = Future()
+
+    def run():
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(func())
+            except BaseException as e:
+                future.set_exception(e)
+    threading.Thread(target=run, name="lgp-hedge", daemon=True).start()
+    return future
+
+
+def _good(future: Future) -> bool:
+    return future.exception() is None and future.result().status_code < 500
+
+
+def _discard(future: Future):
+    if future.exception() is None:
+        future.result().close()
+
+
+def send(request: Callable[[], Any], method: str, url: str, priority: str = None, idempotent: bool = None):
+    """Send request() under the host's breaker, hedging it when idempotent and slow."""
+    host, path = _path(url)
+    guard = breaker(host)
+    probe = guard.before(priority)
+    stats = _get(_endpoints, f"{method} {host}/{path}", EndpointStats)
+    _earn_hedge()
+
+    def attempt():
+        started = time.monotonic()
+        try:
+            response = request()
+        except Exception as e:
+            stats.record(timeout=isinstance(e, requests.exceptions.Timeout), error=True)
+            guard.record(False, probe)
+            raise
+        stats.record(time.monotonic() - started, error=response.status_code >= 500)
+        guard.record(response.status_code < 500, probe)
+        return response
+
+    delay = None
+    if HEDGE and (idempotent or (idempotent is None and method == "GET")) and guard.state == CLOSED:
+        delay = stats.hedge_delay()
+    if delay is None:
+        return attempt()
+
+    primary = _spawn(attempt)
+    if wait([primary], timeout=delay).done or not _take_hedge():
+        return primary.result()
+    with stats._lock:
+        stats.hedged += 1
+    hedge = _spawn(attempt)
+    pending = {primary, hedge}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        winner = next((f for f in (primary, hedge) if f in done and _good(f)), None)
+        if winner is not None:
+            for other in pending:
+                other.add_done_callback(_discard)
+            if winner is hedge:
+                with stats._lock:
+                    stats.hedge_wins += 1
+            return winner.result()
+    # Neither answer was usable: report the primary's, like an unhedged request would.
+    _discard(hedge)
+    return primary.result()
+
+
+async def send_async(request: Callable[[], Any], method: str, url: str, priority: str = None,
+                     idempotent: bool = None):
+    """send() for coroutines: await request(), which returns (status, headers, body).
+
+    Same breaker, endpoint stats and hedging; the slower of two hedged
+    requests is cancelled instead of discarded.
+    """
+    import asyncio  # here, so the sync clients and a forwarding `lgp` never import it
+
+    host, path = _path(url)
+    guard = breaker(host)
+    probe = guard.before(priority)
+    stats = _get(_endpoints, f"{method} {host}/{path}", EndpointStats)
+    _earn_hedge()
+
+    async def attempt():
+        started = time.monotonic()
+        try:
+            result = await request()
+        except Exception as e:
+            stats.record(timeout=isinstance(e, (requests.exceptions.Timeout, asyncio.TimeoutError)), error=True)
+            guard.record(False, probe)
+            raise
+        stats.record(time.monotonic() - started, error=result[0] >= 500)
+        guard.record(result[0] < 500, probe)
+        return result
+
+    delay = None
+    if HEDGE and (idempotent or (idempotent is None and method == "GET")) and guard.state == CLOSED:
+        delay = stats.hedge_delay()
+    if delay is None:
+        return await attempt()
+
+    primary = asyncio.ensure_future(attempt())
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done or not _take_hedge():
+        return await primary
+    with stats._lock:
+        stats.hedged += 1
+    hedge = asyncio.ensure_future(attempt())
+    pending = {primary, hedge}
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        winner = next((t for t in (primary, hedge) if t in done and t.exception() is None and t.result()[0] < 500),
+                      None)
+        if winner is not None:
+            for other in pending:
+                other.cancel()
+            if winner is hedge:
+                with stats._lock:
+                    stats.hedge_wins += 1
+            return winner.result()
+    return primary.result()
+
+
+def metrics() -> Dict[str, Any]:
+    with _lock:
+        endpoints, breakers = dict(_endpoints), dict(_breakers)
+    return {"endpoints": {key: stats.snapshot() for key, stats in sorted(endpoints.items())},
+            "breakers": {host: b.snapshot() for host, b in sorted(breakers.items())}}
+
+
+def summary() -> str:
+    m = metrics()
+    lines = []
+    for host, b in m["breakers"].items():
+        state = b["state"] + (f" ({b['reason']}, retry in {b['reopens_in']:g}s)" if b["state"] != CLOSED else "")
+        lines.append(f"{host}: breaker {state}, {b['trips']} trip(s), {b['refused']} refused")
+    for key, s in m["endpoints"].items():
+        percentiles = ", ".join(f"p{p} {s[f'p{p}_ms']} ms" for p in (50, 95, 99) if s[f"p{p}_ms"] is not None)
+        lines.append(f"  {key}: {s['requests']} req{', ' + percentiles if percentiles else ''}, "
+                     f"{s['timeouts']} timeout(s), {s['errors']} error(s), "
+                     f"{s['hedged']} hedged ({s['hedge_wins']} won)")
+    return "\n".join(lines) or "no requests sent"
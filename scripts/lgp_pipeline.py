@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Local pipeline analytics cube.
+
+GET /api/analytics/pipeline answers one date range per call, so dashboards
+asking for many overlapping ranges re-fetch the same days again and again.
+The cube stores one rollup per (day, client) in SQLite and answers any range
+by merging the daily rollups it holds; only the days it is missing are
+fetched, one single-day call each, a few in flight at a time.
+
+Days older than SETTLED_DAYS are kept until cleared. Recent days may still
+change and are re-fetched once older than RECENT_TTL.
+
+Merging is additive: counts are summed (recursively through objects, and by
+identity key through lists of objects such as per-stage breakdowns). Ratios
+and averages cannot be summed from daily values, so they are left out of the
+merged result and listed under "_omitted".
+
+The response does not say which metrics are additive, and key names are
+only a guess: a snapshot (active campaigns) or a distinct count (unique
+leads) would be summed as well. So the cube is opt-in (`lgp pipeline
+--cube`) for dashboards that read per-day counts; plain `lgp pipeline` asks
+the API for the range itself.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import lgp_json
+from lgp_cache import CACHE_DIR
+
+PIPELINE_DB = os.path.join(CACHE_DIR, "pipeline.sqlite")
+SETTLED_DAYS = 2       # days older than this no longer change
+RECENT_TTL = 600       # seconds before a recent day is re-fetched (matches the response cache)
+FETCH_CONCURRENCY = 6
+
+# Numbers under these keys are not additive across days.
+NON_ADDITIVE = re.compile(r"rate|ratio|percent|pct|avg|average|mean|median", re.I)
+# Keys identifying the items of a breakdown list, tried in order.
+IDENTITY_KEYS = ("id", "stage", "status", "name", "key", "client_id", "campaignId", "source")
+# Echoed range fields, rewritten to the merged range.
+RANGE_KEYS = {"startDate": 0, "endDate": 1}
+
+
+def parse_day(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def day_range(start: str, end: str) -> List[str]:
+    first, last = parse_day(start), parse_day(end)
+    if first > last:
+        raise ValueError(f"start date {start} is after end date {end}")
+    return [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+
+def _identity(items: List[Any]) -> Optional[str]:
+    if not items or not all(isinstance(i, dict) for i in items):
+        return None
+    return next((k for k in IDENTITY_KEYS if all(k in i for i in items)), None)
+
+
+def _merge_into(target: Dict[str, Any], source: Dict[str, Any], omitted: set, path: str = ""):
+    for key, value in source.items():
+        where = f"{path}.{key}" if path else key
+        if isinstance(value, bool) or value is None or isinstance(value, str):
+            target[key] = value
+        elif isinstance(value, (int, float)):
+            if NON_ADDITIVE.search(key):
+                omitted.add(where)
+                continue
+            current = target.get(key)
+            target[key] = value + current if isinstance(current, (int, float)) and not isinstance(current, bool) else value
+        elif isinstance(value, dict):
+            current = target.get(key)
+            if not isinstance(current, dict):
+                current = target[key] = {}
+            _merge_into(current, value, omitted, where)
+        elif isinstance(value, list):
+            target[key] = _merge_list(target.get(key), value, omitted, where)
+        else:
+            target[key] = value
+
+
+def _merge_list(current: Optional[List[Any]], items: List[Any], omitted: set, path: str) -> List[Any]:
+    current = list(current) if isinstance(current, list) else []
+    key = _identity(current + items)
+    if key is None:
+        return current + items
+    index = {item[key]: item for item in current}
+    for item in items:
+        existing = index.get(item[key])
+        if existing is None:
+            existing = index[item[key]] = {}
+            current.append(existing)
+        _merge_into(existing, item, omitted, f"{path}[]")
+    return current
+
+
+def merge(rollups: List[Dict[str, Any]], start: str = None, end: str = None) -> Dict[str, Any]:
+    """Additive merge of daily rollups (see module docstring)."""
+    merged: Dict[str, Any] = {}
+    omitted: set = set()
+    for rollup in rollups:
+        _merge_into(merged, rollup, omitted)
+    for key, pos in RANGE_KEYS.items():
+        if key in merged:
+            merged[key] = (start, end)[pos]
+    if omitted:
+        merged["_omitted"] = sorted(omitted)
+    return merged
+
+
+class PipelineCube:
+    """Daily pipeline rollups per tenant and client. Safe to share between threads.
+
+    `fetch_day(day, client_id)` returns the API metrics for that single day
+    (client_id is None for the whole tenant) and raises on failure.
+    """
+
+    def __init__(self, scope: str, fetch_day: Callable[[str, Optional[str]], Dict[str, Any]],
+                 path: str = None, concurrency: int = FETCH_CONCURRENCY):
+        self.scope = scope
+        self.fetch_day = fetch_day
+        self.path = path or PIPELINE_DB
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS days (
+                scope TEXT NOT NULL,
+                client_id TEXT NOT NULL,
+                day TEXT NOT NULL,
+                body BLOB NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (scope, client_id, day)
+            ) WITHOUT ROWID
+        """)
+        self._db.commit()
+
+    @staticmethod
+    def _settled(day: str, now: float) -> bool:
+        return parse_day(day) < date.fromtimestamp(now) - timedelta(days=SETTLED_DAYS)
+
+    def _cached(self, days: List[str], client_id: str, now: float) -> Dict[str, bytes]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT day, body, fetched_at FROM days WHERE scope = ? AND client_id = ? AND day BETWEEN ? AND ?",
+                (self.scope, client_id, days[0], days[-1]),
+            ).fetchall()
+        return {day: body for day, body, fetched_at in rows
+                if self._settled(day, fetched_at) or now - fetched_at < RECENT_TTL}
+
+    def _store(self, rows: List[Tuple[str, str, bytes, float]]):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?, ?)", [(self.scope,) + row for row in rows]
+            )
+            self._db.commit()
+
+    def query(self, start: str, end: str, client_id: str = None, refresh: bool = False) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """(merged metrics for start..end inclusive, {"days", "cached", "fetched"})."""
+        days = day_range(start, end)
+        now = time.time()
+        key = client_id or ""
+        cached = {} if refresh else self._cached(days, key, now)
+        missing = [d for d in days if d not in cached]
+
+        fetched, errors = {}, []
+
+        def fetch(day):
+            try:
+                fetched[day] = lgp_json.dumps(self.fetch_day(day, client_id))
+            except Exception as e:
+                errors.append(f"{day}: {e}")
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.concurrency, len(missing)))) as pool:
+                list(pool.map(fetch, missing))
+            # Keep the days that did arrive so a retry only fetches the rest.
+            self._store([(key, d, body, now) for d, body in fetched.items()])
+        if errors:
+            raise Exception(f"{len(errors)} day(s) could not be fetched ({errors[0]})")
+
+        bodies = {**cached, **fetched}
+        rollups = [lgp_json.loads(bodies[d]) for d in days]
+        return merge(rollups, start, end), {"days": len(days), "cached": len(cached), "fetched": len(fetched)}
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = self._db.execute("DELETE FROM days WHERE scope = ?", (self.scope,)).rowcount
+            self._db.commit()
+        return removed
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+`--profile` support for the lgp scripts.
+
+    lgp --profile leads list --client acme-corp
+    python3 scripts/import_csv.py --input leads.csv --client acme --profile /tmp/import.txt
+
+While a profiled run executes:
+
+- cProfile records every thread (worker pools included), or pyinstrument
+  samples the main thread when it is installed and LGP_PROFILER=sampling;
+- wall-clock time is split into network wait (HTTP adapter send and response
+  body reads), sleeps (RateLimiter pacing vs retry backoff) and CPU time;
+- tracemalloc tracks peak Python memory.
+
+At exit a report is written (default lgp-profile-<script>-<time>.txt, plus a
+.prof dump loadable by pstats/snakeviz for cProfile runs) and a short summary
+goes to stderr. The summary attributes profiled time to categories (JSON,
+TLS, socket I/O, parsing, compression, SQLite, sleeps, lock waits) so it is
+clear at a glance whether a slow run is bound by the API, the rate limit or
+local work. Profiling adds overhead (tracemalloc especially); compare
+profiled runs with each other, not with unprofiled ones.
+"""
+
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+try:
+    import pyinstrument
+except ImportError:  # optional: sampling profiler for LGP_PROFILER=sampling
+    pyinstrument = None
+
+TOP_FUNCTIONS = 30
+# (category, substrings of a pstats "file:line(function)" key). First match wins.
+CATEGORIES = (
+    ("sleep", ("time.sleep",)),
+    ("lock/thread waits", ("_thread.lock", "_thread.RLock", "_queue.", "threading.py", "concurrent/futures")),
+    ("TLS", ("ssl.py", "_ssl.")),
+    ("socket I/O", ("socket.py", "_socket.", "select.", "selectors.py")),
+    ("JSON", ("json/", "orjson", "lgp_json.py")),
+    ("compression", ("gzip.py", "zlib", "brotli", "zstandard")),
+    ("parsing", ("csv.py", "_csv.", "pyarrow", "lead_mapping.py", "lead_record.py", "lead_notes.py", "re/_", "_sre")),
+    ("SQLite", ("sqlite3",)),
+    ("HTTP stack", ("requests/", "urllib3/", "urllib/", "http/client.py", "email/")),
+    ("environment/filesystem", ("<frozen os>", "posix.", "genericpath.py", "posixpath.py")),
+)
+
+_active: Optional["Profiler"] = None
+
+
+def add_profile_argument(parser):
+    parser.add_argument("--profile", nargs="?", const="", metavar="REPORT",
+                        help="Profile the run (CPU, network/sleep/CPU time split, peak memory) and write "
+                             "a report (default: lgp-profile-<script>-<time>.txt)")
+
+
+def start(path: Optional[str], label: str) -> Optional["Profiler"]:
+    """Start profiling when `path` is set (the value of --profile); the report is written at exit."""
+    global _active
+    if path is None or _active is not None:
+        return _active
+    _active = Profiler(path or f"lgp-profile-{label}-{time.strftime('%Y%m%d-%H%M%S')}.txt", label)
+    _active.start()
+    atexit.register(_active.stop)
+    return _active
+
+
+def _category(key: str) -> str:
+    for name, needles in CATEGORIES:
+        if any(n in key for n in needles):
+            return name
+    return "other"
+
+
+def _key(func) -> str:
+    filename, line, name = func
+    return f"{name}" if filename == "~" else f"{filename}:{line}({name})"
+
+
+class _Timers:
+    """Thread-safe accumulators for the wall-clock split, fed by the patched functions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.seconds: Dict[str, float] = {"network": 0.0, "rate limit": 0.0, "backoff/other sleeps": 0.0}
+        self.requests = 0
+
+    def wrap(self, func, bucket, count=False):
+        timers = self
+
+        def timed(*args, **kwargs):
+            # Nested timed calls (a read inside a send) are counted once, by the outermost.
+            if getattr(timers._local, "depth", 0):
+                return func(*args, **kwargs)
+            timers._local.depth = 1
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timers._local.depth = 0
+                name = bucket(sys._getframe(1)) if callable(bucket) else bucket
+                with timers._lock:
+                    timers.seconds[name] += time.perf_counter() - started
+                    timers.requests += count
+        timed.__wrapped__ = func
+        return timed
+
+
+def _sleep_bucket(frame) -> str:
+    limiter = os.path.basename(frame.f_code.co_filename) in ("lgp_http.py", "lgp_scheduler.py")
+    return "rate limit" if limiter else "backoff/other sleeps"
+
+
+class Profiler:
+    def __init__(self, path: str, label: str):
+        self.path = path
+        self.label = label
+        self.sampling = os.environ.get("LGP_PROFILER") == "sampling" and pyinstrument is not None
+        self.timers = _Timers()
+        self._profiles: List[cProfile.Profile] = []
+        self._patched = []
+        self._sampler = None
+        self._stopped = False
+
+    # ── Lifecycle ───────────────────────────────────────────────────────────
+    def start(self):
+        tracemalloc.start()
+        self._patch()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        if self.sampling:
+            self._sampler = pyinstrument.Profiler()
+            self._sampler.start()
+        elif sys.version_info >= (3, 12):
+            # cProfile sits on sys.monitoring, which sees every thread; one profiler at a time.
+            self._thread_profile()
+        else:
+            threading.setprofile(self._thread_profile)
+            self._thread_profile()
+
+    def _thread_profile(self, *_):
+        # Installed for new threads by threading.setprofile; enable() replaces this hook
+        # with the thread's own profiler.
+        profile = cProfile.Profile()
+        self._profiles.append(profile)
+        profile.enable()
+
+    def stop(self):
+        if self._stopped:
+            return
+        self._stopped = True
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        if self._sampler:
+            self._sampler.stop()
+        else:
+            threading.setprofile(None)
+            self._profiles[0].disable()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self._unpatch()
+        try:
+            summary = self._write_report(wall, cpu, peak)
+        except OSError as e:
+            summary = f"could not write {self.path}: {e}"
+        print(f"Profile: {summary}", file=sys.stderr)
+
+    # ── Timing hooks ────────────────────────────────────────────────────────
+    def _patch(self):
+        targets = [(time, "sleep", _sleep_bucket, False)]
+        try:
+            from requests.adapters import HTTPAdapter
+            from urllib3.response import HTTPResponse
+            targets += [(HTTPAdapter, "send", "network", True), (HTTPResponse, "read", "network", False)]
+        except ImportError:
+            pass
+        for owner, name, bucket, count in targets:
+            original = getattr(owner, name)
+            self._patched.append((owner, name, original))
+            setattr(owner, name, self.timers.wrap(original, bucket, count))
+
+    def _unpatch(self):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+    # ── Report ──────────────────────────────────────────────────────────────
+    def _stats(self) -> Optional[pstats.Stats]:
+        stats = None
+        for profile in self._profiles:
+            try:
+                profile.create_stats()
+            except Exception:
+                continue
+            if profile.stats:
+                stats = pstats.Stats(profile) if stats is None else stats.add(profile)
+        return stats
+
+    def _write_report(self, wall: float, cpu: float, peak: int) -> str:
+        seconds = self.timers.seconds
+        lines = [f"lgp profile: {self.label} {' '.join(sys.argv[1:])}",
+                 f"Wall {wall:.2f}s | CPU {cpu:.2f}s ({cpu / wall:.0%} of wall) | peak Python memory "
+                 f"{peak / 1e6:.1f} MB", "",
+                 "Wall-clock split (network and sleeps are summed over threads, so they can exceed wall):",
+                 f"  network wait        {seconds['network']:8.2f}s over {self.timers.requests} request(s)",
+                 f"  rate-limit sleeps   {seconds['rate limit']:8.2f}s",
+                 f"  backoff/other sleep {seconds['backoff/other sleeps']:8.2f}s",
+                 f"  CPU (all threads)   {cpu:8.2f}s", ""]
+        categories: Dict[str, float] = {}
+        stats = None
+        if self._sampler:
+            lines.append(self._sampler.output_text(unicode=True, color=False))
+        else:
+            stats = self._stats()
+        if stats is not None:
+            for func, (_, _, tottime, _, _) in stats.stats.items():
+                name = _category(_key(func))
+                categories[name] = categories.get(name, 0.0) + tottime
+            total = sum(categories.values()) or 1.0
+            lines.append(f"Profiled time by category ({len(self._profiles)} thread(s), own time per function):")
+            for name, value in sorted(categories.items(), key=lambda kv: -kv[1]):
+                lines.append(f"  {name:<24}{value:8.2f}s  {value / total:6.1%}")
+            for sort in ("tottime", "cumulative"):
+                out = io.StringIO()
+                stats.stream = out
+                stats.sort_stats(sort).print_stats(TOP_FUNCTIONS)
+                lines += ["", f"Top {TOP_FUNCTIONS} functions by {sort}:", out.getvalue().strip()]
+            stats.dump_stats(os.path.splitext(self.path)[0] + ".prof")
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+        # Idle pool threads park on locks for the whole run; leave them out of the headline.
+        busiest = sorted(((v, n) for n, v in categories.items() if n != "lock/thread waits"), reverse=True)[:3]
+        top = ", ".join(f"{name} {value:.1f}s" for value, name in busiest)
+        return (f"wall {wall:.2f}s, CPU {cpu:.2f}s, network {seconds['network']:.2f}s, "
+                f"sleeps {seconds['rate limit'] + seconds['backoff/other sleeps']:.2f}s, "
+                f"peak {peak / 1e6:.1f} MB" + (f"; top: {top}" if top else "") + f" -> {self.path}")
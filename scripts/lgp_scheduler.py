@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+One API rate budget shared by interactive, normal and bulk work.
+
+A standard-tier key gets about 100 requests/min. Left alone, a background
+import takes every one of them and an agent's `lgp leads find` waits behind
+thousands of POSTs. With LGP_RATE_BUDGET set (requests/min), every
+RateLimiter created with a `priority` draws its tokens from one Scheduler per
+credential scope, and the scheduler hands tokens out by weighted fair queuing
+between the classes that are waiting:
+
+    interactive  16   lgp CLI commands (agents)
+    normal        4   library calls, webhook flushes
+    bulk          1   imports, bulk updates, email verification
+
+Each grant charges its class 1/weight of virtual service. The next token goes
+to the waiting class that has received the least service. A class that was
+idle re-enters at the current virtual time, so it gets no credit for the
+idle period. With all three classes busy, bulk still gets 1/21 of the
+budget. An interactive request waits at most about one token interval.
+
+Across processes: with LGP_RATE_SHARED=1 (or a file path), the bucket, the
+per-class service and every process's queue depths live in a small JSON
+file under the cache directory, updated under a file lock (flock, or msvcrt
+on Windows). Imports, CLI calls and library users on one machine then share
+the budget and its priorities.
+Commands forwarded to `lgp serve` already share the daemon's in-process
+scheduler.
+
+metrics() reports per-class queue depth, grants and waiting time; `lgp serve
+--status` and LGP_SCHEDULER_STATS=1 print them.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+PRIORITIES = ("interactive", "normal", "bulk")
+DEFAULT_WEIGHTS = {"interactive": 16, "normal": 4, "bulk": 1}
+SHARED_POLL = 0.02     # seconds between checks while another process's class has the turn
+SHARED_MAX_WAIT = 1.0  # cap on one sleep, so queue depths are re-published at least this often
+OWNER_TIMEOUT = 10.0   # a process whose queue entry is older than this is treated as gone
+
+
+def _new_state(capacity: float, now: float) -> Dict[str, Any]:
+    return {"tokens": capacity, "updated": now, "served": {}, "waiting": {}}
+
+
+class _MemoryStore:
+    """Scheduler state for one process; waiters sleep on a condition variable."""
+
+    shared = False
+
+    def __init__(self, capacity: float):
+        self.owner = "local"
+        self._cond = threading.Condition()
+        self._state = _new_state(capacity, self.now())
+
+    def now(self) -> float:
+        return time.monotonic()
+
+    @contextmanager
+    def transaction(self):
+        with self._cond:
+            yield self._state
+
+    def wait(self, delay: float):
+        with self._cond:
+            self._cond.wait(delay)
+
+    def notify(self):
+        with self._cond:
+            self._cond.notify_all()
+
+
+def _lock_file(f, unlock: bool = False):
+    """Exclusive lock on an open state file: flock on POSIX, msvcrt on Windows (first byte).
+
+    Imported lazily: fcntl does not exist on Windows, and every script imports
+    this module through lgp_http.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK if unlock else msvcrt.LK_LOCK, 1)
+        return
+    fcntl.flock(f, fcntl.LOCK_UN if unlock else fcntl.LOCK_EX)
+
+
+class _FileStore:
+    """Scheduler state in a JSON file shared by every process using it (file lock + an in-process lock)."""
+
+    shared = True
+
+    def __init__(self, path: str, capacity: float):
+        self.path = path
+        self.owner = str(os.getpid())
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+
+    def now(self) -> float:
+        return time.time()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock, open(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600), "r+") as f:
+            _lock_file(f)
+            try:
+                try:
+                    state = json.loads(f.read() or "null") or _new_state(self.capacity, self.now())
+                except ValueError:
+                    state = _new_state(self.capacity, self.now())
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+            finally:
+                _lock_file(f, unlock=True)
+
+    def wait(self, delay: float):
+        time.sleep(min(delay, SHARED_MAX_WAIT))
+
+    def notify(self):
+        pass
+
+
+class Scheduler:
+    """Token bucket of `per_minute` whose tokens are shared out between priority classes."""
+
+    def __init__(self, per_minute: float, burst: int = None, weights: Dict[str, float] = None,
+                 shared_path: str = None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or max(1, int(self.rate)))
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.store = _FileStore(shared_path, self.capacity) if shared_path else _MemoryStore(self.capacity)
+        self._stats_lock = threading.Lock()
+        self._stats = {c: {"waiting": 0, "granted": 0, "wait_seconds": 0.0, "max_wait": 0.0} for c in self.weights}
+
+    # ── State transitions (called inside a store transaction) ───────────────
+    def _backlog(self, state: Dict[str, Any], now: float) -> Dict[str, int]:
+        """Waiting requests per class, over every live process."""
+        totals: Dict[str, int] = {}
+        for owner, entry in list(state["waiting"].items()):
+            if now - entry["ts"] > OWNER_TIMEOUT and owner != self.store.owner:
+                del state["waiting"][owner]
+                continue
+            for cls, count in entry["counts"].items():
+                if count > 0:
+                    totals[cls] = totals.get(cls, 0) + count
+        return totals
+
+    def _join(self, state: Dict[str, Any], now: float, priority: str):
+        served = state["served"]
+        backlog = self._backlog(state, now)
+        if not backlog.get(priority):
+            # Re-entering class: start at the virtual time of those already waiting (or of the
+            # last grant), never below its own, so idle time earns no credit.
+            others = [served.get(c, 0.0) for c in backlog] or list(served.values()) or [0.0]
+            served[priority] = max(served.get(priority, 0.0), min(others))
+        entry = state["waiting"].setdefault(self.store.owner, {"ts": now, "counts": {}})
+        entry["counts"][priority] = entry["counts"].get(priority, 0) + 1
+        entry["ts"] = now
+
+    def _leave(self, state: Dict[str, Any], priority: str):
+        entry = state["waiting"].get(self.store.owner)
+        if entry and entry["counts"].get(priority):
+            entry["counts"][priority] -= 1
+
+    def _take(self, state: Dict[str, Any], now: float, priority: str) -> Optional[float]:
+        """Grant a token to `priority` if it is its turn; otherwise the seconds to wait before retrying."""
+        state["tokens"] = min(self.capacity, state["tokens"] + max(0.0, now - state["updated"]) * self.rate)
+        state["updated"] = now
+        entry = state["waiting"].setdefault(self.store.owner, {"ts": now, "counts": {}})
+        entry["ts"] = now
+        entry["counts"].setdefault(priority, 1)  # re-register if a stale sweep dropped us
+        served = state["served"]
+        backlog = self._backlog(state, now)
+        turn = min(backlog, key=lambda c: (served.get(c, 0.0), PRIORITIES.index(c) if c in PRIORITIES else 99))
+        if state["tokens"] < 1:
+            return (1 - state["tokens"]) / self.rate
+        if turn != priority:
+            return SHARED_POLL if self.store.shared else 1 / self.rate
+        state["tokens"] -= 1
+        served[priority] = served.get(priority, 0.0) + 1.0 / self.weights[priority]
+        entry["counts"][priority] -= 1
+        return None
+
+    # ── Public API ──────────────────────────────────────────────────────────
+    def acquire(self, priority: str = "normal") -> float:
+        """Block until `priority` is granted a token. Returns the seconds spent waiting."""
+        if priority not in self.weights:
+            raise ValueError(f"unknown priority '{priority}' (expected one of {', '.join(self.weights)})")
+        started = time.monotonic()
+        with self._stats_lock:
+            self._stats[priority]["waiting"] += 1
+        granted = False
+        try:
+            with self.store.transaction() as state:
+                self._join(state, self.store.now(), priority)
+            while True:
+                with self.store.transaction() as state:
+                    delay = self._take(state, self.store.now(), priority)
+                if delay is None:
+                    granted = True
+                    break
+                self.store.wait(delay)
+        finally:
+            if not granted:
+                with self.store.transaction() as state:
+                    self._leave(state, priority)
+            waited = time.monotonic() - started
+            with self._stats_lock:
+                stats = self._stats[priority]
+                stats["waiting"] -= 1
+                if granted:
+                    stats["granted"] += 1
+                    stats["wait_seconds"] += waited
+                    stats["max_wait"] = max(stats["max_wait"], waited)
+            # Another class may have the turn now.
+            self.store.notify()
+        return waited
+
+    def metrics(self) -> Dict[str, Any]:
+        """Per-class queue depth (this process and, when shared, all processes), grants and waits."""
+        with self._stats_lock:
+            classes = {c: dict(s, avg_wait=round(s["wait_seconds"] / s["granted"], 3) if s["granted"] else 0.0)
+                       for c, s in self._stats.items()}
+        with self.store.transaction() as state:
+            backlog = self._backlog(state, self.store.now())
+            tokens = state["tokens"]
+        for cls, stats in classes.items():
+            stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+            stats["max_wait"] = round(stats["max_wait"], 3)
+            if self.store.shared:
+                stats["waiting_all"] = backlog.get(cls, 0)
+        return {"per_minute": round(self.rate * 60, 1), "tokens": round(tokens, 2),
+                "shared": getattr(self.store, "path", None), "classes": classes}
+
+
+_budgets: Dict[str, Scheduler] = {}
+_budgets_lock = threading.Lock()
+
+
+def budget(scope: str = None, env=None) -> Optional[Scheduler]:
+    """The process's Scheduler for a credential scope, or None when LGP_RATE_BUDGET is unset.
+
+    `scope` defaults to LGP_USER_ID. The same scope gets the same scheduler, so
+    every limiter of one account shares its budget. With LGP_RATE_SHARED the
+    state file is keyed by scope too.
+    """
+    env = os.environ if env is None else env
+    try:
+        per_minute = float(env.get("LGP_RATE_BUDGET") or 0)
+    except ValueError:
+        per_minute = 0
+    if per_minute <= 0:
+        return None
+    scope = scope or env.get("LGP_USER_ID") or "default"
+    shared = env.get("LGP_RATE_SHARED") or ""
+    path = None
+    if shared.lower() in ("1", "true", "yes"):
+        cache_dir = env.get("LGP_CACHE_DIR") or os.path.expanduser("~/.leadgenius_cache")
+        path = os.path.join(cache_dir, f"ratebudget-{hashlib.sha256(scope.encode('utf-8')).hexdigest()[:16]}.json")
+    elif shared and shared.lower() not in ("0", "false", "no"):
+        path = shared
+    key = f"{scope}|{per_minute}|{path}"
+    with _budgets_lock:
+        if key not in _budgets:
+            _budgets[key] = Scheduler(per_minute, shared_path=path)
+        return _budgets[key]
+
+
+def all_metrics() -> Dict[str, Any]:
+    """metrics() of every scheduler this process has created, by scope."""
+    with _budgets_lock:
+        budgets = dict(_budgets)
+    return {key.split("|")[0]: scheduler.metrics() for key, scheduler in budgets.items()}
+
+
+def summary() -> str:
+    parts = []
+    for scope, m in all_metrics().items():
+        classes = ", ".join(f"{c} {s['granted']} granted / avg wait {s['avg_wait']:.2f}s / max {s['max_wait']:.2f}s"
+                            for c, s in m["classes"].items() if s["granted"] or s["waiting"])
+        parts.append(f"{scope} ({m['per_minute']:g}/min): {classes or 'idle'}")
+    return "; ".join(parts) or "no rate budget (LGP_RATE_BUDGET unset)"
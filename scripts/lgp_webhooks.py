@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Inbound webhook receiver for outreach platforms (`lgp webhooks serve`).
+
+Campaign launches send tens of thousands of open/click/reply events within
+minutes, many of them for the same lead. The receiver:
+
+- accepts POST /hooks/<platform> (heyreach, woodpecker, lemlist, generic) on
+  a small asyncio HTTP server and parses the body with a per-platform adapter
+  into normalized events (email or lead id, kind, timestamp);
+- appends the events to a durable SQLite queue before answering 202, so a
+  crash or restart loses nothing (pending events are reloaded on start);
+- coalesces the events of each lead for `window` seconds into one update:
+  the latest event type and time, plus the strongest engagement seen so far
+  (engagement never downgrades, e.g. an open after a reply). Events keyed
+  by lead id and by email are merged once both resolve to the same lead,
+  and the engagement is stored per lead id;
+- flushes due updates as batched PUT /api/leads calls, concurrently and
+  rate limited; failed batches are retried with backoff.
+
+Lead updates set engagementStatus, lastEngagementType and lastEngagementAt.
+Events that carry only an email are matched to lead ids through the
+`resolve_ids` callable. Ids are cached in the queue database; emails with no
+lead are re-checked after UNMATCHED_TTL, and their events are dropped.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import signal
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import lgp_json
+from lgp_cache import CACHE_DIR
+from lgp_http import RateLimiter
+
+WEBHOOK_DB = os.path.join(CACHE_DIR, "webhooks.sqlite")
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8787
+COALESCE_WINDOW = 5.0   # seconds a lead's events are held before one update is sent
+FLUSH_BATCH = 50        # leads per batch PUT (see SKILL.md "Batch Update Payload")
+FLUSH_ROUND = 1000      # leads per flush round, so a flood drains in steady steps
+UNMATCHED_TTL = 3600    # seconds an email with no lead is remembered as such
+MAX_BODY_BYTES = 1024 * 1024
+RETRY_BACKOFF = (5, 15, 60, 300)
+PLATFORMS = ("heyreach", "woodpecker", "lemlist", "generic")
+
+# Normalized event kinds by engagement strength; the strongest seen is kept.
+ENGAGEMENT_RANK = {
+    "sent": 1, "open": 2, "click": 3, "connection_accepted": 3,
+    "reply": 4, "interested": 5, "not_interested": 5, "bounce": 6, "unsubscribe": 6,
+}
+
+# Platform event names (lowercased, letters only) -> normalized kind.
+EVENT_ALIASES = {
+    "sent": "sent", "emailsent": "sent", "emailssent": "sent", "messagesent": "sent",
+    "open": "open", "opened": "open", "emailopened": "open", "emailsopened": "open",
+    "click": "click", "clicked": "click", "linkclicked": "click", "emailsclicked": "click",
+    "reply": "reply", "replied": "reply", "emailsreplied": "reply", "prospectreplied": "reply",
+    "messagereplyreceived": "reply", "everymessagereplyreceived": "reply", "linkedinreplied": "reply",
+    "bounce": "bounce", "bounced": "bounce", "emailsbounced": "bounce", "prospectbounced": "bounce",
+    "unsubscribe": "unsubscribe", "unsubscribed": "unsubscribe", "emailsunsubscribed": "unsubscribe",
+    "prospectoptout": "unsubscribe", "optout": "unsubscribe",
+    "interested": "interested", "emailsinterested": "interested", "leadinterested": "interested",
+    "notinterested": "not_interested", "emailsnotinterested": "not_interested",
+    "connectionrequestaccepted": "connection_accepted", "linkedininviteaccepted": "connection_accepted",
+}
+
+
+def _kind(raw: Any) -> Optional[str]:
+    if not isinstance(raw, str):
+        return None
+    return EVENT_ALIASES.get("".join(c for c in raw.lower() if c.isalpha()))
+
+
+def _first(item: Dict[str, Any], *paths: str) -> Any:
+    """First non-empty value among dotted paths ("lead.email")."""
+    for path in paths:
+        value: Any = item
+        for part in path.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _event(platform: str, email: Any, kind: Optional[str], at: Any, lead_id: Any = None) -> Optional[Dict[str, Any]]:
+    email = email.strip().lower() if isinstance(email, str) else None
+    if not kind or not (email or lead_id):
+        return None
+    if isinstance(at, (int, float)):
+        at = datetime.fromtimestamp(at / 1000 if at > 1e11 else at, timezone.utc).isoformat()
+    at = at if isinstance(at, str) and at else datetime.now(timezone.utc).isoformat()
+    return {"key": f"id:{lead_id}" if lead_id else email, "email": email, "lead_id": lead_id,
+            "kind": kind, "at": at, "platform": platform}
+
+
+# ── Platform adapters (one raw event dict -> normalized event or None) ──────
+
+def parse_lemlist(item: Dict[str, Any]):
+    return _event("lemlist", _first(item, "leadEmail", "email", "lead.email"), _kind(item.get("type")),
+                  _first(item, "createdAt", "date"))
+
+
+def parse_woodpecker(item: Dict[str, Any]):
+    return _event("woodpecker", _first(item, "prospect.email", "email"),
+                  _kind(_first(item, "event", "type", "status")), _first(item, "timestamp", "created", "date"))
+
+
+def parse_heyreach(item: Dict[str, Any]):
+    return _event("heyreach", _first(item, "lead.email_address", "lead.emailAddress", "lead.email", "email"),
+                  _kind(_first(item, "event_type", "eventType", "type")),
+                  _first(item, "timestamp", "created_at", "createdAt"))
+
+
+def parse_generic(item: Dict[str, Any]):
+    return _event("generic", _first(item, "email", "lead.email"), _kind(_first(item, "event", "type", "kind")),
+                  _first(item, "timestamp", "at", "createdAt", "date"), _first(item, "lead_id", "leadId", "lead.id"))
+
+
+ADAPTERS = {
+    "heyreach": parse_heyreach,
+    "woodpecker": parse_woodpecker,
+    "lemlist": parse_lemlist,
+    "generic": parse_generic,
+}
+
+
+def parse_events(platform: str, payload: Any) -> List[Dict[str, Any]]:
+    """Normalized events from a webhook body (a single event, a list, or {"events"/"data": [...]})."""
+    if isinstance(payload, dict):
+        batch = payload.get("events") if isinstance(payload.get("events"), list) else payload.get("data")
+        items = batch if isinstance(batch, list) else [payload]
+    elif isinstance(payload, list):
+        items = payload
+    else:
+        items = []
+    adapter = ADAPTERS[platform]
+    return [e for e in (adapter(i) for i in items if isinstance(i, dict)) if e]
+
+
+# ── Durable queue ───────────────────────────────────────────────────────────
+
+class EventQueue:
+    """SQLite journal of received events plus per-lead engagement and id caches.
+
+    Not thread-safe: the receiver calls it from a single worker thread.
+    """
+
+    def __init__(self, scope: str, path: str = None):
+        self.scope = scope
+        self.path = path or WEBHOOK_DB
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                scope TEXT NOT NULL,
+                body TEXT NOT NULL,
+                received_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS events_scope ON events (scope, seq);
+            CREATE TABLE IF NOT EXISTS engagement (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                PRIMARY KEY (scope, key)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS lead_ids (
+                scope TEXT NOT NULL,
+                email TEXT NOT NULL,
+                lead_id TEXT,
+                checked_at REAL NOT NULL,
+                PRIMARY KEY (scope, email)
+            ) WITHOUT ROWID;
+        """)
+        self._db.commit()
+
+    def append(self, events: List[Dict[str, Any]]) -> List[int]:
+        """Journal events (committed before returning). Returns their sequence numbers."""
+        now = time.time()
+        seqs = []
+        with self._db:
+            for event in events:
+                cur = self._db.execute("INSERT INTO events (scope, body, received_at) VALUES (?, ?, ?)",
+                                       (self.scope, json.dumps(event), now))
+                seqs.append(cur.lastrowid)
+        return seqs
+
+    def pending(self) -> List[Tuple[int, Dict[str, Any]]]:
+        return [(seq, json.loads(body)) for seq, body in self._db.execute(
+            "SELECT seq, body FROM events WHERE scope = ? ORDER BY seq", (self.scope,))]
+
+    def done(self, seqs: Iterable[int]):
+        with self._db:
+            self._db.executemany("DELETE FROM events WHERE seq = ?", [(s,) for s in seqs])
+
+    def engagement(self, keys: List[str]) -> Dict[str, Tuple[int, str]]:
+        found = {}
+        for i in range(0, len(keys), 500):
+            part = keys[i:i + 500]
+            found.update((k, (r, kind)) for k, r, kind in self._db.execute(
+                f"SELECT key, rank, kind FROM engagement WHERE scope = ? AND key IN ({','.join('?' * len(part))})",
+                [self.scope, *part]))
+        return found
+
+    def set_engagement(self, rows: List[Tuple[str, int, str]]):
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO engagement VALUES (?, ?, ?, ?)",
+                                 [(self.scope, k, r, kind) for k, r, kind in rows])
+
+    def lead_ids(self, emails: List[str]) -> Dict[str, Optional[str]]:
+        """Cached {email: lead id}; None marks a recent "no such lead" answer."""
+        found = {}
+        expired = time.time() - UNMATCHED_TTL
+        for i in range(0, len(emails), 500):
+            part = emails[i:i + 500]
+            found.update((email, lead_id) for email, lead_id, checked_at in self._db.execute(
+                f"SELECT email, lead_id, checked_at FROM lead_ids WHERE scope = ? "
+                f"AND email IN ({','.join('?' * len(part))})", [self.scope, *part])
+                if lead_id or checked_at > expired)
+        return found
+
+    def set_lead_ids(self, ids: Dict[str, Optional[str]]):
+        now = time.time()
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO lead_ids VALUES (?, ?, ?, ?)",
+                                 [(self.scope, e, i, now) for e, i in ids.items()])
+
+
+# ── Receiver ────────────────────────────────────────────────────────────────
+
+class WebhookReceiver:
+    """asyncio HTTP receiver + coalescing flusher.
+
+    `resolve_ids(emails)` returns {email: lead id or None} for emails not yet
+    cached; `push(updates)` sends one batch of lead updates and raises on
+    failure. Both are called from worker threads and should pace their API
+    calls with `self.limiter`.
+    """
+
+    def __init__(self, queue: EventQueue, resolve_ids: Callable[[List[str]], Dict[str, Optional[str]]],
+                 push: Callable[[List[Dict[str, Any]]], Any], secret: str = None,
+                 window: float = COALESCE_WINDOW, batch_size: int = FLUSH_BATCH,
+                 concurrency: int = 4, rate_per_minute: float = 0, max_pending: int = 20000, budget=None):
+        self.queue = queue
+        self.resolve_ids = resolve_ids
+        self.push = push
+        self.secret = secret
+        self.window = window
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.limiter = RateLimiter(rate_per_minute, burst=concurrency, priority="normal", budget=budget)
+        self._db_pool = ThreadPoolExecutor(max_workers=1)   # all queue access is serialized here
+        self._io_pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        self._pending: Dict[str, List[Tuple[int, Dict[str, Any]]]] = {}
+        self._due: Dict[str, float] = {}
+        self._attempts: Dict[str, int] = {}
+        self._flushing = False
+        self._resolving: set = set()
+        self._tasks: set = set()
+        self._stop: Optional[asyncio.Event] = None
+        self.started = time.time()
+        self.stats = {"requests": 0, "events": 0, "rejected": 0, "updates": 0, "batches": 0,
+                      "failed_batches": 0, "unmatched": 0}
+
+    async def _db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._db_pool, fn, *args)
+
+    # ── HTTP ────────────────────────────────────────────────────────────────
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                method, target, _ = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    raw = await reader.readline()
+                    if raw in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = raw.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if "chunked" in headers.get("transfer-encoding", "").lower():
+                    status, payload = 411, {"error": "Content-Length required"}
+                elif length > MAX_BODY_BYTES:
+                    status, payload = 413, {"error": "body too large"}
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self._route(method, target, headers, body)
+                data = json.dumps(payload).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close" and status not in (411, 413)
+                writer.write(
+                    f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        url = urlsplit(target)
+        if method == "GET" and url.path == "/health":
+            return 200, {**self.stats, "pending_leads": len(self._pending),
+                         "pending_events": sum(len(v) for v in self._pending.values()),
+                         "uptime": int(time.time() - self.started)}
+        parts = url.path.strip("/").split("/")
+        if method != "POST" or len(parts) != 2 or parts[0] != "hooks":
+            return 404, {"error": "not found"}
+        if parts[1] not in ADAPTERS:
+            return 404, {"error": f"unknown platform '{parts[1]}'", "platforms": list(PLATFORMS)}
+        if self.secret:
+            given = headers.get("x-webhook-secret") or parse_qs(url.query).get("secret", [""])[0]
+            if not hmac.compare_digest(given.encode(), self.secret.encode()):
+                return 401, {"error": "bad secret"}
+        self.stats["requests"] += 1
+        try:
+            payload = lgp_json.loads(body) if body else None
+        except ValueError:
+            return 400, {"error": "invalid JSON"}
+        events = parse_events(parts[1], payload)
+        if not events:
+            self.stats["rejected"] += 1
+            return 202, {"accepted": 0}
+        # Journaled before the 202: an accepted event survives a crash.
+        seqs = await self._db(self.queue.append, events)
+        self._add(zip(seqs, events))
+        self.stats["events"] += len(events)
+        return 202, {"accepted": len(events)}
+
+    def _add(self, entries: Iterable[Tuple[int, Dict[str, Any]]]):
+        now = time.monotonic()
+        for seq, event in entries:
+            key = event["key"]
+            if key not in self._pending:
+                self._pending[key] = []
+                self._due[key] = now + self.window
+            self._pending[key].append((seq, event))
+
+    # ── Flushing ────────────────────────────────────────────────────────────
+    async def _flusher(self):
+        tick = min(1.0, self.window / 2) or 0.1
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), tick)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    async def flush(self, everything: bool = False):
+        if self._flushing or not self._pending:
+            return
+        self._flushing = True
+        try:
+            now = time.monotonic()
+            overloaded = len(self._pending) >= self.max_pending
+            due = sorted((t, k) for k, t in self._due.items() if everything or overloaded or t <= now)
+            for i in range(0, len(due), FLUSH_ROUND):
+                await self._flush_keys([k for _, k in due[i:i + FLUSH_ROUND]])
+        finally:
+            self._flushing = False
+
+    async def _flush_keys(self, keys: List[str]):
+        loop = asyncio.get_running_loop()
+        groups = {k: self._pending.pop(k) for k in keys}
+        for k in keys:
+            self._due.pop(k, None)
+
+        # Lead ids come from the events or the id cache. Unknown emails are looked
+        # up in the background so they never hold back leads that are ready.
+        emails = [k for k in groups if not k.startswith("id:")]
+        ids = await self._db(self.queue.lead_ids, emails) if emails else {}
+        unknown = [e for e in emails if e not in ids]
+        if unknown:
+            self._requeue({e: groups.pop(e) for e in unknown})
+            fresh = [e for e in unknown if e not in self._resolving]
+            if fresh:
+                self._resolving.update(fresh)
+                self._tasks.add(asyncio.create_task(self._resolve(fresh)))
+        if not groups:
+            return
+
+        # Coalesce by resolved lead: events keyed by lead id and by email can be the same lead.
+        by_lead: Dict[str, List[str]] = {}
+        unmatched = []
+        for key, entries in groups.items():
+            events = [e for _, e in entries]
+            lead_id = next((e["lead_id"] for e in events if e["lead_id"]), None) or ids.get(events[0]["email"])
+            if not lead_id:
+                unmatched.extend(seq for seq, _ in entries)
+                continue
+            by_lead.setdefault(str(lead_id), []).append(key)
+        for lead_id, keys in by_lead.items():
+            # Events for the same lead id still waiting for their window go out with this update.
+            extra = f"id:{lead_id}"
+            if extra not in groups and extra in self._pending:
+                groups[extra] = self._pending.pop(extra)
+                self._due.pop(extra, None)
+                keys.append(extra)
+
+        # Engagement is stored per lead id ("id:<lead>"); older rows keyed by email still count.
+        ranks = await self._db(self.queue.engagement,
+                               list({*(f"id:{l}" for l in by_lead), *(k for ks in by_lead.values() for k in ks)}))
+        updates, keys_by_lead, engagement = [], {}, []
+        for lead_id, keys in by_lead.items():
+            events = [e for k in keys for _, e in groups[k]]
+            latest = max(events, key=lambda e: e["at"])
+            strongest = max(events, key=lambda e: ENGAGEMENT_RANK[e["kind"]])
+            rank, kind = max((ranks.get(k, (0, None)) for k in [f"id:{lead_id}", *keys]), key=lambda r: r[0])
+            if ENGAGEMENT_RANK[strongest["kind"]] > rank:
+                rank, kind = ENGAGEMENT_RANK[strongest["kind"]], strongest["kind"]
+            updates.append({"id": lead_id, "engagementStatus": kind,
+                            "lastEngagementType": latest["kind"], "lastEngagementAt": latest["at"]})
+            engagement.append((f"id:{lead_id}", rank, kind))
+            keys_by_lead[lead_id] = keys
+        if unmatched:
+            self.stats["unmatched"] += len(unmatched)
+            await self._db(self.queue.done, unmatched)
+
+        batches = [updates[i:i + self.batch_size] for i in range(0, len(updates), self.batch_size)]
+
+        def send(batch):
+            self.limiter.acquire()
+            try:
+                self.push(batch)
+                return True
+            except Exception:
+                return False
+
+        results = await asyncio.gather(*(loop.run_in_executor(self._io_pool, send, b) for b in batches))
+        flushed, retry = [], {}
+        for batch, ok in zip(batches, results):
+            self.stats["batches" if ok else "failed_batches"] += 1
+            for update in batch:
+                for key in keys_by_lead[update["id"]]:
+                    if ok:
+                        flushed.extend(seq for seq, _ in groups[key])
+                        self._attempts.pop(key, None)
+                    else:
+                        retry[key] = groups[key]
+            if ok:
+                self.stats["updates"] += len(batch)
+        failed_leads = {update["id"] for batch, ok in zip(batches, results) if not ok for update in batch}
+        ranks_done = [row for row in engagement if row[0][3:] not in failed_leads]
+        await self._db(self.queue.done, flushed)
+        await self._db(self.queue.set_engagement, ranks_done)
+        if retry:
+            self._requeue(retry)
+
+    async def _resolve(self, emails: List[str]):
+        loop = asyncio.get_running_loop()
+        try:
+            for i in range(0, len(emails), 100):
+                part = emails[i:i + 100]
+                resolved = await loop.run_in_executor(self._io_pool, self.resolve_ids, part)
+                # Emails with no lead are cached as None: a flood for non-leads costs one lookup each.
+                await self._db(self.queue.set_lead_ids, {e: resolved.get(e) for e in part})
+        except Exception:
+            pass    # still unknown; looked up again when their events come due
+        finally:
+            self._resolving.difference_update(emails)
+            self._tasks.discard(asyncio.current_task())
+
+    def _requeue(self, groups: Dict[str, List[Tuple[int, Dict[str, Any]]]]):
+        """Put events back with backoff; they stay journaled meanwhile."""
+        now = time.monotonic()
+        for key, entries in groups.items():
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+            self._pending.setdefault(key, [])[:0] = entries
+            self._due[key] = now + RETRY_BACKOFF[min(attempt, len(RETRY_BACKOFF) - 1)]
+
+    # ── Lifecycle ───────────────────────────────────────────────────────────
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, ready: Callable[[], None] = None):
+        """Run until cancelled; pending events are flushed best-effort on the way out."""
+        restored = await self._db(self.queue.pending)
+        self._add(restored)
+        server = await asyncio.start_server(self._handle, host, port)
+        self._stop = asyncio.Event()
+        flusher = asyncio.create_task(self._flusher())
+        try:
+            # SIGTERM stops like Ctrl-C: flush what is due, keep the rest journaled.
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, RuntimeError):
+            pass
+        if ready:
+            ready(len(restored))
+        try:
+            async with server:
+                await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # Let a running flush finish (its pushes are not interrupted), then flush the rest.
+            self._stop.set()
+            try:
+                await asyncio.wait_for(flusher, timeout=30)
+                await asyncio.wait_for(self.flush(everything=True), timeout=30)
+            except (asyncio.TimeoutError, Exception):
+                pass
+            for task in list(self._tasks):
+                task.cancel()
+            self._io_pool.shutdown(wait=False)
+            self._db_pool.shutdown(wait=True)
@@ -22,6 +22,8 @@ import sys
 import time
 import requests
 
+import lgp_profile
+
 # ─── Defaults ───────────────────────────────────────────────────────────────
 DEFAULT_BASE_URL = "https://last.leadgenius.app"
 AUTH_FILE = os.path.expanduser("~/.leadgenius_auth.json")
@@ -477,8 +479,10 @@ Examples:
     parser.add_argument("--password", required=True, help="Cognito password")
     parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help=f"API base URL (default: {DEFAULT_BASE_URL})")
     parser.add_argument("--skip-cleanup", action="store_true", help="Skip cleanup (leave test data)")
+    lgp_profile.add_profile_argument(parser)
     
     args = parser.parse_args()
+    lgp_profile.start(args.profile, "test_api")
     
     print(f"\n{BOLD}{'═'*60}")
     print(f"  LeadGenius Pro API — End-to-End Test Suite")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+lgp daemon — forwarding and shutdown tests
+==========================================
+Runs lgp_daemon.serve() on a scratch socket with stub runners and checks
+that a command the daemon accepted is never run a second time in-process,
+that neither the idle timeout nor `lgp serve --stop` cuts a running
+command short, and that `lgp` decides to forward without importing the
+feature modules the daemon already holds.
+
+Usage:
+  npm test                             (all unit tests)
+  python3 tests/test_daemon.py
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+sys.path.insert(0, SCRIPTS)
+
+import lgp  # noqa: E402
+import lgp_daemon  # noqa: E402
+
+
+def scratch_socket():
+    return os.path.join(tempfile.mkdtemp(prefix="lgp-daemon-test-"), "lgp.sock")
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class SlowRunner:
+    """Runner that records each command and takes `seconds` to finish it."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.calls = []
+        self.finished_at = None
+
+    def __call__(self, argv, env, cwd):
+        self.calls.append(argv)
+        time.sleep(self.seconds)
+        print("done")
+        self.finished_at = time.time()
+        return 0
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "lgp serve needs Unix domain sockets")
+class DaemonTest(unittest.TestCase):
+    def start(self, runner, idle_timeout=0):
+        """Serve on a scratch socket; self.stopped_at is when serve() returned (the process would exit)."""
+        path = scratch_socket()
+        self.stopped_at = None
+
+        def run():
+            lgp_daemon.serve(runner, path, idle_timeout)
+            self.stopped_at = time.time()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.assertTrue(wait_for(lambda: lgp_daemon.ping(path) is not None), "daemon did not start")
+        self.addCleanup(lambda: (lgp_daemon.shutdown(path), thread.join(10)))
+        return path, thread
+
+    def forward_in_background(self, path, argv):
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(code=lgp_daemon.forward(argv, path)))
+        thread.start()
+        return thread, result
+
+    def test_no_daemon_means_run_locally(self):
+        self.assertIsNone(lgp_daemon.forward(["leads", "list"], scratch_socket()))
+
+    def test_dropped_connection_is_an_error_not_a_fallback(self):
+        # A "daemon" that accepts the command and hangs up without answering.
+        path = scratch_socket()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen(1)
+        received = []
+
+        def accept_and_drop():
+            conn, _ = listener.accept()
+            received.append(conn.makefile("rb").readline())
+            conn.close()
+        threading.Thread(target=accept_and_drop, daemon=True).start()
+        try:
+            code = lgp_daemon.forward(["leads", "set-status", "--ids", "L1", "L2", "--status", "won"], path)
+        finally:
+            listener.close()
+        self.assertEqual(len(received), 1)
+        self.assertEqual(code, 1)  # not None: the caller must not run the command again
+
+    def test_idle_timeout_waits_for_a_running_command(self):
+        runner = SlowRunner(1.5)
+        path, server_thread = self.start(runner, idle_timeout=0.3)
+        client, result = self.forward_in_background(path, ["leads", "set-status"])
+        client.join(10)
+        self.assertEqual(result["code"], 0)
+        self.assertEqual(len(runner.calls), 1)
+        # Idle again after the command: the reaper may now stop the daemon.
+        server_thread.join(5)
+        self.assertFalse(server_thread.is_alive())
+        self.assertGreaterEqual(self.stopped_at, runner.finished_at)
+
+    def test_stop_lets_a_running_command_finish(self):
+        runner = SlowRunner(1.0)
+        path, server_thread = self.start(runner)
+        client, result = self.forward_in_background(path, ["leads", "set-status"])
+        self.assertTrue(wait_for(lambda: runner.calls))
+        self.assertIsNotNone(lgp_daemon.shutdown(path))
+        client.join(10)
+        self.assertEqual(result["code"], 0)
+        server_thread.join(5)
+        self.assertFalse(server_thread.is_alive())
+        self.assertGreaterEqual(self.stopped_at, runner.finished_at)
+
+
+class ForwardDecisionTest(unittest.TestCase):
+    def test_forwardable_commands(self):
+        for argv in (["leads", "find", "--email", "a@b.c"], ["--base-url", "http://x", "pipeline"],
+                     ["--no-cache", "leads", "list", "--client", "acme"]):
+            self.assertTrue(lgp.forwardable(argv), argv)
+
+    def test_local_commands(self):
+        for argv in ([], ["--help"], ["--no-daemon", "leads", "find"], ["--profile", "leads", "find"],
+                     ["auth"], ["serve", "--status"], ["fleet", "run", "--tenants", "t.yaml", "--", "pipeline"],
+                     ["leads", "list", "--client", "acme", "--all"]):
+            self.assertFalse(lgp.forwardable(argv), argv)
+
+    def test_import_leaves_feature_modules_out(self):
+        # What a forwarded call pays for: `import lgp` must not pull in the feature modules.
+        heavy = ["asyncio", "yaml", "lgp_client", "lgp_fleet", "lgp_webhooks", "lgp_pipeline", "lead_distribution"]
+        code = f"import sys, lgp; print([m for m in {heavy!r} if m in sys.modules])"
+        out = subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
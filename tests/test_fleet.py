@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+lgp fleet — tenant isolation tests
+==================================
+Runs `lgp fleet run -- territory sync` for two tenants against a local
+stand-in for the LeadGenius bulk listing and checks that each tenant's
+requests carry its own API key and company ID, never the parent's
+LGP_COMPANY_ID, and that a tenant without credentials of its own is refused
+instead of running as the operator's ~/.leadgenius_auth.json account.
+
+Usage:
+  npm test                             (all unit tests)
+  python3 tests/test_fleet.py
+
+No live API or credentials needed; all local state goes to a temp directory.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Local caches (territory mirror, registry, response cache) live in a scratch directory.
+os.environ["LGP_CACHE_DIR"] = tempfile.mkdtemp(prefix="lgp-fleet-test-")
+os.environ["LGP_NO_DAEMON"] = "1"
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+import lgp  # noqa: E402
+import lgp_client  # noqa: E402
+import lgp_fleet  # noqa: E402
+
+TENANTS = [
+    {"name": "acme", "api_key": "lgp_acme", "user_id": "user-acme", "company_id": "company-acme"},
+    {"name": "beta", "api_key": "lgp_beta", "user_id": "user-beta", "company_id": "company-beta"},
+]
+
+
+class BulkListing(BaseHTTPRequestHandler):
+    """GET /api/enrich-leads/list: records (api key, companyId) and answers one lead per company."""
+    seen = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        company_id = parse_qs(url.query).get("companyId", [None])[0]
+        BulkListing.seen.append((self.headers.get("x-api-key"), company_id))
+        body = json.dumps({"items": [{"id": f"{company_id}-lead", "client_id": "c1",
+                                      "companyName": company_id, "companyUrl": f"{company_id}.example"}]})
+        data = body.encode("utf-8")
+        self.send_response(200 if url.path == "/api/enrich-leads/list" else 404)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def run_fleet(tenants, command):
+    """Run `lgp fleet run` over `tenants` with a parent LGP_COMPANY_ID set. Returns (exit code, requests seen)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BulkListing)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    BulkListing.seen = []
+
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump([{**t, "base_url": base_url} for t in tenants], f)
+    saved = {k: os.environ.get(k) for k in ("LGP_COMPANY_ID", "LGP_API_KEY", "LGP_USER_ID")}
+    os.environ.update({"LGP_COMPANY_ID": "company-PARENT", "LGP_API_KEY": "lgp_parent", "LGP_USER_ID": "user-parent"})
+    try:
+        lgp.main(["fleet", "run", "--tenants", path, "--"] + command)
+        code = 0
+    except SystemExit as e:
+        code = e.code or 0
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        os.unlink(path)
+        server.shutdown()
+        server.server_close()
+    return code, BulkListing.seen
+
+
+class FleetIsolationTest(unittest.TestCase):
+    def setUp(self):
+        # The operator's stored login, which no tenant may borrow.
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"api_key": "lgp_OPERATOR", "user_id": "operator-uid"}, f)
+        saved, lgp_client.AUTH_FILE = lgp_client.AUTH_FILE, path
+        self.addCleanup(setattr, lgp_client, "AUTH_FILE", saved)
+        self.addCleanup(os.unlink, path)
+
+    def test_each_tenant_uses_its_own_company_id(self):
+        code, seen = run_fleet(TENANTS, ["territory", "sync"])
+        self.assertEqual(code, 0)
+        self.assertEqual(sorted(seen), [("lgp_acme", "company-acme"), ("lgp_beta", "company-beta")])
+
+    def test_tenant_without_company_id_does_not_inherit_the_parents(self):
+        tenants = [TENANTS[0], {k: v for k, v in TENANTS[1].items() if k != "company_id"}]
+        code, seen = run_fleet(tenants, ["territory", "sync"])
+        self.assertEqual(code, 1)
+        self.assertEqual(seen, [("lgp_acme", "company-acme")])
+
+    def test_tenant_without_credentials_is_refused(self):
+        for field in ("api_key", "user_id"):
+            tenants = [TENANTS[0], {k: v for k, v in TENANTS[1].items() if k != field}]
+            code, seen = run_fleet(tenants, ["territory", "sync"])
+            self.assertEqual(code, 1, field)
+            self.assertEqual(seen, [], field)
+
+    def test_tenant_env_never_reads_the_auth_file(self):
+        env = lgp_fleet.tenant_env({"name": "beta", "company_id": "co-beta"}, base={})
+        self.assertEqual(lgp_client.load_credentials(env, auth_file=False), (None, None))
+        env = lgp_fleet.tenant_env({"name": "beta", "api_key": "lgp_beta"}, base={})
+        self.assertEqual(lgp_client.load_credentials(env, auth_file=False), ("lgp_beta", None))
+
+    def test_distribution_needs_appsync_credentials_only(self):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump([{"name": "beta", "appsync_key": "da2-beta", "company_id": "co-beta"}], f)
+        self.addCleanup(os.unlink, path)
+        self.assertEqual(len(lgp_fleet.load_tenants(path, lgp_fleet.DISTRIBUTION_FIELDS)), 1)
+        with self.assertRaises(ValueError):
+            lgp_fleet.load_tenants(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+lgp_latency — circuit breaker tests
+===================================
+Checks the breaker's closed / open / half-open cycle, that bulk senders
+(import_csv, hubspot_sync) wait out an open breaker, however many times it
+refuses them, instead of failing their leads after MAX_RETRIES refusals, and
+that AsyncLeadGeniusClient requests get the same breakers and timeouts.
+
+Usage:
+  npm test                             (all unit tests)
+  python3 tests/test_latency.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+import hubspot_sync  # noqa: E402
+import import_csv  # noqa: E402
+import lgp_client  # noqa: E402
+import lgp_latency  # noqa: E402
+
+COOLDOWN = 0.2
+
+
+class Ok(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith("/api/slow"):
+            time.sleep(1)
+        data = json.dumps({"ok": True}).encode("utf-8")
+        try:
+            self.send_response(500 if self.path.startswith("/api/fail") else 200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out first
+
+
+def trip(guard):
+    for _ in range(lgp_latency.BREAKER_FAILURES):
+        guard.record(False)
+
+
+class BreakerTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(lgp_latency, "BREAKER_COOLDOWN", COOLDOWN)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.guard = lgp_latency.CircuitBreaker("breaker.test")
+
+    def test_opens_after_consecutive_failures(self):
+        trip(self.guard)
+        self.assertEqual(self.guard.state, lgp_latency.OPEN)
+        with self.assertRaises(lgp_latency.CircuitOpenError):
+            self.guard.before()
+
+    def test_half_open_admits_one_probe(self):
+        trip(self.guard)
+        time.sleep(COOLDOWN)
+        self.assertTrue(self.guard.before())  # the probe
+        self.assertEqual(self.guard.state, lgp_latency.HALF_OPEN)
+        with self.assertRaises(lgp_latency.CircuitOpenError):
+            self.guard.before()  # refused while the probe is in flight
+        self.guard.record(True, probe=True)
+        self.assertEqual(self.guard.state, lgp_latency.CLOSED)
+        self.assertFalse(self.guard.before())
+
+    def test_failed_probe_reopens(self):
+        trip(self.guard)
+        time.sleep(COOLDOWN)
+        self.guard.before()
+        self.guard.record(False, probe=True)
+        self.assertEqual(self.guard.state, lgp_latency.OPEN)
+        self.assertEqual(self.guard.trips, 2)
+        with self.assertRaises(lgp_latency.CircuitOpenError):
+            self.guard.before()
+
+    def test_bulk_probes_later_than_interactive(self):
+        trip(self.guard)
+        time.sleep(COOLDOWN)
+        with self.assertRaises(lgp_latency.CircuitOpenError):
+            self.guard.before("bulk")
+        self.assertTrue(self.guard.before("interactive"))
+
+
+class BulkWaitTest(unittest.TestCase):
+    """A pending interactive probe refuses bulk requests for many MAX_RETRIES in a row."""
+
+    def setUp(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Ok)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.host = f"127.0.0.1:{server.server_address[1]}"
+
+        guard = lgp_latency.breaker(self.host)
+        trip(guard)
+        guard._opened -= lgp_latency.BREAKER_COOLDOWN * lgp_latency.BULK_COOLDOWN_FACTOR
+        self.assertTrue(guard.before("interactive"))  # an interactive probe is now in flight
+        self.guard = guard
+
+        # Breaker refusals ask for >= 1s; count them and shorten the waits.
+        self.sleeps = 0
+        real_sleep = time.sleep
+
+        def sleep(seconds):
+            self.sleeps += 1
+            if self.sleeps == 3 * import_csv.MAX_RETRIES:
+                self.guard.record(True, probe=True)  # the probe succeeds, the breaker closes
+            real_sleep(0.001)
+        patcher = mock.patch.object(time, "sleep", sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_import_waits_for_the_breaker(self):
+        response = import_csv.send_with_retry(f"http://{self.host}/api/leads", {}, max_retries=import_csv.MAX_RETRIES)
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(self.sleeps, 3 * import_csv.MAX_RETRIES)
+
+    def test_hubspot_waits_for_the_breaker(self):
+        client = hubspot_sync.HubSpotClient("token", base_url=f"http://{self.host}", rate_per_minute=0)
+        self.assertEqual(client.request("GET", "/crm/v3/objects/contacts"), {"ok": True})
+        self.assertGreaterEqual(self.sleeps, 3 * client.max_retries)
+
+
+class AsyncClientTest(unittest.TestCase):
+    def setUp(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Ok)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.host = f"127.0.0.1:{server.server_address[1]}"
+
+    def call(self, path, **kwargs):
+        async def run():
+            async with lgp_client.AsyncLeadGeniusClient("lgp_test", "user", base_url=f"http://{self.host}",
+                                                        max_retries=1, **kwargs) as lg:
+                return await lg.call("GET", path)
+        return asyncio.run(run())
+
+    def test_failures_open_the_breaker(self):
+        self.assertEqual(self.call("ok"), {"ok": True})
+        for _ in range(lgp_latency.BREAKER_FAILURES):
+            with self.assertRaises(lgp_client.LeadGeniusError):
+                self.call("fail")
+        self.assertEqual(lgp_latency.breaker(self.host).state, lgp_latency.OPEN)
+        with self.assertRaisesRegex(lgp_client.LeadGeniusError, "degraded"):
+            self.call("ok")
+
+    def test_requests_time_out(self):
+        started = time.monotonic()
+        with self.assertRaises(lgp_client.LeadGeniusError):
+            self.call("slow", timeout=0.2)
+        self.assertLess(time.monotonic() - started, 0.9)
+        stats = lgp_latency.metrics()["endpoints"][f"GET {self.host}/slow"]
+        self.assertEqual(stats["timeouts"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()